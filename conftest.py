@@ -5,6 +5,11 @@ from werkzeug.security import generate_password_hash
 from app import create_app
 from modules.database import db, init_db, User
 import modules.weather_app as weather_app
+from modules.ekonomia.chart_cache import charts as ekonomia_charts
+from modules.ekonomia.klasy_api_obsluga.TableCache import table_cache as nbp_table_cache
+from modules.ekonomia import cross_rates as ekonomia_cross_rates
+from modules.ekonomia import analytics as ekonomia_analytics
+from modules.ekonomia import latest as ekonomia_latest
 from config import TestingConfig
 
 
@@ -77,14 +82,79 @@ def e2e_server(app):
 # FIXTURE czyszczenia CACHE pogody
 # ========================= 
 @pytest.fixture(autouse=True)
-def clear_weather_cache():
+def clear_weather_cache(monkeypatch):
     '''
     Czyści cache pogody przed i po każdym teście.
+    Wspólny cache (plik SQLite) jest wyłączony - testy, które go sprawdzają,
+    podstawiają własny w katalogu tymczasowym.
     '''
+    monkeypatch.setattr(weather_app, "_OW_SHARED", None)
     weather_app._OW_CACHE.clear()
     yield
     weather_app._OW_CACHE.clear()
 
+# =========================
+# FIXTURE czyszczenia CACHE wykresów ekonomii
+# =========================
+@pytest.fixture(autouse=True)
+def clear_chart_cache():
+    '''
+    Czyści cache wyrenderowanych wykresów przed i po każdym teście.
+    '''
+    ekonomia_charts.clear()
+    yield
+    ekonomia_charts.clear()
+
+# =========================
+# FIXTURE czyszczenia CACHE tabel NBP
+# =========================
+@pytest.fixture(autouse=True)
+def clear_nbp_table_cache():
+    '''
+    Czyści współdzielony cache tabel NBP (kursy, złoto) przed i po każdym teście.
+    '''
+    nbp_table_cache.clear()
+    yield
+    nbp_table_cache.clear()
+
+# =========================
+# FIXTURE czyszczenia macierzy kursów krzyżowych
+# =========================
+@pytest.fixture(autouse=True)
+def clear_cross_rates():
+    '''
+    Czyści współdzieloną macierz kursów krzyżowych przed i po każdym teście.
+    '''
+    ekonomia_cross_rates.clear()
+    yield
+    ekonomia_cross_rates.clear()
+
+# =========================
+# FIXTURE czyszczenia cache statystyk serii
+# =========================
+@pytest.fixture(autouse=True)
+def clear_analytics():
+    '''
+    Czyści cache statystyk kroczących (analytics) przed i po każdym teście.
+    '''
+    ekonomia_analytics.clear()
+    yield
+    ekonomia_analytics.clear()
+
+# =========================
+# FIXTURE MANIFESTU OSTATNICH NOTOWAŃ
+# =========================
+@pytest.fixture(autouse=True)
+def isolate_latest(tmp_path_factory, monkeypatch):
+    '''
+    Manifest ostatnich notowań czytany z pustego katalogu tymczasowego
+    (testy z podmienionymi seriami nie widzą manifestu z data/economics).
+    '''
+    monkeypatch.setattr(ekonomia_latest, 'DATA_DIR', str(tmp_path_factory.mktemp('latest')))
+    ekonomia_latest.clear()
+    yield
+    ekonomia_latest.clear()
+
 # =========================
 # FIXTURE czyszczenia sent_emails
 # =========================
@@ -0,0 +1,446 @@
+"""Bounded in-process caches shared by the application modules.
+
+`BoundedCache` is a thread-safe LRU mapping with a per-entry TTL, limits on
+the number of entries and on their (estimated) size in bytes, and counters
+of hits, misses, evictions and expirations. Keys live in namespaces
+(`cache.namespace('daily')`), each with its own counters, so one cache can
+hold several kinds of responses of a module.
+
+Expired entries are dropped when they are read and, independently, by one
+daemon thread per process that sweeps every registered cache every
+SWEEP_INTERVAL seconds - entries that are never read again do not pile up.
+
+`SingleFlight` coalesces concurrent loads of the same key: the first caller
+runs the load, callers arriving while it is in flight wait for its result
+(or exception) instead of repeating the upstream call.
+
+`SQLiteStore` is a shared (L2) backend: a small SQLite file that all worker
+processes of a node read and write, so an entry fetched by one worker is
+seen by the others. Any object with the same get/set/delete/clear methods
+(e.g. a Redis client wrapper) can be used in its place. Backend errors are
+logged and treated as misses - the L2 never fails a request.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# domyślne limity pojedynczego cache
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# co ile sekund wątek w tle usuwa wygasłe wpisy
+SWEEP_INTERVAL = 30
+
+DEFAULT_NAMESPACE = 'default'
+
+_STAT_NAMES = ('hits', 'misses', 'sets', 'evictions', 'expirations')
+
+
+def estimate_size(value):
+    """Approximate memory footprint of plain data (dicts, lists, strings, numbers) in bytes"""
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'size')
+
+    def __init__(self, value, expires, size):
+        self.value = value
+        self.expires = expires
+        self.size = size
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with TTL, entry/byte limits and statistics.
+
+    `ttl` is the default lifetime in seconds (None = no expiry); `set` may
+    override it per entry. `sizeof` estimates the size of a value in bytes
+    (estimate_size by default); values larger than `max_bytes` are not
+    cached at all.
+    """
+
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl=None, sizeof=estimate_size, sweep=True):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        _register(self, sweep)
+
+    # --- wewnętrzne (wywoływane pod blokadą) ---
+
+    def _count(self, namespace, stat, n=1):
+        counters = self._stats.get(namespace)
+        if counters is None:
+            counters = self._stats[namespace] = dict.fromkeys(_STAT_NAMES, 0)
+        counters[stat] += n
+
+    def _drop(self, full_key):
+        entry = self._entries.pop(full_key)
+        self._bytes -= entry.size
+        return entry
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            full_key = next(iter(self._entries))
+            self._drop(full_key)
+            self._count(full_key[0], 'evictions')
+
+    # --- API ---
+
+    def get(self, key, namespace=DEFAULT_NAMESPACE, default=None):
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self._count(namespace, 'misses')
+                return default
+            if entry.expires is not None and time.time() >= entry.expires:
+                self._drop(full_key)
+                self._count(namespace, 'expirations')
+                self._count(namespace, 'misses')
+                return default
+            self._entries.move_to_end(full_key)
+            self._count(namespace, 'hits')
+            return entry.value
+
+    def set(self, key, value, namespace=DEFAULT_NAMESPACE, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        size = self.sizeof(value)
+        full_key = (namespace, key)
+        with self._lock:
+            if full_key in self._entries:
+                self._drop(full_key)
+            if size > self.max_bytes:
+                # za duży wpis wypchnąłby cały cache
+                return False
+            expires = time.time() + ttl if ttl is not None else None
+            self._entries[full_key] = _Entry(value, expires, size)
+            self._bytes += size
+            self._count(namespace, 'sets')
+            self._evict()
+            return True
+
+    def delete(self, key, namespace=DEFAULT_NAMESPACE):
+        with self._lock:
+            if (namespace, key) in self._entries:
+                self._drop((namespace, key))
+                return True
+            return False
+
+    def get_or_set(self, key, compute, namespace=DEFAULT_NAMESPACE, ttl=None):
+        """Cached value of `key`, computing and storing `compute()` on a miss"""
+        sentinel = object()
+        value = self.get(key, namespace, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(key, value, namespace, ttl)
+        return value
+
+    def namespace(self, name):
+        return CacheNamespace(self, name)
+
+    def expire(self):
+        """Drop all expired entries; returns how many were removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.expires is not None and now >= e.expires]
+            for full_key in expired:
+                self._drop(full_key)
+                self._count(full_key[0], 'expirations')
+                removed += 1
+        return removed
+
+    def clear(self, namespace=None):
+        """Remove all entries (or those of one namespace); counters are kept"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for full_key in [k for k in self._entries if k[0] == namespace]:
+                self._drop(full_key)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self):
+        """Counters per namespace plus totals, current entries and bytes"""
+        with self._lock:
+            namespaces = {ns: dict(c) for ns, c in self._stats.items()}
+            entries = {}
+            for ns, _ in self._entries:
+                entries[ns] = entries.get(ns, 0) + 1
+            total = dict.fromkeys(_STAT_NAMES, 0)
+            for ns, counters in namespaces.items():
+                counters['entries'] = entries.get(ns, 0)
+                for stat in _STAT_NAMES:
+                    total[stat] += counters[stat]
+            lookups = total['hits'] + total['misses']
+            total.update(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                hit_ratio=round(total['hits'] / lookups, 4) if lookups else None,
+            )
+            return {'name': self.name, 'total': total, 'namespaces': namespaces}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def contains(self, key, namespace=DEFAULT_NAMESPACE):
+        """Whether `key` has a live entry in `namespace` (counters untouched)"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            return entry is not None and (entry.expires is None or time.time() < entry.expires)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+
+class CacheNamespace:
+    """View of a BoundedCache restricted to one namespace"""
+
+    def __init__(self, cache, name):
+        self.cache = cache
+        self.name = name
+
+    def get(self, key, default=None):
+        return self.cache.get(key, self.name, default)
+
+    def set(self, key, value, ttl=None):
+        return self.cache.set(key, value, self.name, ttl)
+
+    def delete(self, key):
+        return self.cache.delete(key, self.name)
+
+    def get_or_set(self, key, compute, ttl=None):
+        return self.cache.get_or_set(key, compute, self.name, ttl)
+
+    def __contains__(self, key):
+        return self.cache.contains(key, self.name)
+
+    def clear(self):
+        self.cache.clear(self.name)
+
+    def stats(self):
+        return self.cache.stats()['namespaces'].get(self.name, dict.fromkeys(_STAT_NAMES + ('entries',), 0))
+
+
+class SingleFlight:
+    """Per-key request coalescing: one load in flight per key at a time."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'shared': 0}
+
+    def do(self, key, load, timeout=None):
+        """Result of `load()`; concurrent callers with the same key share one call.
+
+        Followers wait up to `timeout` seconds (None = as long as the
+        leader's load takes) and get the leader's exception if it fails.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.stats['leaders'] += 1
+            else:
+                self.stats['shared'] += 1
+        if not leader:
+            return future.result(timeout)
+        try:
+            result = load()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class SQLiteStore:
+    """Key-value store in a SQLite file shared by processes (JSON values, TTL per key)."""
+
+    # co ile zapisów usuwamy wygasłe wiersze
+    PURGE_EVERY = 200
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # połączenie SQLite nie może przejść przez fork() - nowe w procesie potomnym
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                     '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        try:
+            row = self._connect().execute(
+                'SELECT value, expires FROM entries WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning('Shared cache %s read failed: %s', self.path, e)
+            return default
+        if row is None or (row[1] is not None and time.time() >= row[1]):
+            return default
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl is not None else None
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)',
+                         (key, json.dumps(value, ensure_ascii=False), expires))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.purge()
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning('Shared cache %s write failed: %s', self.path, e)
+            return False
+
+    def delete(self, key):
+        try:
+            self._connect().execute('DELETE FROM entries WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            logger.warning('Shared cache %s delete failed: %s', self.path, e)
+
+    def purge(self):
+        """Delete expired rows; returns how many were removed"""
+        try:
+            cur = self._connect().execute('DELETE FROM entries WHERE expires < ?', (time.time(),))
+            return cur.rowcount
+        except sqlite3.Error as e:
+            logger.warning('Shared cache %s purge failed: %s', self.path, e)
+            return 0
+
+    def clear(self):
+        try:
+            self._connect().execute('DELETE FROM entries')
+        except sqlite3.Error as e:
+            logger.warning('Shared cache %s clear failed: %s', self.path, e)
+
+    def __len__(self):
+        try:
+            return self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+# ======================= REJESTR I SPRZĄTANIE W TLE =======================
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+_sweeper = None
+
+
+def _register(cache, sweep):
+    with _registry_lock:
+        _registry.add(cache)
+    if sweep:
+        _start_sweeper()
+
+
+def registered():
+    """All live caches of the process (for diagnostics)"""
+    with _registry_lock:
+        return sorted(_registry, key=lambda c: c.name)
+
+
+def all_stats():
+    return {cache.name: cache.stats() for cache in registered()}
+
+
+def sweep_all():
+    removed = 0
+    for cache in registered():
+        try:
+            removed += cache.expire()
+        except Exception as e:
+            logger.warning('Cache %s sweep failed: %s', cache.name, e)
+    return removed
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        sweep_all()
+
+
+def _start_sweeper():
+    global _sweeper
+    with _registry_lock:
+        if _sweeper is not None and _sweeper.is_alive():
+            return
+        _sweeper = threading.Thread(target=_sweep_loop, name='cache-sweeper', daemon=True)
+        _sweeper.start()
+
+
+def _after_fork():
+    # wątek nie przeżywa fork() - proces potomny uruchomi własny przy następnym cache
+    global _sweeper, _registry_lock
+    _registry_lock = threading.Lock()
+    _sweeper = None
+    if len(_registry):
+        _start_sweeper()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,297 @@
+"""Out-of-process chart rendering shared by the economics and weather modules.
+
+Charts are drawn with matplotlib's object-oriented API (`Figure` +
+`FigureCanvasAgg`), never with the global `pyplot` state machine, in a small
+bounded pool of worker processes. Request threads only submit a plain-data
+chart spec and wait (with a timeout) for the PNG bytes, so rendering neither
+holds the web process' GIL nor races on shared pyplot state.
+
+Admission is bounded: at most MAX_PENDING renders may be queued or running;
+further requests wait up to the timeout for a slot and then fail with
+RenderBusy instead of piling up. With CHART_RENDER_WORKERS=0 charts are drawn
+in the calling thread (the OO API is thread-safe), e.g. for one-off scripts.
+
+Workers are forked from a forkserver (spawn where forkserver is missing, e.g.
+Windows), never from the multi-threaded web process itself. The forkserver
+preloads only this module and matplotlib. As in any spawn-based pool, every
+worker re-imports the `__main__` script, so scripts using the renderer need
+the `if __name__ == '__main__'` guard; when `__main__` is not a file on disk
+(code piped through stdin) the pool could not start at all - charts are then
+drawn inline.
+"""
+import atexit
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import spawn
+
+logger = logging.getLogger(__name__)
+
+# liczba procesów renderujących (0 = rysowanie w wątku wywołującym)
+RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', 2))
+# ile wykresów może czekać w kolejce lub być rysowanych jednocześnie
+MAX_PENDING = 8
+# maksymalny czas oczekiwania na wykres (sekundy), łącznie z kolejką
+RENDER_TIMEOUT = 15
+# moduły importowane raz w procesie forkserver, dziedziczone przez procesy robocze
+PRELOAD_MODULES = ['modules.chart_renderer', 'matplotlib.figure', 'matplotlib.backends.backend_agg']
+
+
+class RenderError(Exception):
+    """Chart could not be rendered"""
+
+
+class RenderBusy(RenderError):
+    """Render queue is full"""
+
+
+class RenderTimeout(RenderError):
+    """Chart was not rendered in time"""
+
+
+# ======================= DRAWING (worker processes) =======================
+
+def _figure(figsize, dpi=100, facecolor=None):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize, dpi=dpi, facecolor=facecolor)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig, **savefig_kwargs):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', **savefig_kwargs)
+    return buf.getvalue()
+
+
+def draw_line_chart(spec):
+    """Single line chart (currency rates, gold prices).
+
+    spec: x, y (sequences; x may be datetime64), color, figsize, title,
+    x_label, y_label, facecolor, text_color, tick_label_color, autofmt_xdate,
+    empty_text / empty_fontsize shown when there are no points.
+    """
+    facecolor = spec.get('facecolor', '#c2c9b6')
+    text_color = spec.get('text_color', '#2B370A')
+    fig = _figure(spec.get('figsize', (10, 5)), facecolor=facecolor)
+    ax = fig.add_subplot()
+    ax.set_facecolor(facecolor)
+
+    if len(spec.get('y', ())):
+        ax.plot(spec['x'], spec['y'], color=spec.get('color', '#6c7c40'), linewidth=spec.get('linewidth', 2))
+    else:
+        ax.text(0.5, 0.5, spec.get('empty_text', 'Brak danych'), ha='center', va='center',
+                fontsize=spec.get('empty_fontsize'), color=text_color, transform=ax.transAxes)
+
+    if spec.get('title'):
+        ax.set_title(spec['title'], color=text_color)
+    if spec.get('x_label'):
+        ax.set_xlabel(spec['x_label'], color=text_color)
+    if spec.get('y_label'):
+        ax.set_ylabel(spec['y_label'], color=text_color)
+    ax.tick_params(colors=text_color)
+    if spec.get('tick_label_color'):
+        for label in ax.get_xticklabels() + ax.get_yticklabels():
+            label.set_color(spec['tick_label_color'])
+    if spec.get('autofmt_xdate'):
+        fig.autofmt_xdate()
+    return _png(fig, facecolor=fig.get_facecolor())
+
+
+def draw_weather_chart(spec):
+    """24h forecast: smoothed temperature line with precipitation bars.
+
+    spec: labels (HH:MM), temps (°C, None allowed), precip (mm, None allowed).
+    """
+    import numpy as np
+
+    labels, temps, precip = spec['labels'], spec['temps'], spec['precip']
+    fig = _figure((8.0, 3.2), dpi=160)
+    ax1 = fig.add_subplot()
+
+    # tło przezroczyste i wyłącz górne/prawe spiny
+    fig.patch.set_alpha(0)
+    ax1.set_facecolor("none")
+    for spine in ["top", "right"]:
+        ax1.spines[spine].set_visible(False)
+
+    # Przygotuj dane X jako indeksy (ułatwia interpolację)
+    x = np.arange(len(temps))
+    temps_arr = np.array([np.nan if t is None else t for t in temps], dtype=float)
+    # interpoluj ewentualne braki
+    if np.isnan(temps_arr).any():
+        nans = np.isnan(temps_arr)
+        good = ~nans
+        if good.sum() >= 2:
+            temps_arr[nans] = np.interp(x[nans], x[good], temps_arr[good])
+        else:
+            temps_arr[nans] = 0.0
+
+    # wygładź krzywą liniową (interpolacja) dla estetyki
+    xp = np.linspace(x.min(), x.max(), max(200, len(x) * 50))
+    temps_smooth = np.interp(xp, x, temps_arr)
+
+    # Kolory
+    temp_color = "#2B7A78"  # teal
+    precip_color = "#8AA24A"  # łagodny oliwkowy
+
+    # narysuj gładką linię temperatury i znaczniki punktów (bez wypełnienia)
+    ax1.plot(xp, temps_smooth, color=temp_color, linewidth=2.2, zorder=3)
+    ax1.scatter(x, temps_arr, s=26, color=temp_color, edgecolor="white", zorder=4)
+
+    # Oś X: etykiety godzin, pokazuj co drugi jeśli jest ich dużo
+    ax1.set_xticks(x)
+    if len(labels) > 8:
+        display_labels = [lbl if i % 2 == 0 else "" for i, lbl in enumerate(labels)]
+    else:
+        display_labels = labels
+    ax1.set_xticklabels(display_labels, rotation=0)
+
+    ax1.set_ylabel("Temperatura [°C]", color=temp_color)
+    ax1.tick_params(axis="y", labelcolor=temp_color)
+    ax1.grid(axis="y", linestyle="--", linewidth=0.6, color="#E9E9E9")
+
+    # opady jako cienkie słupki na tle, poniżej linii
+    ax2 = ax1.twinx()
+    precip_vals = [0.0 if p is None else p for p in precip]
+    ax2.bar(x, precip_vals, color=precip_color, alpha=0.65, width=0.5, zorder=1)
+    ax2.set_ylim(0, max(max(precip_vals) * 1.6, 1.0))
+    ax2.set_ylabel("Opady [mm]", color=precip_color)
+    ax2.tick_params(axis="y", labelcolor=precip_color)
+
+    fig.tight_layout(pad=0.6)
+    return _png(fig, transparent=True)
+
+
+CHARTS = {
+    'line': draw_line_chart,
+    'weather': draw_weather_chart,
+}
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams.update({"font.family": "sans-serif", "font.size": 10})
+
+
+def _render_job(kind, spec):
+    return CHARTS[kind](spec)
+
+
+# ======================= POOL (web process) =======================
+
+def _pool_context():
+    """multiprocessing context for the worker pool, None when workers cannot start"""
+    # ścieżka skryptu __main__, który multiprocessing importuje w procesach potomnych
+    main_path = spawn.get_preparation_data('ignore').get('init_main_from_path')
+    if main_path is not None and not os.path.isfile(main_path):
+        return None
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    ctx = multiprocessing.get_context('forkserver')
+    # bez '__main__': skrypt bez strażnika __name__ wykonywałby się w forkserverze
+    ctx.set_forkserver_preload(PRELOAD_MODULES)
+    return ctx
+
+
+class ChartRenderer:
+    """Bounded process pool turning chart specs into PNG bytes."""
+
+    def __init__(self, workers=RENDER_WORKERS, max_pending=MAX_PENDING, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_unavailable = False
+        self._inline_ready = False
+        self._lock = threading.Lock()
+
+    def _init_inline(self):
+        with self._lock:
+            if not self._inline_ready:
+                _init_worker()
+                self._inline_ready = True
+
+    def _get_pool(self):
+        """The worker pool, or None when charts have to be drawn inline"""
+        with self._lock:
+            if self._pool is None and not self._pool_unavailable:
+                # bez zwykłego fork: nie kopiujemy wątków i blokad wielowątkowego serwera
+                ctx = _pool_context()
+                if ctx is None:
+                    logger.warning('__main__ is not a file, chart workers cannot start - rendering inline')
+                    self._pool_unavailable = True
+                else:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=ctx,
+                        initializer=_init_worker,
+                    )
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, kind, spec, timeout=None):
+        """Render chart `kind` from `spec` and return PNG bytes.
+
+        `timeout` covers waiting for a queue slot and the render together.
+        Raises RenderBusy when the queue stays full, RenderTimeout when the
+        chart is not ready in time and RenderError when the worker fails.
+        A chart that timed out while already drawing keeps its worker busy
+        until it finishes - only jobs still queued in the pool are cancelled.
+        """
+        if kind not in CHARTS:
+            raise ValueError(f'Unknown chart kind: {kind}')
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise RenderBusy('Chart render queue is full')
+        try:
+            pool = self._get_pool() if self.workers else None
+            if pool is None:
+                self._init_inline()
+                return _render_job(kind, spec)
+            try:
+                future = pool.submit(_render_job, kind, spec)
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeout:
+                # zadanie już rysowane nie da się anulować - worker dokończy je w tle
+                future.cancel()
+                raise RenderTimeout(f'Chart {kind} not rendered within {timeout}s')
+            except BrokenProcessPool as e:
+                # proces roboczy padł - następne zapytanie dostanie nową pulę
+                self._reset_pool(pool)
+                raise RenderError(f'Chart worker died: {e}') from e
+            except Exception as e:
+                logger.warning('Chart %s failed: %s', kind, e)
+                raise RenderError(str(e)) from e
+        finally:
+            self._slots.release()
+
+    def render_base64(self, kind, spec, timeout=None):
+        """`render` encoded as base64 text (for JSON responses)"""
+        return base64.b64encode(self.render(kind, spec, timeout)).decode('utf-8')
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# wspólny renderer wykresów dla całego procesu
+renderer = ChartRenderer()
+atexit.register(renderer.shutdown)
@@ -358,6 +358,53 @@ class FavoriteCurrency(db.Model):
         db.session.commit()
 
 
+class GeocodeQuery(db.Model):
+    """Geocoding results cached per normalized query (see modules.geocoding)"""
+    __tablename__ = 'geocode_queries'
+
+    query_norm = db.Column(db.String(200), primary_key=True)
+    results = db.Column(db.Text, nullable=False)  # lista miejsc z OpenWeather (JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<GeocodeQuery {self.query_norm}>'
+
+    @staticmethod
+    def get(query_norm):
+        return db.session.get(GeocodeQuery, query_norm)
+
+
+class GeocodePlace(db.Model):
+    """Place returned by geocoding, one row per normalized name alias.
+
+    The index on name_norm serves both exact and prefix lookups
+    (range scan name_norm >= prefix AND name_norm < prefix + U+FFFF).
+    """
+    __tablename__ = 'geocode_places'
+    __table_args__ = (db.UniqueConstraint('name_norm', 'lat', 'lon', name='uq_geocode_place'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name_norm = db.Column(db.String(200), nullable=False, index=True)
+    lat = db.Column(db.Float, nullable=False)
+    lon = db.Column(db.Float, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # wpis z OpenWeather (JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<GeocodePlace {self.name_norm} ({self.lat}, {self.lon})>'
+
+    @staticmethod
+    def with_prefix(prefix, limit):
+        """Places whose normalized name starts with `prefix`, shortest names first"""
+        return (
+            GeocodePlace.query
+            .filter(GeocodePlace.name_norm >= prefix, GeocodePlace.name_norm < prefix + '\uffff')
+            .order_by(func.length(GeocodePlace.name_norm), GeocodePlace.name_norm, GeocodePlace.id)
+            .limit(limit)
+            .all()
+        )
+
+
 def init_db(app):
     """Initialize the database with the Flask app"""
     if "sqlalchemy" not in app.extensions:
@@ -0,0 +1,142 @@
+"""Rolling statistics of NBP series (currencies and gold).
+
+For each window of WINDOWS calendar days ending at the newest quote the
+statistics are: mean, volatility (standard deviation of daily log returns,
+in percent), minimum and maximum with their dates, and the change over the
+window. They are computed with numpy whenever `fetch_nbp` writes new points
+to a series and stored next to it (`storage.write_stats`), so requests only
+read the precomputed values.
+"""
+import json
+import os
+import threading
+import numpy as np
+
+from modules.ekonomia import storage, timeseries
+
+# okna statystyk w dniach kalendarzowych
+WINDOWS = (7, 30, 90)
+
+
+def window_key(days):
+    return f'{days}d'
+
+
+def compute(name, dates, values, windows=WINDOWS):
+    """Statistics of a date-sorted series for each window, or None when empty.
+
+    `dates` are datetime64[D], `values` floats; a window covers the days
+    (last date - days, last date].
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=float)
+    if len(dates) == 0:
+        return None
+
+    last_day = dates[-1]
+    starts = np.searchsorted(dates, last_day - np.array(windows) + 1, side='left')
+    stats = {}
+    for days, start in zip(windows, starts.tolist()):
+        window = values[start:]
+        returns = np.diff(np.log(window))
+        lo, hi = int(np.argmin(window)), int(np.argmax(window))
+        stats[window_key(days)] = {
+            'points': len(window),
+            'mean': round(float(window.mean()), 6),
+            'volatility': round(float(returns.std(ddof=1)) * 100, 4) if len(returns) > 1 else None,
+            'min': float(window[lo]),
+            'min_date': str(dates[start + lo]),
+            'max': float(window[hi]),
+            'max_date': str(dates[start + hi]),
+            'change_pct': round((float(window[-1]) / float(window[0]) - 1) * 100, 4),
+        }
+    return {
+        'name': name,
+        'as_of': str(last_day),
+        'last': float(values[-1]),
+        'windows': stats,
+    }
+
+
+def update(base_path, key_date, key_value):
+    """Recompute and store statistics of the series in `base_path` (called after writes).
+
+    Only the records of the longest window are packed into arrays.
+    """
+    records = storage.merged_records(base_path, key_date)
+    if not records:
+        return None
+    since = str(np.datetime64(records[-1][key_date], 'D') - max(WINDOWS) + 1)
+    tail = [r for r in records if r[key_date] >= since]
+    name = timeseries.TimeSeriesStore.normalize_name(os.path.splitext(os.path.basename(base_path))[0])
+    stats = compute(
+        name,
+        np.array([r[key_date] for r in tail], dtype='datetime64[D]'),
+        np.array([r[key_value] for r in tail], dtype=float),
+    )
+    storage.write_stats(base_path, stats)
+    return stats
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _file_version(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_stored(path):
+    """Stored statistics, cached until the stats file changes"""
+    version = _file_version(path)
+    if version is None:
+        return None
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return cached[1] if cached else None
+    with _lock:
+        _cache[path] = (version, stats)
+    return stats
+
+
+def get_stats(name, store=None):
+    """Precomputed statistics of a series or None when there is no data.
+
+    Falls back to computing them from the cached daily series when the
+    stored file is missing or older than the newest quote (e.g. data written
+    before statistics existed); that result is cached per series version.
+    """
+    store = store or timeseries.store
+    name = store.normalize_name(name)
+    series = store.get(name)
+    if series is None or series.empty:
+        return None
+
+    as_of = str(series.dates[-1])
+    stored = _read_stored(storage.stats_path(store.path_for(name)))
+    if stored is not None and stored.get('as_of') == as_of:
+        return stored
+
+    key = ('computed', name)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == series.version:
+        return cached[1]
+    dates, values = series.between(series.dates[-1] - max(WINDOWS) + 1)
+    stats = compute(name, dates, values)
+    with _lock:
+        _cache[key] = (series.version, stats)
+    return stats
+
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,61 @@
+"""Bounded LRU cache for rendered economics charts.
+
+Charts only change when the underlying NBP series changes (once a day after
+`fetch_nbp.run_update`), so a rendered PNG is cached under a key built from
+the chart kind, currency code, data version and style. The same key also
+yields a deterministic strong ETag, which lets the chart endpoints answer
+conditional requests with 304 without rendering anything.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ile wykresów trzymamy w pamięci procesu (~100 KB każdy)
+MAX_ENTRIES = 64
+
+
+class ChartCache:
+    """Thread-safe LRU mapping chart key -> base64 encoded PNG."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag_for(key):
+        """Strong ETag derived from the chart key (same key -> same bytes)."""
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key, render):
+        """Return cached chart for `key`, rendering it with `render()` on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = render()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# wspólny cache wykresów dla całego procesu
+charts = ChartCache()
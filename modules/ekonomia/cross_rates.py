@@ -0,0 +1,87 @@
+"""Precomputed N×N cross-rate matrix for the currency calculator.
+
+All NBP mid rates are quoted in PLN, so the rate between any two currencies
+is `pln[from] / pln[to]`. Instead of doing that dict math on every
+conversion, the whole matrix is built once with numpy per NBP table version
+(table numbers change only when NBP publishes) and shared by the process.
+Batch conversions are then a single fancy-indexing lookup.
+"""
+import threading
+from dataclasses import dataclass, field
+import numpy as np
+
+BASE = 'PLN'
+
+
+@dataclass(frozen=True)
+class CrossRates:
+    """Immutable cross-rate matrix: matrix[i, j] = units of codes[j] per 1 codes[i]."""
+    version: tuple
+    codes: tuple
+    matrix: np.ndarray
+    index: dict = field(repr=False)
+
+    @property
+    def pln_rates(self):
+        """Mid rates in PLN per code (the column of the matrix for PLN)."""
+        return dict(zip(self.codes, self.matrix[:, self.index[BASE]].tolist()))
+
+    def indices(self, codes):
+        """Map codes to matrix indices; raises KeyError listing unknown codes."""
+        codes = [c.upper() for c in codes]
+        unknown = sorted({c for c in codes if c not in self.index})
+        if unknown:
+            raise KeyError(', '.join(unknown))
+        return np.fromiter((self.index[c] for c in codes), dtype=np.intp, count=len(codes))
+
+    def rate(self, from_code, to_code):
+        i, j = self.indices([from_code, to_code])
+        return float(self.matrix[i, j])
+
+    def convert(self, amounts, from_codes, to_codes):
+        """Vectorized conversion; amounts/from/to broadcast against each other."""
+        amounts = np.asarray(amounts, dtype=float)
+        return amounts * self.matrix[self.indices(from_codes), self.indices(to_codes)]
+
+
+def build(rates, version=()):
+    """Build CrossRates from a {code: PLN mid rate} mapping (PLN is added)."""
+    pln = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+    pln[BASE] = 1.0
+    codes = tuple(sorted(pln))
+    vector = np.array([pln[c] for c in codes])
+    matrix = vector[:, None] / vector[None, :]
+    matrix.flags.writeable = False
+    return CrossRates(version, codes, matrix, {c: i for i, c in enumerate(codes)})
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def get_cross_rates(currencies):
+    """Return the shared matrix for the current NBP tables of `currencies`.
+
+    `currencies` is a CurrencyRates instance; its tables come from the
+    process-wide table cache, so checking the version is cheap. The matrix is
+    rebuilt only when the table numbers change. Without a version (NBP
+    unreachable) the result is built but not cached.
+    """
+    global _current
+    version = currencies.get_tables_version()
+    current = _current
+    if version and current is not None and current.version == version:
+        return current
+    with _lock:
+        if version and _current is not None and _current.version == version:
+            return _current
+        cross = build(currencies.get_current_rates(), version)
+        if version:
+            _current = cross
+        return cross
+
+
+def clear():
+    global _current
+    with _lock:
+        _current = None
@@ -1,113 +1,94 @@
-from datetime import date, datetime, timedelta
-from flask import Blueprint, render_template, jsonify, request, session
+from datetime import date, timedelta
+from flask import Blueprint, render_template, jsonify, request, session, make_response
 from modules.ekonomia.klasy_api_obsluga.Manager import Manager
+from modules.ekonomia.klasy_api_obsluga.TableCache import last_publication
 from modules.auth import api_login_required
 from modules.database import FavoriteCurrency
-from modules.ekonomia import fetch_nbp
-import io
-import base64
-import matplotlib
+from modules.ekonomia.chart_cache import charts, ChartCache
+from modules.ekonomia import latest
+from modules.chart_renderer import renderer
+from modules.lazy_import import lazy_import
 import os
-import json
-import pandas as pd
+import re
 
-# Use non-interactive Agg backend for server-side image generation
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+# numpy / pandas i moduły danych oparte na numpy są ładowane dopiero przy
+# pierwszym użyciu - workery obsługujące tylko inne blueprinty ich nie importują
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+timeseries = lazy_import('modules.ekonomia.timeseries')
+cross_rates = lazy_import('modules.ekonomia.cross_rates')
+analytics = lazy_import('modules.ekonomia.analytics')
 
 # Create blueprint for economics module 
 ekonomia_bp = Blueprint('ekonomia', __name__)
 
-def load_currency_json(currency_code):
-    """Load historical currency data from JSON file
-    
+def load_currency_json(currency_code, since=None):
+    """Load historical currency data as a DataFrame
+
+    The data comes from the cached columnar store (`timeseries`), so no JSON
+    or date parsing happens here once the series is warm.
+
     Args:
         currency_code: Currency code (e.g., 'EUR', 'USD')
+        since: optional first date to include (default: whole daily history)
         
     Returns:
         DataFrame with columns [date, rate] or None if file not found
     """
-    try:
-        json_path = os.path.join('data', 'economics', f'{currency_code.upper()}.json')
-        
-        if not os.path.exists(json_path):
-            return None
-            
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Parse JSON into DataFrame
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['effectiveDate'])
-        df['rate'] = df['mid'].astype(float)
-        
-        # Keep only needed columns and sort by date
-        df = df[['date', 'rate']].sort_values('date')
-        
-        return df
-        
-    except Exception as e:
-        print(f"Error loading JSON for {currency_code}: {e}")
+    series = timeseries.get_series(currency_code)
+    if series is None:
         return None
+    dates, values = series.between(since)
+    return pd.DataFrame({
+        'date': dates.astype('datetime64[ns]'),
+        'rate': values,
+    })
 
-def load_gold_json():
-    """Load historical gold price data from JSON file
+def load_gold_json(since=None):
+    """Load historical gold price data as a DataFrame (from the cached store)
+
+    Args:
+        since: optional first date to include (default: whole daily history)
     
     Returns:
         DataFrame with columns [date, price] or None if file not found
     """
-    try:
-        json_path = os.path.join('data', 'economics', 'gold.json')
-        
-        if not os.path.exists(json_path):
-            return None
-            
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Parse JSON into DataFrame
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df['price'] = df['price'].astype(float)
-        
-        # Sort by date
-        df = df.sort_values('date')
-        
-        return df
-        
-    except Exception as e:
-        print(f"Error loading gold JSON: {e}")
+    series = timeseries.get_series(timeseries.GOLD)
+    if series is None:
         return None
+    dates, values = series.between(since)
+    return pd.DataFrame({
+        'date': dates.astype('datetime64[ns]'),
+        'price': values,
+    })
 
 
 def get_json_rate_for_today_or_latest(currency_code):
     """Return today's rate from local JSON for `currency_code`,
     or the latest available if today's entry is missing.
 
-    Uses `load_currency_json` and does not call external APIs.
-    Returns float rate or None.
+    Reads the latest-quote manifest (or the cached series) and does not call
+    external APIs. Returns float rate or None.
     """
-    df = load_currency_json(currency_code)
-    if df is None or df.empty:
+    entry = latest.get(currency_code)
+    if entry and entry['date'] <= date.today().isoformat():
+        return entry['value']
+    series = timeseries.get_series(currency_code)
+    if series is None or series.empty:
         return None
-    try:
-        today = date.today()
-        today_rows = df[df['date'].dt.date == today]
-        if not today_rows.empty:
-            return float(today_rows['rate'].iloc[-1])
-        # fallback to latest available entry
-        return float(df['rate'].iloc[-1])
-    except Exception:
-        try:
-            return float(df['rate'].iloc[-1])
-        except Exception:
-            return None
+    return series.value_on(date.today())
 
 
 def list_currency_codes_from_json():
     """List currency codes available in local JSON files under data/economics.
     Excludes non-currency files like gold.json. Returns uppercase codes.
+
+    Taken from the latest-quote manifest; the directory is listed only when
+    there is no manifest yet.
     """
+    codes = latest.currency_codes()
+    if codes is not None:
+        return codes
     codes = []
     try:
         base_dir = os.path.join('data', 'economics')
@@ -139,16 +120,24 @@ def format_pl_number(value):
 def get_homepage_rates(preferred_codes=None):
     """Return list of currency rates for homepage.
 
-    Tries local JSON snapshots first; if missing, falls back to live NBP API.
+    Tries the latest-quote manifest written by fetch_nbp first (a dict
+    lookup; entries then also carry the previous-day change_pct), then the
+    local JSON series; if missing, falls back to live NBP API.
     """
     preferred_codes = preferred_codes or ["USD", "EUR", "GBP", "CHF"]
 
-    # JSON first
+    # manifest, then JSON series
     json_rates = {}
+    changes = {}
     for code in preferred_codes:
-        df = load_currency_json(code)
-        if df is not None and not df.empty:
-            json_rates[code] = float(df["rate"].iloc[-1])
+        entry = latest.get(code)
+        if entry:
+            json_rates[code] = entry['value']
+            changes[code] = entry.get('change_pct')
+            continue
+        series = timeseries.get_series(code)
+        if series is not None and not series.empty:
+            json_rates[code] = series.latest()[1]
 
     # API fallback only if needed
     api_rates = None
@@ -161,12 +150,69 @@ def get_homepage_rates(preferred_codes=None):
         if rate is None and api_rates:
             rate = api_rates.get(code.lower())
         if rate:
-            rates.append({"code": code, "rate": round(rate, 4)})
+            item = {"code": code, "rate": round(rate, 4)}
+            if changes.get(code) is not None:
+                item["change_pct"] = round(changes[code], 2)
+            rates.append(item)
 
     return rates
 
+def get_gold_quote(today=None):
+    """Latest gold price (PLN/oz) with the age of the data.
+
+    Reads the newest point of the locally cached gold series (kept fresh by
+    the background refresher after each NBP publication); the live NBP quote
+    is used only when there is no local history at all.
+
+    Returns dict with price, date (ISO or None), age_days, stale (the quote
+    is older than the latest scheduled NBP publication) and source
+    ('local' / 'nbp'), or None when no price is available.
+    """
+    today = today or date.today()
+    series = timeseries.get_series(timeseries.GOLD)
+    if series is not None and not series.empty:
+        day, price = series.latest()
+        source = 'local'
+    else:
+        price = Manager().gold.get_current_price()
+        if not price:
+            return None
+        # notowanie NBP z bieżącej publikacji (cache tabel)
+        day, source = None, 'nbp'
+
+    published = last_publication('gold')
+    return {
+        'price': round(price, 2),
+        'date': day.isoformat() if day else None,
+        'age_days': (today - day).days if day else None,
+        'stale': bool(day and published and day < published.date()),
+        'source': source,
+    }
+
+
+# wykresy PNG pokazują ostatni rok (seria dzienna trzyma dłuższą historię)
+CHART_DAYS = 365
+
+
+def chart_start():
+    """First day shown on the one-year PNG charts"""
+    return date.today() - timedelta(days=CHART_DAYS)
+
+
+def currency_chart_key(currency_code, color='#6c7c40'):
+    """Cache key of a currency chart: kind, code, data version, window and style"""
+    return ('currency', currency_code.upper(), timeseries.store.version_of(currency_code), chart_start(), color)
+
+
+def gold_chart_key(color='#6c7c40'):
+    """Cache key of the gold chart: kind, data version, window and style"""
+    return ('gold', timeseries.store.version_of(timeseries.GOLD), chart_start(), color)
+
+
 def generate_currency_plot(currency_code, color='#6c7c40'):
     """Generate currency chart from JSON data
+
+    Rendered charts are kept in the LRU chart cache until the series changes.
     
     Args:
         currency_code: Currency code (e.g., 'EUR', 'USD')
@@ -175,91 +221,73 @@ def generate_currency_plot(currency_code, color='#6c7c40'):
     Returns:
         Base64 encoded PNG image
     """
-    df = load_currency_json(currency_code)
-    
-    fig, ax = plt.subplots(figsize=(10, 5), facecolor='#c2c9b6')
-    ax.set_facecolor('#c2c9b6')
-    
-    if df is not None and not df.empty:
-        ax.plot(df['date'], df['rate'], color=color, linewidth=2)
-        ax.set_title(f'{currency_code.upper()} - Widok w skali roku', color='#2B370A')
-        ax.set_ylabel('Kurs (PLN)', color='#2B370A')
+    key = currency_chart_key(currency_code, color)
+    return charts.get_or_render(key, lambda: _render_currency_plot(currency_code, color))
+
+
+def generate_gold_plot(color='#6c7c40'):
+    """Generate (or reuse cached) gold price chart
+
+    Returns:
+        Base64 encoded PNG image
+    """
+    def render():
+        return Manager().create_plot_image(
+            load_gold_json(since=chart_start()),
+            x_col='date',
+            y_col='price',
+            color=color,
+            y_label='Cena PLN/oz',
+            x_label='Data'
+        )
+
+    return charts.get_or_render(gold_chart_key(color), render)
+
+
+def _render_currency_plot(currency_code, color):
+    """Render currency chart in the chart renderer pool and return it base64 encoded"""
+    series = timeseries.get_series(currency_code)
+    spec = {
+        'color': color,
+        'figsize': (10, 5),
+        'x_label': 'Data',
+        # Make axis labels white for visibility
+        'tick_label_color': 'white',
+    }
+    if series is not None and not series.empty:
+        dates, values = series.between(chart_start())
+        spec.update(x=dates, y=values, title=f'{currency_code.upper()} - Widok w skali roku', y_label='Kurs (PLN)')
     else:
-        ax.text(0.5, 0.5, 'Brak danych', ha='center', va='center', 
-                fontsize=20, color='#2B370A', transform=ax.transAxes)
-        ax.set_title(f'{currency_code.upper()} - Brak danych', color='#2B370A')
-    
-    ax.set_xlabel('Data', color='#2B370A')
-    ax.tick_params(colors='#2B370A')
-    
-    # Make axis labels white for visibility
-    for label in ax.get_xticklabels() + ax.get_yticklabels():
-        label.set_color('white')
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    return encoded
+        spec.update(x=[], y=[], title=f'{currency_code.upper()} - Brak danych', empty_fontsize=20)
+    return renderer.render_base64('line', spec)
 
 @ekonomia_bp.route('/ekonomia')
 def ekonomia():
     """Main economy module handler"""
     
-    # aktualizacja JSON-ów przy starcie
-    # Update JSONs only on first run, then once per 24 hours
-    last_update_file = os.path.join('data', 'economics', '.last_update')
-    should_update = False
-    
-    if not os.path.exists(last_update_file):
-        should_update = True
-    else:
-        try:
-            with open(last_update_file, 'r') as f:
-                last_update = datetime.fromisoformat(f.read().strip())
-            if datetime.now() - last_update > timedelta(hours=24):
-                should_update = True
-        except:
-            should_update = True
-    
-    if should_update:
-        fetch_nbp.run_update()
-        os.makedirs(os.path.dirname(last_update_file), exist_ok=True)
-        with open(last_update_file, 'w') as f:
-            f.write(datetime.now().isoformat())
+    # Dane NBP odświeża w tle scheduler (refresher.run_scheduled_refresh),
+    # widok zawsze czyta ostatni poprawny snapshot z data/economics
     
     # Default tiles for anonymous: JSON-first (fallback to API) latest rates
     homepage_rates = get_homepage_rates(["EUR", "CHF", "USD"])  # JSON snapshots first, then API
     kurs_walut = {r["code"]: r["rate"] for r in homepage_rates}
+    # zmiana względem poprzedniego notowania (z manifestu, jeśli jest)
+    kurs_zmiana = {r["code"]: r["change_pct"] for r in homepage_rates if "change_pct" in r}
         
-    # Generate default currency chart (EUR)
-    wykres_waluty = generate_currency_plot('EUR', '#6c7c40')
-
-    # Load gold prices from JSON and generate chart
-    gold_df = load_gold_json()
+    # Wykresy (EUR i złoto) rysuje przeglądarka z /ekonomia/api/series/<name>
     mgr = Manager()
-    wykres_zlota = mgr.create_plot_image(
-        gold_df,
-        x_col='date',
-        y_col='price',
-        color='#6c7c40',
-        y_label='Cena PLN/oz',
-        x_label='Data'
-    )
-
-    # Get gold price (już w uncjach w JSON)
-    current_gold = mgr.gold.get_current_price()
-    cena_zlota = round(current_gold, 2) if current_gold else 0
+
+    # Cena złota z lokalnej serii (już w uncjach), bez zapytania do NBP przy każdym widoku
+    gold = get_gold_quote()
+    cena_zlota = gold['price'] if gold else 0
     cena_zlota_formatted = format_pl_number(cena_zlota)
 
     # Get currency list and rates for calculator
-    mgr = Manager()
+    # (one Manager per request; NBP tables come from the process-wide cache)
     # Keep API-based list for calculator and selects
     currency_codes = mgr.list_currencies()
-    raw_rates = mgr.currencies.get_current_rates()
-    currency_rates = {k.upper(): v for k, v in raw_rates.items()}
-    currency_rates['PLN'] = 1.0
+    # kursy do kalkulatora z macierzy kursów krzyżowych (liczonej raz na tabelę NBP)
+    currency_rates = cross_rates.get_cross_rates(mgr.currencies).pln_rates
 
     # Prepare currencies for table (include all)
     all_currencies_for_tiles = {}
@@ -268,12 +296,21 @@ def ekonomia():
         if rate:
             all_currencies_for_tiles[code.upper()] = rate
 
+    # statystyki kroczące dla kafelków i złota (przeliczane przy aktualizacji danych)
+    series_stats = {}
+    for name in list(kurs_walut) + [timeseries.GOLD]:
+        stats = analytics.get_stats(name)
+        if stats:
+            series_stats[stats['name']] = stats
+
     return render_template('ekonomia/exchange.html',
                            kurs_walut=kurs_walut,
-                           wykres_waluty=wykres_waluty,
-                           wykres_zlota=wykres_zlota,
+                           kurs_zmiana=kurs_zmiana,
+                           series_stats=series_stats,
+                           stats_windows=[analytics.window_key(d) for d in analytics.WINDOWS],
                            cena_zlota=cena_zlota,
                            cena_zlota_formatted=cena_zlota_formatted,
+                           gold=gold,
                            currency_codes=currency_codes,
                            currency_rates=currency_rates,
                            all_currencies_for_tiles=all_currencies_for_tiles,
@@ -282,32 +319,47 @@ def ekonomia():
 @ekonomia_bp.route('/ekonomia/chart/<currency_code>')
 def get_currency_chart(currency_code):
     """AJAX endpoint for dynamic currency chart generation
+
+    `gold` returns the gold price chart. Responses carry a strong ETag derived
+    from the data version and style, so conditional requests get 304.
     
     Args:
-        currency_code: Currency code (e.g., 'EUR', 'USD')
+        currency_code: Currency code (e.g., 'EUR', 'USD') or 'gold'
         
     Returns:
         JSON response with success status, chart data, and message
     """
     try:
-        # Check if JSON file exists
-        json_path = os.path.join('data', 'economics', f'{currency_code.upper()}.json')
-        
-        if not os.path.exists(json_path):
+        # Check if data for the currency exists
+        if timeseries.get_series(currency_code) is None:
             return jsonify({
                 'success': False,
                 'message': f'Brak danych dla waluty {currency_code.upper()}',
                 'chart': None
             })
+
+        is_gold = currency_code.lower() == timeseries.GOLD
+        key = gold_chart_key('#6c7c40') if is_gold else currency_chart_key(currency_code, '#6c7c40')
+        etag = ChartCache.etag_for(key)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
         
         # Generate chart
-        chart_data = generate_currency_plot(currency_code, '#6c7c40')
+        if is_gold:
+            chart_data = generate_gold_plot('#6c7c40')
+        else:
+            chart_data = generate_currency_plot(currency_code, '#6c7c40')
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'message': f'Wykres dla {currency_code.upper()} wygenerowany',
             'chart': chart_data
         })
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
         
     except Exception as e:
         return jsonify({
@@ -316,6 +368,154 @@ def get_currency_chart(currency_code):
             'chart': None
         })
 
+# ======================= API: CHART SERIES =======================
+
+# domyślna i maksymalna liczba punktów zwracanych do wykresu
+DEFAULT_SERIES_POINTS = 250
+MAX_SERIES_POINTS = 2000
+# jak długo przeglądarka może używać odpowiedzi bez rewalidacji (sekundy)
+SERIES_MAX_AGE = 300
+
+
+@ekonomia_bp.route('/ekonomia/api/series/<name>')
+def api_get_series(name):
+    """Kompaktowe dane do wykresu waluty lub złota (rysowanego w przeglądarce)
+
+    Zwraca kolumny `dates` / `values` zredukowane po stronie serwera (LTTB)
+    do co najwyżej `points` punktów. Odpowiedź ma ETag zależny od wersji danych
+    i parametrów, więc zapytania warunkowe dostają 304.
+
+    Bez `resolution` wybierany jest najdokładniejszy poziom historii, który
+    obejmuje zakres rozsądną liczbą punktów: notowania dzienne (ostatnie lata)
+    albo agregaty tygodniowe/miesięczne (wtedy także kolumny open/high/low).
+
+    Query params:
+        points: maksymalna liczba punktów (domyślnie 250, maks. 2000)
+        start, end: opcjonalny zakres dat RRRR-MM-DD (włącznie)
+        resolution: opcjonalnie daily / weekly / monthly
+    """
+    try:
+        points = int(request.args.get('points', DEFAULT_SERIES_POINTS))
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry (points: liczba, start/end: RRRR-MM-DD)'}), 400
+    points = max(2, min(points, MAX_SERIES_POINTS))
+    resolution = request.args.get('resolution')
+    if resolution and resolution not in timeseries.TIERS:
+        return jsonify({'error': f'resolution musi być jednym z: {", ".join(timeseries.TIERS)}'}), 400
+
+    if resolution:
+        series = timeseries.store.get(name, resolution)
+    else:
+        series = timeseries.store.select(name, start, end)
+    if series is None:
+        return jsonify({'error': f'Brak danych dla {name.upper()}'}), 404
+
+    etag = ChartCache.etag_for(('series', series.name, series.tier, series.version, points, start, end))
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        lo, hi = series.span(start, end)
+        dates, values = series.dates[lo:hi], series.values[lo:hi]
+        keep = timeseries.downsample_indices(dates, values, points)
+        is_gold = series.name == timeseries.GOLD
+        digits = 2 if is_gold else 4
+        body = {
+            'name': series.name,
+            'unit': 'PLN/oz' if is_gold else 'PLN',
+            'resolution': series.tier,
+            'dates': np.datetime_as_string(dates[keep], unit='D').tolist(),
+            'values': np.round(values[keep], digits).tolist(),
+        }
+        if series.ohlc:
+            for field in ('open', 'high', 'low'):
+                body[field] = np.round(series.ohlc[field][lo:hi][keep], digits).tolist()
+        response = jsonify(body)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = SERIES_MAX_AGE
+    return response
+
+# ======================= API: GOLD =======================
+
+# jak długo przeglądarka może używać aktualnej ceny złota (sekundy)
+GOLD_MAX_AGE = 60
+
+
+@ekonomia_bp.route('/ekonomia/api/gold')
+def api_get_gold():
+    """Aktualna cena złota (PLN/oz) z lokalnej historii wraz z wiekiem danych
+
+    Cenę aktualizuje w tle refresher po publikacji NBP; `stale` mówi, że
+    najnowsze notowanie jest starsze niż ostatnia planowa publikacja.
+    """
+    gold = get_gold_quote()
+    if gold is None:
+        return jsonify({'error': 'Brak danych o cenie złota'}), 503
+
+    etag = ChartCache.etag_for(('gold', gold['date'], gold['price'], gold['stale']))
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify(dict(gold, unit='PLN/oz'))
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = GOLD_MAX_AGE
+    return response
+
+
+# ======================= API: SERIES STATISTICS =======================
+
+@ekonomia_bp.route('/ekonomia/api/stats/<name>')
+def api_get_series_stats(name):
+    """Statystyki kroczące waluty lub złota (okna 7/30/90 dni)
+
+    Średnia, zmienność (odchylenie dziennych stóp zwrotu w %), minimum,
+    maksimum i zmiana w oknie - liczone przy zapisie nowych notowań
+    (analytics.update), endpoint tylko je odczytuje.
+    """
+    stats = analytics.get_stats(name)
+    if stats is None:
+        return jsonify({'error': f'Brak danych dla {name.upper()}'}), 404
+
+    etag = ChartCache.etag_for(('stats', stats['name'], stats['as_of'], stats['last']))
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify(stats)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = SERIES_MAX_AGE
+    return response
+
+
+@ekonomia_bp.route('/ekonomia/api/stats')
+def api_get_stats():
+    """Statystyki kroczące wielu serii naraz
+
+    Query params:
+        codes: kody walut / `gold` oddzielone przecinkami
+               (domyślnie wszystkie waluty dostępne lokalnie i złoto)
+    """
+    try:
+        names = _parse_series_codes(request.args.get('codes', ''))
+    except ValueError as e:
+        return jsonify({'error': f'Nieprawidłowy kod serii: {e}'}), 400
+    if not names:
+        names = list_currency_codes_from_json() + [timeseries.GOLD]
+    if len(names) > MAX_QUERY_CODES:
+        return jsonify({'error': f'Maksymalnie {MAX_QUERY_CODES} serii w jednym zapytaniu'}), 400
+
+    stats, missing = {}, []
+    for name in names:
+        series_stats = analytics.get_stats(name)
+        if series_stats is None:
+            missing.append(name)
+        else:
+            stats[series_stats['name']] = series_stats
+    return jsonify({'stats': stats, 'missing': missing})
+
 # ======================= API: EXCHANGE RATES =======================
 
 @ekonomia_bp.route('/ekonomia/api/exchange-rates')
@@ -340,6 +540,193 @@ def api_get_exchange_rates():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# limit walut w jednym zapytaniu /ekonomia/api/exchange-rates/query
+MAX_QUERY_CODES = 50
+# kod waluty ISO 4217 - nazwa trafia do ścieżki pliku serii, więc nic innego nie przechodzi
+SERIES_CODE_RE = re.compile(r'[A-Z]{3}')
+
+
+def _parse_series_codes(value):
+    """Normalized, de-duplicated series names from 'EUR,usd,gold' (ValueError on an invalid code)"""
+    names = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name = timeseries.TimeSeriesStore.normalize_name(part)
+        if name != timeseries.GOLD and not SERIES_CODE_RE.fullmatch(name):
+            raise ValueError(part)
+        names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def _parse_query_days(value):
+    """Parse 'YYYY-MM-DD[,YYYY-MM-DD...]' into a datetime64[D] array (ValueError on bad input)"""
+    parts = [p.strip() for p in value.split(',') if p.strip()]
+    if not parts:
+        raise ValueError('empty date')
+    return np.array([date.fromisoformat(p) for p in parts], dtype='datetime64[D]')
+
+
+def _points(dates, values, requested=None):
+    """Serialize aligned date/value arrays into [{'date', 'rate'}] (skipping missing entries)"""
+    date_strings = np.datetime_as_string(dates, unit='D').tolist()
+    points = []
+    for i, (day, rate) in enumerate(zip(date_strings, values.tolist())):
+        if rate != rate:  # NaN - brak notowania przed tym dniem
+            continue
+        point = {'date': day, 'rate': rate}
+        if requested is not None:
+            point['requested'] = requested[i]
+        points.append(point)
+    return points
+
+
+@ekonomia_bp.route('/ekonomia/api/exchange-rates/query')
+def api_query_exchange_rates():
+    """Kursy wielu walut naraz - aktualne, na wybrane dni lub z zakresu dat
+
+    Dane pochodzą wyłącznie z lokalnej historii (data/economics), bez zapytań do NBP.
+
+    Query params:
+        codes: lista kodów oddzielonych przecinkami (domyślnie wszystkie dostępne)
+        date: dzień lub dni 'RRRR-MM-DD[,RRRR-MM-DD...]' - kurs obowiązujący w danym dniu
+        start, end: zakres dat (włącznie), można podać tylko jeden z końców;
+            długie zakresy są zwracane z agregatów (pole `resolution`)
+    """
+    try:
+        codes = _parse_series_codes(request.args.get('codes', ''))
+    except ValueError as e:
+        return jsonify({'error': f'Nieprawidłowy kod waluty: {e}'}), 400
+    if not codes:
+        codes = list_currency_codes_from_json()
+    if len(codes) > MAX_QUERY_CODES:
+        return jsonify({'error': f'Maksymalnie {MAX_QUERY_CODES} walut w jednym zapytaniu'}), 400
+
+    date_param = request.args.get('date')
+    start_param = request.args.get('start')
+    end_param = request.args.get('end')
+    if date_param and (start_param or end_param):
+        return jsonify({'error': 'Podaj date albo zakres start/end, nie oba naraz'}), 400
+
+    try:
+        days = _parse_query_days(date_param) if date_param else None
+        start = date.fromisoformat(start_param) if start_param else None
+        end = date.fromisoformat(end_param) if end_param else None
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowy format daty (oczekiwano RRRR-MM-DD)'}), 400
+    if start and end and start > end:
+        return jsonify({'error': 'Data start nie może być późniejsza niż end'}), 400
+
+    requested = np.datetime_as_string(days, unit='D').tolist() if days is not None else None
+    rates = {}
+    missing = []
+    resolution = {}
+    for code in codes:
+        if code == 'PLN':
+            if days is not None:
+                rates[code] = _points(days, np.ones(len(days)), requested)
+            else:
+                rates[code] = [{'date': date.today().isoformat(), 'rate': 1.0}]
+            continue
+
+        series = timeseries.get_series(code)
+        if series is None or series.empty:
+            missing.append(code)
+            continue
+
+        if days is not None:
+            eff_dates, values = series.values_on(days)
+            points = _points(eff_dates, values, requested)
+        elif start or end:
+            # długie zakresy czytają agregaty tygodniowe/miesięczne (kurs zamknięcia okresu)
+            ranged = timeseries.store.select(code, start, end)
+            points = _points(*ranged.between(start, end))
+            resolution[code] = ranged.tier
+        else:
+            points = _points(series.dates[-1:], series.values[-1:])
+
+        if points:
+            rates[code] = points
+        else:
+            missing.append(code)
+
+    body = {'rates': rates, 'missing': missing}
+    if resolution:
+        body['resolution'] = resolution
+    return jsonify(body), 200
+
+# ======================= API: CROSS RATES / CONVERSION =======================
+
+# limit przeliczeń w jednym zapytaniu /ekonomia/api/convert
+MAX_CONVERSIONS = 1000
+
+
+@ekonomia_bp.route('/ekonomia/api/cross-rates')
+def api_get_cross_rates():
+    """Macierz kursów krzyżowych N×N dla bieżących tabel NBP
+
+    `matrix[i][j]` to liczba jednostek `codes[j]` za 1 jednostkę `codes[i]`.
+    Macierz jest liczona raz na wersję tabel; ETag zależy od tej wersji.
+    """
+    cross = cross_rates.get_cross_rates(Manager().currencies)
+    etag = ChartCache.etag_for(('cross-rates', cross.version))
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = jsonify({
+            'version': [list(v) for v in cross.version],
+            'codes': list(cross.codes),
+            'matrix': np.round(cross.matrix, 8).tolist(),
+        })
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@ekonomia_bp.route('/ekonomia/api/convert')
+def api_convert():
+    """Zbiorcze przeliczenie kwot między walutami (wg macierzy kursów krzyżowych)
+
+    Query params (listy oddzielone przecinkami; pojedyncza wartość jest
+    stosowana do wszystkich pozycji):
+        amount: kwoty, np. 100,250.5
+        from: waluty źródłowe, np. EUR,USD
+        to: waluty docelowe, np. PLN
+    """
+    def split(name):
+        return [v.strip() for v in request.args.get(name, '').split(',') if v.strip()]
+
+    amounts, from_codes, to_codes = split('amount'), split('from'), split('to')
+    if not amounts or not from_codes or not to_codes:
+        return jsonify({'error': 'Wymagane parametry: amount, from, to'}), 400
+
+    size = max(len(amounts), len(from_codes), len(to_codes))
+    if size > MAX_CONVERSIONS:
+        return jsonify({'error': f'Maksymalnie {MAX_CONVERSIONS} przeliczeń w jednym zapytaniu'}), 400
+    if any(len(values) not in (1, size) for values in (amounts, from_codes, to_codes)):
+        return jsonify({'error': 'Listy amount, from, to muszą mieć tę samą długość (lub jeden element)'}), 400
+
+    try:
+        amounts = [float(a) for a in amounts]
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowa kwota'}), 400
+
+    cross = cross_rates.get_cross_rates(Manager().currencies)
+    try:
+        results = cross.convert(
+            np.broadcast_to(amounts, size),
+            np.broadcast_to(from_codes, size),
+            np.broadcast_to(to_codes, size),
+        )
+    except KeyError as e:
+        return jsonify({'error': f'Nieznana waluta: {e.args[0]}'}), 400
+
+    return jsonify({
+        'version': [list(v) for v in cross.version],
+        'results': np.round(results, 4).tolist(),
+    }), 200
+
 # ======================= API: FAVORITE CURRENCIES =======================
 
 @ekonomia_bp.route('/ekonomia/api/favorite-currencies', methods=['GET'])
@@ -1,22 +1,50 @@
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import requests
+from modules.ekonomia import latest, storage
+from modules.ekonomia.klasy_api_obsluga.APIClient import get_shared_session
 
 ## ustawienia
-# folder do zapisywania JSON-ów
+# folder do zapisywania JSON-ów (tworzony dopiero przy zapisie - import modułu nie robi I/O)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, '..', '..', 'data', 'economics')
-os.makedirs(DATA_DIR, exist_ok=True)
 
 YEAR = datetime.today().year
 end_date = datetime.today()
 start_date = end_date - timedelta(days=365)
 
+# katalog kodów walut z tabeli A (trzymany na dysku, odświeżany w tle przez run_update)
+CATALOG_FILE = os.path.join(DATA_DIR, '.currency_catalog')
+CATALOG_MAX_AGE = timedelta(days=7)
+_catalog = None
+_catalog_lock = threading.Lock()
+
+# maksymalna liczba równoległych zapytań do NBP (wspólna sesja keep-alive)
+MAX_WORKERS = 4
+
+# ile lat historii synchronizujemy (starsze niż DAILY_RETENTION_DAYS tylko jako agregaty OHLC)
+HISTORY_YEARS = 10
+# ile dni notowań dziennych trzymamy w plikach serii
+DAILY_RETENTION_DAYS = 730
+# NBP publikuje ceny złota od 2 stycznia 2013
+GOLD_HISTORY_START = datetime(2013, 1, 2)
+# maksymalna długość okresu w jednym zapytaniu: kursy 93 dni, złoto 367 dni
+RATES_WINDOW_DAYS = 93
+GOLD_WINDOW_DAYS = 367
+# pole wartości dla pola daty w rekordach serii (do agregatów OHLC)
+VALUE_KEYS = {'effectiveDate': 'mid', 'date': 'price'}
+
 
 def get_daily_currencies():
     url = "https://api.nbp.pl/api/exchangerates/tables/a/?format=json"
-    res = requests.get(url)
+    try:
+        res = get_session().get(url, timeout=15)
+    except requests.exceptions.RequestException as e:
+        print(f"Nie udało się pobrać tabeli A: {e}")
+        return []
     if res.status_code != 200:
         print("Nie udało się pobrać tabeli A")
         return []
@@ -25,107 +53,329 @@ def get_daily_currencies():
     codes = [r['code'] for r in data[0]['rates']]
     return codes
 
-ALL_CODES = get_daily_currencies()  # pobierz wszystkie waluty z tabeli A
+
+def load_currency_catalog():
+    """Zwraca katalog walut {'codes': [...], 'updated': iso|None}.
+
+    Wczytywany leniwie z dysku przy pierwszym użyciu, nigdy nie odpytuje NBP.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            try:
+                with open(CATALOG_FILE, 'r', encoding='utf-8') as f:
+                    _catalog = json.load(f)
+            except (OSError, ValueError):
+                _catalog = {'codes': [], 'updated': None}
+        return _catalog
+
+
+def _catalog_is_stale(catalog):
+    if not catalog.get('codes') or not catalog.get('updated'):
+        return True
+    try:
+        updated = datetime.fromisoformat(catalog['updated'])
+    except ValueError:
+        return True
+    return datetime.now() - updated > CATALOG_MAX_AGE
+
+
+def refresh_currency_catalog(force=False):
+    """Pobiera listę kodów z tabeli A i zapisuje ją na dysk (wywoływane w tle).
+
+    Przy błędzie NBP zostaje ostatni poprawny katalog.
+    """
+    global _catalog
+    catalog = load_currency_catalog()
+    if not force and not _catalog_is_stale(catalog):
+        return catalog['codes']
+
+    codes = get_daily_currencies()
+    if not codes:
+        return catalog['codes']
+
+    new_catalog = {'codes': codes, 'updated': datetime.now().isoformat()}
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f'{CATALOG_FILE}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(new_catalog, f, ensure_ascii=False)
+    os.replace(tmp_path, CATALOG_FILE)
+    with _catalog_lock:
+        _catalog = new_catalog
+    return codes
+
+
 # wybierz tylko top 10 najważniejszych, które są w tabeli
 TOP10_CODES = ['EUR', 'USD', 'CHF', 'GBP', 'JPY', 'AUD', 'CAD', 'NOK', 'SEK', 'DKK']
-CURRENCY_CODES = [c for c in TOP10_CODES if c in ALL_CODES]
+# domyślna lista; faktycznie aktualizowane waluty zwraca get_currency_codes()
+CURRENCY_CODES = list(TOP10_CODES)
+
+
+def get_currency_codes():
+    """Top 10 walut obecnych w katalogu tabeli A (bez katalogu - pełna lista TOP10)"""
+    all_codes = load_currency_catalog().get('codes') or []
+    if not all_codes:
+        return list(CURRENCY_CODES)
+    return [c for c in CURRENCY_CODES if c in all_codes]
+
+def get_session():
+    """Wspólna sesja HTTP (keep-alive, pula połączeń) dla wszystkich zapytań do NBP"""
+    return get_shared_session()
+
+
+def last_stored_date(file_path, key_date):
+    """Zwraca ostatnią zapisaną datę (datetime) serii albo None"""
+    try:
+        last = storage.last_date(file_path, key_date)
+    except (OSError, ValueError):
+        return None
+    if not last:
+        return None
+    return datetime.strptime(last, '%Y-%m-%d')
+
+
+def history_start():
+    """Najstarszy dzień synchronizowanej historii (HISTORY_YEARS wstecz)"""
+    return datetime.today() - timedelta(days=round(365.25 * HISTORY_YEARS))
 
-def fetch_nbprates(currency_code):
+
+def _sync_ranges(since, history_from, backfill_until=None):
+    """Zakresy do pobrania: nowe notowania po `since` oraz brakująca starsza historia"""
     end_date = datetime.today()
-    start_date = end_date - timedelta(days=365)
-    
-    # NBP API pozwala max 93 dni na jedno żądanie, więc dzielimy na okresy
+    ranges = []
+    if since is None:
+        ranges.append((history_from, end_date))
+    else:
+        ranges.append((max(since + timedelta(days=1), history_from), end_date))
+        if backfill_until is not None:
+            ranges.append((history_from, backfill_until))
+    return ranges
+
+
+def _split_periods(start_date, end_date, days=RATES_WINDOW_DAYS):
+    # NBP API ogranicza długość okresu w jednym żądaniu, więc dzielimy na okresy
     periods = []
     current_start = start_date
-    while current_start <= end_date:
-        current_end = min(current_start + timedelta(days=92), end_date)
+    while current_start.date() <= end_date.date():
+        current_end = min(current_start + timedelta(days=days - 1), end_date)
         periods.append( (current_start.strftime('%Y-%m-%d'), current_end.strftime('%Y-%m-%d')) )
         current_start = current_end + timedelta(days=1)
+    return periods
+
+
+def _fetch_rates_window(currency_code, start, end):
+    url = f'https://api.nbp.pl/api/exchangerates/rates/a/{currency_code}/{start}/{end}/?format=json'
+    res = get_session().get(url, timeout=15)
+    if res.status_code == 404:  # brak notowań w okresie (np. weekend)
+        return []
+    if res.status_code != 200:
+        raise requests.exceptions.HTTPError(f'{res.status_code} dla {url}')
+    return res.json().get('rates', [])
+
+
+def fetch_nbprates(currency_code, since=None, executor=None, backfill_until=None):
+    """Pobiera kursy waluty z ostatnich HISTORY_YEARS lat, ale tylko po dacie `since`.
+
+    `backfill_until` dodaje zakres od początku historii do tej daty (uzupełnienie
+    starszych lat dla serii zsynchronizowanych wcześniej z krótszą historią).
+    Okresy 93-dniowe są pobierane równolegle - w podanym `executor`
+    (wspólna pula z run_update) albo we własnej, ograniczonej puli.
+    Błąd sieci lub odpowiedź inna niż 200/404 w którymkolwiek okresie
+    zgłasza requests.RequestException - niepełnych danych nie zwracamy,
+    bo zapis przesunąłby ostatnią datę serii za brakujący okres.
+    """
+    history_from = history_start()
+    periods = [p for start, end in _sync_ranges(since, history_from, backfill_until)
+               for p in _split_periods(start, end)]
+    if not periods:
+        return []
+
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(periods))) as pool:
+            chunks = list(pool.map(lambda p: _fetch_rates_window(currency_code, *p), periods))
+    else:
+        futures = [executor.submit(_fetch_rates_window, currency_code, start, end) for start, end in periods]
+        chunks = [f.result() for f in futures]
+    all_rates = [rate for chunk in chunks for rate in chunk]
     
-    all_rates = []
-    for start, end in periods:
-        url = f'https://api.nbp.pl/api/exchangerates/rates/a/{currency_code}/{start}/{end}/?format=json'
-        res = requests.get(url)
-        if res.status_code == 200:
-            data = res.json()
-            all_rates.extend(data.get('rates', []))
-        else:
-            print(f'Błąd pobrania {currency_code}: {res.status_code}')
-    
-    # filtrowanie powtarzających się dat i rekordów spoza ostatniego roku
-    one_year_ago = datetime.today() - timedelta(days=365)
+    # filtrowanie powtarzających się dat i rekordów spoza synchronizowanej historii
+    # (daty ISO można porównywać jako napisy)
+    history_from = history_from.strftime('%Y-%m-%d')
     unique_rates = []
     seen_dates = set()
     for rate in all_rates:
-        d = datetime.strptime(rate['effectiveDate'], '%Y-%m-%d')
-        if d >= one_year_ago and rate['effectiveDate'] not in seen_dates:
+        if rate['effectiveDate'] >= history_from and rate['effectiveDate'] not in seen_dates:
             seen_dates.add(rate['effectiveDate'])
             unique_rates.append(rate)
     
     return unique_rates
 
 
-def fetch_gold():
+def _fetch_gold_window(start, end):
+    url = f'https://api.nbp.pl/api/cenyzlota/{start}/{end}/?format=json'
+    r = get_session().get(url, timeout=15)
+    if r.status_code == 404:  # brak notowań w okresie
+        return []
+    if r.status_code != 200:
+        raise requests.exceptions.HTTPError(f'{r.status_code} dla {url}')
+    # NBP podaje cenę za gram, konwertujemy na uncję trojańską (1 oz = 31.1035 g)
+    return [{'date': item['data'], 'price': round(item['cena'] * 31.1035, 2)} for item in r.json()]
+
+
+def fetch_gold(since=None, executor=None, backfill_until=None):
     """Pobiera ceny złota z NBP API i zwraca listę słowników
-    z polami 'date' oraz 'price' (cena w PLN za uncję trojańską)."""
-    url = 'https://api.nbp.pl/api/cenyzlota'
-    
-    end_date = datetime.today()
-    start_date = end_date - timedelta(days=365)
-    
-    # Format daty dla API NBP
-    start_str = start_date.strftime('%Y-%m-%d')
-    end_str = end_date.strftime('%Y-%m-%d')
-    
-    try:
-        r = requests.get(f'{url}/{start_str}/{end_str}/?format=json', timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        # NBP podaje cenę za gram, konwertujemy na uncję trojańską (1 oz = 31.1035 g)
-        return [{'date': item['data'], 'price': round(item['cena'] * 31.1035, 2)} for item in data]
-    except requests.exceptions.RequestException as e:
-        print(f"Nie udało się pobrać cen złota: {e}")
+    z polami 'date' oraz 'price' (cena w PLN za uncję trojańską).
+
+    Jeśli podano `since`, pobierane są tylko notowania po tej dacie
+    (oraz, z `backfill_until`, brakująca starsza historia).
+    Okresy są pobierane równolegle - w podanym `executor` (wspólna pula
+    z run_update) albo we własnej, ograniczonej puli.
+    Błąd któregokolwiek okresu zgłasza requests.RequestException
+    (bez częściowych wyników)."""
+    history_from = max(history_start(), GOLD_HISTORY_START)
+    periods = [p for start, end in _sync_ranges(since, history_from, backfill_until)
+               for p in _split_periods(start, end, days=GOLD_WINDOW_DAYS)]
+    if not periods:
         return []
 
-def update_json(file_path, new_data, key_date):
-    """Łączy nowe dane z istniejącym JSON-em, usuwa powtarzające się daty"""
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            existing = json.load(f)
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(periods))) as pool:
+            chunks = list(pool.map(lambda p: _fetch_gold_window(*p), periods))
     else:
-        existing = []
+        futures = [executor.submit(_fetch_gold_window, start, end) for start, end in periods]
+        chunks = [f.result() for f in futures]
+
+    # filtrowanie powtarzających się dat i rekordów spoza synchronizowanej historii
+    history_from = history_from.strftime('%Y-%m-%d')
+    prices = []
+    seen_dates = set()
+    for item in (item for chunk in chunks for item in chunk):
+        if item['date'] >= history_from and item['date'] not in seen_dates:
+            seen_dates.add(item['date'])
+            prices.append(item)
+    return prices
+
+def update_json(file_path, new_data, key_date):
+    """Dopisuje nowe rekordy do serii (append-only) i okresowo ją kompaktuje
+
+    Rekordy nowsze niż ostatnia zapisana data trafiają do segmentu i od razu
+    do agregatów OHLC. Segment jest scalany z plikiem bazowym (atomowa
+    podmiana), gdy urośnie do storage.COMPACT_EVERY rekordów, gdy pliku
+    bazowego jeszcze nie ma albo gdy przyszły starsze (uzupełniane) rekordy -
+    wtedy też notowania dzienne starsze niż DAILY_RETENTION_DAYS zostają
+    tylko w agregatach tygodniowych/miesięcznych. Po każdej zmianie serii
+    przeliczane są jej statystyki kroczące (analytics.update).
+    Zwraca liczbę dopisanych nowych rekordów.
+    """
+    key_value = VALUE_KEYS.get(key_date)
+    last = storage.last_date(file_path, key_date)
+    records = sorted((r for r in new_data if r.get(key_date)), key=lambda r: r[key_date])
+    fresh = [r for r in records if last is None or r[key_date] > last]
+    backfill = [r for r in records if last is not None and r[key_date] <= last]
+    storage.append_records(file_path, fresh)
+
+    if backfill or not os.path.exists(file_path) or storage.segment_size(file_path) >= storage.COMPACT_EVERY:
+        keep_since = (datetime.today() - timedelta(days=DAILY_RETENTION_DAYS)).strftime('%Y-%m-%d')
+        storage.compact(file_path, key_date, keep_since, key_value=key_value, extra=backfill)
+    elif fresh and key_value:
+        storage.update_tiers(file_path, fresh, key_date, key_value)
+    if (fresh or backfill) and key_value:
+        # analytics (numpy) ładowany dopiero przy zapisie - import fetch_nbp ma być lekki
+        from modules.ekonomia import analytics
+        analytics.update(file_path, key_date, key_value)
+    return len(fresh)
+
 
-    # dodaj tylko brakujące rekordy
-    existing_dates = {r[key_date] for r in existing}
-    for record in new_data:
-        if record[key_date] not in existing_dates:
-            existing.append(record)
+def _backfill_until(file_path, since, history_from):
+    """Do jakiej daty trzeba uzupełnić starszą historię serii (None = nie trzeba)"""
+    if since is None:
+        return None
+    fetched_from = storage.read_meta(file_path).get('history_from')
+    if fetched_from is None:
+        return since
+    fetched_from = datetime.strptime(fetched_from, '%Y-%m-%d')
+    if fetched_from.date() <= history_from.date():
+        return None
+    return fetched_from - timedelta(days=1)
 
-    # posortuj po dacie
-    existing.sort(key=lambda x: x[key_date])
 
-# usuń rekordy starsze niż 1 rok od dziś
-    one_year_ago = datetime.today() - timedelta(days=365)
-    existing = [r for r in existing if datetime.strptime(r[key_date], '%Y-%m-%d') >= one_year_ago]
+def _mark_history(file_path, history_from):
+    meta = storage.read_meta(file_path)
+    meta['history_from'] = history_from.strftime('%Y-%m-%d')
+    storage.write_meta(file_path, meta)
 
+def _history_requested(since, backfill_until):
+    """Czy pobieranie obejmowało początek historii (pełna synchronizacja lub uzupełnienie).
+
+    Wołane tylko po udanym pobraniu - fetch_nbprates/fetch_gold zgłaszają
+    wyjątek przy błędzie któregokolwiek okresu, więc historia nie zostanie
+    oznaczona jako uzupełniona z dziurą.
+    """
+    return since is None or backfill_until is not None
 
-    # zapisz z powrotem
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(existing, f, ensure_ascii=False, indent=4)
 
 def run_update():
-    # waluty
-    for code in CURRENCY_CODES:
-        rates = fetch_nbprates(code)
-        path = os.path.join(DATA_DIR, f'{code}.json')
-        update_json(path, rates, key_date='effectiveDate')
-        print(f'{code} zaktualizowane w {path}')
-
-    # złoto
-    gold = fetch_gold()
+    """Przyrostowa synchronizacja: dla każdej serii pobiera tylko daty po ostatnim zapisanym notowaniu.
+
+    Przy pierwszej synchronizacji (lub po wydłużeniu HISTORY_YEARS) jednorazowo
+    uzupełniana jest starsza historia. Waluty i okresy są pobierane równolegle
+    przez ograniczoną pulę wątków, zapis plików odbywa się sekwencyjnie
+    w wątku wywołującym. Seria, której pobieranie się nie powiodło, nie jest
+    zapisywana - jej ostatnia data zostaje, więc kolejne uruchomienie ponowi
+    pobieranie od ostatniego poprawnego notowania. Na koniec zapisywany jest
+    manifest ostatnich notowań (latest.write_manifest).
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    refresh_currency_catalog()
+
+    codes = get_currency_codes()
+    paths = {code: os.path.join(DATA_DIR, f'{code}.json') for code in codes}
     path_gold = os.path.join(DATA_DIR, f'gold.json')
-    update_json(path_gold, gold, key_date='date')
-    print(f'Złoto zaktualizowane w {path_gold}')
+    rates_from = history_start()
+    gold_from = max(rates_from, GOLD_HISTORY_START)
+
+    # http_pool ogranicza liczbę równoległych zapytań do NBP,
+    # jobs tylko koordynuje pobieranie poszczególnych serii
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='nbp-http') as http_pool, \
+         ThreadPoolExecutor(max_workers=len(codes) + 1, thread_name_prefix='nbp-sync') as jobs:
+        rate_jobs = {}
+        for code, path in paths.items():
+            since = last_stored_date(path, 'effectiveDate')
+            until = _backfill_until(path, since, rates_from)
+            rate_jobs[code] = (since, until, jobs.submit(fetch_nbprates, code, since=since,
+                                                         executor=http_pool, backfill_until=until))
+        gold_since = last_stored_date(path_gold, 'date')
+        gold_until = _backfill_until(path_gold, gold_since, gold_from)
+        gold_future = jobs.submit(fetch_gold, since=gold_since,
+                                 executor=http_pool, backfill_until=gold_until)
+
+        # waluty
+        for code, (since, until, future) in rate_jobs.items():
+            try:
+                rates = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f'Błąd pobrania {code}, seria bez zmian: {e}')
+                continue
+            added = update_json(paths[code], rates, key_date='effectiveDate')
+            if _history_requested(since, until):
+                _mark_history(paths[code], rates_from)
+            print(f'{code} zaktualizowane w {paths[code]} (nowe rekordy: {added}, pobrane: {len(rates)})')
+
+        # złoto
+        try:
+            gold = gold_future.result()
+        except requests.exceptions.RequestException as e:
+            print(f'Nie udało się pobrać cen złota, seria bez zmian: {e}')
+        else:
+            added = update_json(path_gold, gold, key_date='date')
+            if _history_requested(gold_since, gold_until):
+                _mark_history(path_gold, gold_from)
+            print(f'Złoto zaktualizowane w {path_gold} (nowe rekordy: {added}, pobrane: {len(gold)})')
+
+    # manifest ostatnich notowań - strona główna i kafelki czytają tylko jego
+    series_paths = {code: (path, 'effectiveDate', VALUE_KEYS['effectiveDate']) for code, path in paths.items()}
+    series_paths[latest.GOLD] = (path_gold, 'date', VALUE_KEYS['date'])
+    latest.write_manifest(series_paths, DATA_DIR)
 
 if __name__ == '__main__':
     run_update()
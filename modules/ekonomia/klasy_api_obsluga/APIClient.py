@@ -1,15 +1,112 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
 import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) w sekundach - można nadpisać zmiennymi środowiskowymi
+DEFAULT_TIMEOUT = (
+    float(os.environ.get("NBP_CONNECT_TIMEOUT", 3.05)),
+    float(os.environ.get("NBP_READ_TIMEOUT", 10)),
+)
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+# statusy, przy których warto spróbować ponownie
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# ile odpowiedzi pamiętamy na potrzeby zapytań warunkowych (ETag / Last-Modified)
+MAX_VALIDATORS = 256
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+# (url, params) -> (etag, last_modified, data); wspólne dla wszystkich klientów w procesie
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def get_shared_session():
+    """Process-wide pooled requests.Session (keep-alive) used for NBP calls"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _shared_session = session
+        return _shared_session
+
+
+def _validator_key(url, params):
+    return url, tuple(sorted((params or {}).items()))
+
 
 class APIClient:
-    def __init__(self, base_url="https://api.nbp.pl/api"):
+    def __init__(self, base_url="https://api.nbp.pl/api", session=None,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
         self.base_url = base_url
+        self.session = session or get_shared_session()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def _sleep_before_retry(self, attempt):
+        # wykładniczy backoff z losowym jitterem, żeby workery nie uderzały naraz
+        time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
 
     def get_json(self, url, params=None):
-        """Wysyła zapytanie GET i zwraca dane JSON"""
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Błąd: {e}")
-            return None
\ No newline at end of file
+        """Wysyła zapytanie GET i zwraca dane JSON
+
+        Używa wspólnej sesji z pulą połączeń, timeoutów (connect, read),
+        ponawia błędy sieci/5xx z backoffem i wysyła zapytania warunkowe
+        (If-None-Match / If-Modified-Since) - przy 304 zwraca poprzednie dane.
+        """
+        key = _validator_key(url, params)
+        with _validators_lock:
+            cached = _validators.get(key)
+
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and cached:
+                    return cached[2]
+                if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                    self._sleep_before_retry(attempt)
+                    continue
+                response.raise_for_status()
+                data = response.json()
+                self._remember(key, response, data)
+                return data
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < self.retries:
+                    self._sleep_before_retry(attempt)
+                    continue
+                print(f"Błąd: {e}")
+                return None
+            except requests.exceptions.RequestException as e:
+                print(f"Błąd: {e}")
+                return None
+        return None
+
+    @staticmethod
+    def _remember(key, response, data):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with _validators_lock:
+            _validators[key] = (etag, last_modified, data)
+            _validators.move_to_end(key)
+            while len(_validators) > MAX_VALIDATORS:
+                _validators.popitem(last=False)
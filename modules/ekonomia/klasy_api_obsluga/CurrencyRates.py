@@ -1,4 +1,13 @@
 from modules.ekonomia.klasy_api_obsluga.APIClient import APIClient
+from modules.ekonomia.klasy_api_obsluga.TableCache import table_cache
+
+
+def _effective_date(data):
+    try:
+        return data[0].get("effectiveDate")
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return None
+
 
 class CurrencyRates:
     def __init__(self, client: APIClient, tables=["a", "b"]):
@@ -14,29 +23,54 @@ class CurrencyRates:
         valid_tables = ["a", "b", "c"]
         self.tables = [t for t in tables if t in valid_tables]
 
-    def get_current_rates(self):
+    def get_table(self, table, force=False):
+        """
+        Zwraca tabelę kursów NBP ze wspólnego cache procesu.
+        Tabela jest pobierana z API tylko raz na publikację NBP
+        (A - dni robocze ok. 12:15, B - środy, C - dni robocze ok. 8:15).
+        """
+        url = f"{self.client.base_url}/exchangerates/tables/{table}/"
+        return table_cache.get_or_fetch(
+            url,
+            table,
+            lambda: self.client.get_json(url, {"format": "json"}),
+            date_of=_effective_date,
+            force=force,
+        )
+
+    def get_current_rates(self, force=False):
         """Aktualne kursy walut z tabel wybranych w self.tables"""
         rates = {}
         for table in self.tables:
-            url = f"{self.client.base_url}/exchangerates/tables/{table}/"
-            data = self.client.get_json(url, {"format": "json"})
+            data = self.get_table(table, force=force)
             if data and len(data) > 0:
                 for r in data[0]["rates"]:
                     rates[r["code"].lower()] = r["mid"]
         return rates
 
+    def get_tables_version(self):
+        """
+        Identyfikator aktualnych tabel z self.tables: krotka (tabela, numer tabeli NBP).
+        Zmienia się tylko przy nowej publikacji; pusta krotka, gdy brak danych.
+        """
+        version = []
+        for table in self.tables:
+            data = self.get_table(table)
+            if data and len(data) > 0:
+                version.append((table, data[0].get("no") or data[0].get("effectiveDate")))
+        return tuple(version)
+
     def get_currency_list(self):
         """Lista walut z tabel wybranych w self.tables"""
         currencies = []
         for table in self.tables:
-            url = f"{self.client.base_url}/exchangerates/tables/{table}/"
-            data = self.client.get_json(url, {"format": "json"})
+            data = self.get_table(table)
             if data and len(data) > 0:
                 for r in data[0]["rates"]:
                     currencies.append({"code": r["code"], "table": table})
         return currencies
-    
+
     def update(self):
-        """Aktualizuje słownik aktualnych kursów walut w self.rates"""
-        self.rates = self.get_current_rates()
-        return self.rates
\ No newline at end of file
+        """Aktualizuje słownik aktualnych kursów walut w self.rates (z pominięciem cache)"""
+        self.rates = self.get_current_rates(force=True)
+        return self.rates
@@ -1,25 +1,43 @@
 from modules.ekonomia.klasy_api_obsluga.APIClient import APIClient
+from modules.ekonomia.klasy_api_obsluga.TableCache import table_cache
+
+
+def _quote_date(data):
+    try:
+        return data[0].get("data")
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return None
+
 
 class GoldPrices:
     def __init__(self, client: APIClient):
         self.client = client
 
+    def _get_quote(self, force=False):
+        """Latest gold quote from NBP, shared by the process until the next publication"""
+        url = f"{self.client.base_url}/cenyzlota/"
+        return table_cache.get_or_fetch(
+            url,
+            "gold",
+            lambda: self.client.get_json(url, {"format": "json"}),
+            date_of=_quote_date,
+            force=force,
+        )
+
     def get_current_price(self):
         """Get current gold price in PLN/oz (troy ounce)"""
-        url = f"{self.client.base_url}/cenyzlota/"
-        data = self.client.get_json(url, {"format": "json"})
+        data = self._get_quote()
         if data and len(data) > 0:
             # NBP returns price per gram, convert to troy ounce (1 oz = 31.1035 g)
             return round(data[0]["cena"] * 31.1035, 2)
         return None
-    
+
     def update(self):
-        """Updates gold price in PLN/oz (troy ounce)"""
-        url = f"{self.client.base_url}/cenyzlota/"
-        data = self.client.get_json(url, {"format": "json"})
+        """Updates gold price in PLN/oz (troy ounce), bypassing the cache"""
+        data = self._get_quote(force=True)
         if data and len(data) > 0:
             # NBP returns price per gram, convert to troy ounce (1 oz = 31.1035 g)
             self.gold_price = round(data[0]["cena"] * 31.1035, 2)
         else:
             self.gold_price = None
-        return self.gold_price
\ No newline at end of file
+        return self.gold_price
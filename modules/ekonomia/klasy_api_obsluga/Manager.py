@@ -1,11 +1,7 @@
 from modules.ekonomia.klasy_api_obsluga.APIClient import APIClient
 from modules.ekonomia.klasy_api_obsluga.CurrencyRates import CurrencyRates
 from modules.ekonomia.klasy_api_obsluga.GoldPrices import GoldPrices
-import matplotlib
-# Use non-interactive Agg backend for server-side rendering
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import pandas as pd
+from modules.chart_renderer import renderer
 
 class Manager:
     def __init__(self):
@@ -37,44 +33,29 @@ class Manager:
         """
         Create plot from DataFrame and return base64-encoded PNG image.
         Useful for creating historical charts (e.g. gold prices) from API data.
+        The chart is drawn by the shared out-of-process renderer (chart_renderer).
         """
-        import io, base64
+        import pandas as pd  # ładowane dopiero przy pierwszym wykresie
+
         if df is None or df.empty:
             # Return empty chart with "No data" message
-            fig, ax = plt.subplots(figsize=(10, 5), facecolor='#c2c9b6')
-            ax.set_facecolor('#c2c9b6')
-            ax.text(0.5, 0.5, 'No data available', ha='center', va='center', color='#2B370A')
-            ax.tick_params(colors='#2B370A')
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-            buf.seek(0)
-            encoded = base64.b64encode(buf.read()).decode('utf-8')
-            plt.close(fig)
-            return encoded
+            return renderer.render_base64('line', {'x': [], 'y': [], 'figsize': (10, 5),
+                                                   'empty_text': 'No data available'})
 
-        fig, ax = plt.subplots( figsize=(16, 7), facecolor='#c2c9b6')
-        ax.set_facecolor('#c2c9b6')
         # Convert x_col to datetime for proper plotting
         try:
-            x = pd.to_datetime(df[x_col])
+            x = pd.to_datetime(df[x_col]).to_numpy()
         except Exception:
-            x = df[x_col]
-        y = df[y_col]
+            x = df[x_col].to_numpy()
 
-        ax.plot(x, y, color=color, linewidth=2)
-        # Apply consistent styling
-        ax.tick_params(colors='#2B370A')
-        ax.set_xlabel(x_label, color='#2B370A')
-        # Set y-label based on column type
-        if y_label:
-            ax.set_ylabel(y_label, color='#2B370A')
-        else:
+        return renderer.render_base64('line', {
+            'x': x,
+            'y': df[y_col].to_numpy(dtype=float),
+            'color': color,
+            'figsize': (16, 7),
+            'title': title,
+            'x_label': x_label,
             # Default to PLN per ounce for gold price series
-            ax.set_ylabel('Cena złota [PLN/oz]' if y_col == 'price' else y_col, color='#2B370A')
-        fig.autofmt_xdate()
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-        buf.seek(0)
-        encoded = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
-        return encoded
\ No newline at end of file
+            'y_label': y_label or ('Cena złota [PLN/oz]' if y_col == 'price' else y_col),
+            'autofmt_xdate': True,
+        })
@@ -0,0 +1,138 @@
+import threading
+from datetime import datetime, time, timedelta
+
+import pytz
+
+WARSAW_TZ = pytz.timezone('Europe/Warsaw')
+
+BUSINESS_DAYS = frozenset({0, 1, 2, 3, 4})
+
+# Kalendarz publikacji NBP (czas warszawski, z zapasem kilku minut):
+# - tabela A i ceny złota: każdy dzień roboczy między 11:45 a 12:15,
+# - tabela B: raz w tygodniu, w środę, w tych samych godzinach,
+# - tabela C: każdy dzień roboczy między 7:45 a 8:15.
+PUBLICATION_SCHEDULE = {
+    'a': (BUSINESS_DAYS, time(12, 20)),
+    'b': (frozenset({2}), time(12, 20)),
+    'c': (BUSINESS_DAYS, time(8, 20)),
+    'gold': (BUSINESS_DAYS, time(12, 20)),
+}
+
+# jeśli NBP spóźnia się z publikacją, pytamy ponownie co tyle czasu
+LATE_RETRY = timedelta(minutes=10)
+# jak długo pamiętamy pustą / nieudaną odpowiedź (awaria NBP nie trafia do każdego żądania)
+NEGATIVE_TTL = timedelta(seconds=60)
+
+# brak wpisu (w odróżnieniu od zapamiętanej pustej odpowiedzi)
+_MISS = object()
+
+
+def _now():
+    return datetime.now(WARSAW_TZ)
+
+
+def _publication_at(day, at):
+    return WARSAW_TZ.localize(datetime.combine(day, at))
+
+
+def last_publication(kind, now=None):
+    """Most recent scheduled publication of `kind` at or before `now`"""
+    weekdays, at = PUBLICATION_SCHEDULE[kind]
+    now = now or _now()
+    for days_back in range(8):
+        day = now.date() - timedelta(days=days_back)
+        candidate = _publication_at(day, at)
+        if day.weekday() in weekdays and candidate <= now:
+            return candidate
+    return None
+
+
+def next_publication(kind, now=None):
+    """First scheduled publication of `kind` strictly after `now`"""
+    weekdays, at = PUBLICATION_SCHEDULE[kind]
+    now = now or _now()
+    for days_ahead in range(8):
+        day = now.date() + timedelta(days=days_ahead)
+        candidate = _publication_at(day, at)
+        if day.weekday() in weekdays and candidate > now:
+            return candidate
+    return now + timedelta(days=1)
+
+
+class TableCache:
+    """Process-wide cache of NBP responses expiring on NBP's publication calendar.
+
+    An entry lives until the next scheduled publication of its kind. If the
+    fetched data is older than the last publication (NBP is late or it was a
+    holiday), the entry is re-checked every LATE_RETRY instead. Empty or
+    failed responses are remembered for NEGATIVE_TTL, so an NBP outage costs
+    one slow upstream call per key and minute rather than one per request.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _expiry(self, kind, data_date, now):
+        expires = next_publication(kind, now)
+        last = last_publication(kind, now)
+        if data_date and last and data_date < last.date().isoformat():
+            expires = min(expires, now + LATE_RETRY)
+        return expires
+
+    def _lookup(self, key, now=None):
+        now = now or _now()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        return _MISS
+
+    def get(self, key, now=None):
+        data = self._lookup(key, now)
+        return None if data is _MISS else data
+
+    def put(self, key, kind, data, data_date=None, now=None):
+        now = now or _now()
+        with self._lock:
+            self._entries[key] = (self._expiry(kind, data_date, now), data)
+
+    def put_failure(self, key, data=None, now=None):
+        """Remember an empty/failed response for NEGATIVE_TTL"""
+        now = now or _now()
+        with self._lock:
+            self._entries[key] = (now + NEGATIVE_TTL, data)
+
+    def get_or_fetch(self, key, kind, fetch, date_of=None, force=False):
+        """Return cached data for `key` or call `fetch()` once (per key) and cache it.
+
+        Empty/failed responses are cached only for NEGATIVE_TTL, then retried.
+        """
+        if not force:
+            data = self._lookup(key)
+            if data is not _MISS:
+                return data
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # inny wątek mógł już pobrać tabelę, gdy czekaliśmy na blokadę
+            if not force:
+                data = self._lookup(key)
+                if data is not _MISS:
+                    return data
+            data = fetch()
+            if data:
+                self.put(key, kind, data, date_of(data) if date_of else None)
+            else:
+                self.put_failure(key, data)
+            return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# wspólny cache tabel NBP dla całego procesu
+table_cache = TableCache()
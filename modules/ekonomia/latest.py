@@ -0,0 +1,109 @@
+"""Latest-snapshot manifest of the NBP series kept in data/economics.
+
+`fetch_nbp.run_update` writes one small JSON file (`.latest`) after every
+update with, for each series, the newest quote, the previous one and the
+change between them. Every worker keeps the parsed manifest in memory and
+re-reads it only when the file's version (mtime + size) changes, so the
+homepage, the rate tiles and the list of available codes are plain dict
+lookups - no series files, numpy or directory listing involved.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+from modules.ekonomia import storage
+
+## ustawienia
+# ten sam katalog, do którego zapisuje fetch_nbp
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', '..', 'data', 'economics')
+MANIFEST_FILE = '.latest'
+
+GOLD = 'gold'
+
+
+def manifest_path(data_dir=None):
+    return os.path.join(data_dir or DATA_DIR, MANIFEST_FILE)
+
+
+def entry_for(records, key_date, key_value):
+    """Manifest entry from date-sorted records: newest and previous quote"""
+    if not records:
+        return None
+    last = records[-1]
+    entry = {'date': last[key_date], 'value': last[key_value]}
+    if len(records) > 1:
+        previous = records[-2]
+        entry.update(
+            previous_date=previous[key_date],
+            previous=previous[key_value],
+            change=round(last[key_value] - previous[key_value], 6),
+            change_pct=round((last[key_value] / previous[key_value] - 1) * 100, 4) if previous[key_value] else None,
+        )
+    return entry
+
+
+def build(series_paths):
+    """Manifest entries for {name: (base_path, key_date, key_value)}; series without data are skipped"""
+    entries = {}
+    for name, (path, key_date, key_value) in series_paths.items():
+        entry = entry_for(storage.merged_records(path, key_date)[-2:], key_date, key_value)
+        if entry:
+            entries[name] = entry
+    return entries
+
+
+def write_manifest(series_paths, data_dir=None):
+    """Build and atomically write the manifest (called by fetch_nbp after an update)"""
+    manifest = {'updated': datetime.now().isoformat(timespec='seconds'), 'series': build(series_paths)}
+    storage.write_json(manifest_path(data_dir), manifest)
+    return manifest
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load(data_dir=None):
+    """Parsed manifest cached per process until the file changes, or None when missing"""
+    path = manifest_path(data_dir)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        # plik w trakcie podmiany / uszkodzony - ostatnia poprawna wersja
+        return cached[1] if cached else None
+    with _lock:
+        _cache[path] = (version, manifest)
+    return manifest
+
+
+def get(name, data_dir=None):
+    """Manifest entry of a currency code or 'gold', or None"""
+    manifest = load(data_dir)
+    if manifest is None:
+        return None
+    name = GOLD if name.lower() == GOLD else name.upper()
+    return manifest.get('series', {}).get(name)
+
+
+def currency_codes(data_dir=None):
+    """Sorted currency codes present in the manifest (None when there is no manifest)"""
+    manifest = load(data_dir)
+    if manifest is None:
+        return None
+    return sorted(code for code in manifest.get('series', {}) if code != GOLD)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,134 @@
+"""Background, single-flight refresh of NBP snapshots in data/economics.
+
+The refresh (`fetch_nbp.run_update`) is never executed inside a request.
+It runs from the application scheduler shortly after each NBP publication
+(table A and gold prices, business days ~12:15 Warsaw time) and is guarded by an exclusive,
+non-blocking flock on a lock file in the data directory, so with several
+gunicorn workers (or the dev reloader) only one process downloads data while
+the others keep serving the last good snapshot.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows - blokada tylko w obrębie procesu
+    fcntl = None
+
+from modules.ekonomia import fetch_nbp, storage
+from modules.ekonomia.klasy_api_obsluga.TableCache import WARSAW_TZ, last_publication
+
+## ustawienia
+DATA_DIR = fetch_nbp.DATA_DIR
+LAST_UPDATE_FILE = '.last_update'
+LOCK_FILE = '.refresh.lock'
+# jak często dane mają być odświeżane (niezależnie od kalendarza publikacji)
+REFRESH_INTERVAL = timedelta(hours=24)
+# jak często scheduler sprawdza, czy dane są przeterminowane
+CHECK_INTERVAL_MINUTES = 10
+# gdy NBP spóźnia się z publikacją, ponawiamy odświeżenie co tyle czasu
+LATE_RETRY = timedelta(minutes=30)
+
+# single-flight w obrębie procesu (flock chroni między procesami)
+_thread_lock = threading.Lock()
+
+
+def last_update():
+    """Return datetime of the last successful refresh or None"""
+    try:
+        with open(os.path.join(DATA_DIR, LAST_UPDATE_FILE), 'r') as f:
+            return datetime.fromisoformat(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def latest_gold_date():
+    """ISO date of the newest stored gold quote or None"""
+    try:
+        return storage.last_date(os.path.join(DATA_DIR, 'gold.json'), 'date')
+    except (OSError, ValueError):
+        return None
+
+
+def is_stale(now=None):
+    """True when data should be refreshed.
+
+    That is when it was never refreshed, is older than REFRESH_INTERVAL,
+    was refreshed before the latest scheduled NBP publication, or NBP was
+    late with that publication and LATE_RETRY has passed since the last try.
+    """
+    last = last_update()
+    now = now or datetime.now()
+    if last is None or now - last > REFRESH_INTERVAL:
+        return True
+    published = last_publication('gold', now.astimezone(WARSAW_TZ))
+    if published is None:
+        return False
+    if last.astimezone(WARSAW_TZ) < published:
+        return True
+    latest = latest_gold_date()
+    return latest is not None and latest < published.date().isoformat() and now - last > LATE_RETRY
+
+
+def _write_last_update(when):
+    path = os.path.join(DATA_DIR, LAST_UPDATE_FILE)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(when.isoformat())
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _refresh_lock():
+    """Try to take the node-wide refresh lock without blocking.
+
+    Yields True when this thread owns the lock, False when a refresh is
+    already running in this or another process.
+    """
+    if not _thread_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with open(os.path.join(DATA_DIR, LOCK_FILE), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        _thread_lock.release()
+
+
+def refresh_if_stale(force=False):
+    """Run `fetch_nbp.run_update()` unless data is fresh or a refresh is in progress.
+
+    Returns True when the refresh was executed by this call.
+    """
+    with _refresh_lock() as acquired:
+        if not acquired:
+            return False
+        # sprawdź ponownie pod blokadą - inny proces mógł właśnie skończyć
+        if not force and not is_stale():
+            return False
+        fetch_nbp.run_update()
+        _write_last_update(datetime.now())
+        return True
+
+
+def run_scheduled_refresh():
+    """Scheduler job: refresh NBP data if needed, never raising"""
+    try:
+        if refresh_if_stale():
+            print("✓ Dane NBP zaktualizowane w tle")
+    except Exception as e:
+        print(f"✗ Błąd aktualizacji danych NBP: {e}")
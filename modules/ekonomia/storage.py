@@ -0,0 +1,313 @@
+"""Crash-safe, append-only storage of NBP series in data/economics.
+
+Each series is kept in two files:
+
+- `CODE.json` - the compacted base: a JSON array sorted by date, written
+  one record per line and only ever replaced atomically (tmp file, fsync,
+  `os.replace`), so readers never see a half-written file;
+- `CODE.jsonl` - the append-only segment: new records, one JSON object per
+  line, appended and fsynced by the (single) writer.
+
+Readers merge segment and base, the later record for a date wins. A torn
+last line of the segment (crash mid-append) is ignored by readers and cut
+off by the next append. When the segment grows past COMPACT_EVERY records
+it is folded into the base; retention is enforced there by slicing the
+sorted records at the cutoff date (ISO dates compare as strings), without
+parsing individual dates.
+
+Before old daily records are dropped, compaction folds every daily record
+into weekly and monthly OHLC aggregates kept in `ohlc/CODE.<tier>.json`.
+Those coarse tiers hold the whole multi-year history while the daily file
+stays small. Rolling statistics computed on every update (`analytics`) are
+stored next to them in `ohlc/CODE.stats.json`.
+"""
+import bisect
+import json
+import os
+
+SEGMENT_SUFFIX = '.jsonl'
+# agregaty OHLC (cała historia) w podkatalogu, żeby nie mieszać ich z plikami walut
+TIER_DIR = 'ohlc'
+TIERS = ('weekly', 'monthly')
+# po ilu rekordach w segmencie scalamy go z plikiem bazowym (~miesiąc notowań)
+COMPACT_EVERY = 20
+# ile bajtów z końca pliku bazowego czytamy, szukając ostatniego rekordu
+TAIL_BYTES = 4096
+
+
+def segment_path(base_path):
+    return os.path.splitext(base_path)[0] + SEGMENT_SUFFIX
+
+
+def tier_path(base_path, tier):
+    directory, name = os.path.split(base_path)
+    return os.path.join(directory, TIER_DIR, f'{os.path.splitext(name)[0]}.{tier}.json')
+
+
+def meta_path(base_path):
+    return tier_path(base_path, 'meta')
+
+
+def stats_path(base_path):
+    return tier_path(base_path, 'stats')
+
+
+def version(base_path):
+    """((mtime_ns, size) of base, same of segment), or None when neither exists.
+
+    A missing file is reported as (0, 0) so versions stay comparable.
+    """
+    stats = []
+    for path in (base_path, segment_path(base_path)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            stats.append((0, 0))
+            continue
+        stats.append((st.st_mtime_ns, st.st_size))
+    if stats == [(0, 0), (0, 0)]:
+        return None
+    return tuple(stats)
+
+
+def _read_base(base_path):
+    try:
+        with open(base_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _read_segment(base_path):
+    records = []
+    try:
+        with open(segment_path(base_path), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # urwana linia po awarii w trakcie dopisywania
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def read_records(base_path):
+    """All records of a series (base followed by segment, not deduplicated).
+
+    The segment is read before the base: if a compaction happens in between,
+    the reader sees the new base plus (already merged) segment records, which
+    are harmless duplicates, instead of missing them.
+    """
+    segment = _read_segment(base_path)
+    return _read_base(base_path) + segment
+
+
+def merged_records(base_path, key_date):
+    """Date-sorted records of a series with one record per date"""
+    return _merge(read_records(base_path), key_date)
+
+
+def _merge(records, key_date):
+    """Sort by date keeping the last record for each date"""
+    by_date = {}
+    for record in records:
+        if record.get(key_date):
+            by_date[record[key_date]] = record
+    return [by_date[d] for d in sorted(by_date)]
+
+
+def _last_base_date(base_path, key_date):
+    """Date of the last base record, reading only the end of the file"""
+    try:
+        with open(base_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - TAIL_BYTES))
+            tail = f.read().decode('utf-8', errors='ignore')
+    except FileNotFoundError:
+        return None
+    for line in reversed(tail.splitlines()):
+        line = line.strip().rstrip(',')
+        if line.startswith('{') and line.endswith('}'):
+            try:
+                return json.loads(line).get(key_date)
+            except ValueError:
+                break
+    # stary format (wcięcia) - wczytaj cały plik
+    try:
+        dates = [r[key_date] for r in _read_base(base_path) if r.get(key_date)]
+    except ValueError:
+        return None
+    return max(dates) if dates else None
+
+
+def last_date(base_path, key_date):
+    """Latest stored ISO date of the series or None"""
+    dates = [r[key_date] for r in _read_segment(base_path) if r.get(key_date)]
+    base_last = _last_base_date(base_path, key_date)
+    if base_last:
+        dates.append(base_last)
+    return max(dates) if dates else None
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def _write_base(base_path, records):
+    """Atomically replace the base file with `records` (one record per line)"""
+    lines = ',\n'.join(json.dumps(r, ensure_ascii=False) for r in records)
+    _write_atomic(base_path, f'[\n{lines}\n]\n')
+
+
+def read_meta(base_path):
+    """Small per-series metadata (e.g. how far back history was fetched)"""
+    try:
+        with open(meta_path(base_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path, data):
+    """Atomically replace a small JSON file (metadata, statistics, manifests)"""
+    _write_atomic(path, json.dumps(data, ensure_ascii=False))
+
+
+def write_meta(base_path, meta):
+    write_json(meta_path(base_path), meta)
+
+
+def write_stats(base_path, stats):
+    """Atomically store precomputed statistics of a series (see `analytics`)"""
+    write_json(stats_path(base_path), stats)
+
+
+def append_records(base_path, records):
+    """Append records to the segment (fsynced); cuts off a torn last line first"""
+    if not records:
+        return
+    path = segment_path(base_path)
+    with open(path, 'ab+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(max(0, size - TAIL_BYTES))
+            tail = f.read()
+            if not tail.endswith(b'\n'):
+                cut = tail.rfind(b'\n')
+                f.truncate(size - len(tail) + cut + 1 if cut >= 0 else max(0, size - len(tail)))
+        f.seek(0, os.SEEK_END)
+        f.write(b''.join(json.dumps(r, ensure_ascii=False).encode('utf-8') + b'\n' for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def segment_size(base_path):
+    """Number of complete records in the segment"""
+    try:
+        with open(segment_path(base_path), 'rb') as f:
+            return f.read().count(b'\n')
+    except FileNotFoundError:
+        return 0
+
+
+def _period_starts(dates, tier):
+    """First day of the week (Monday) or month of each datetime64[D] date"""
+    if tier == 'weekly':
+        # 1970-01-01 był czwartkiem
+        return dates - (dates.astype('int64') + 3) % 7
+    return dates.astype('datetime64[M]').astype('datetime64[D]')
+
+
+def aggregate(records, key_date, key_value, tier):
+    """OHLC aggregates per week/month of date-sorted daily records"""
+    if not records:
+        return []
+    import numpy as np  # tylko przy zapisie agregatów (fetch_nbp), nie przy imporcie aplikacji
+    dates = np.array([r[key_date] for r in records], dtype='datetime64[D]')
+    values = np.array([r[key_value] for r in records], dtype=float)
+    periods = _period_starts(dates, tier)
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    columns = zip(
+        np.datetime_as_string(periods[starts], unit='D').tolist(),
+        np.datetime_as_string(dates[starts], unit='D').tolist(),
+        np.datetime_as_string(dates[ends], unit='D').tolist(),
+        values[starts].tolist(),
+        np.maximum.reduceat(values, starts).tolist(),
+        np.minimum.reduceat(values, starts).tolist(),
+        values[ends].tolist(),
+    )
+    return [
+        {'date': p, 'first': f, 'last': l, 'open': o, 'high': h, 'low': lo, 'close': c}
+        for p, f, l, o, h, lo, c in columns
+    ]
+
+
+def _combine(old, new):
+    """Merge two aggregates of the same period; overlapping days are fine"""
+    return {
+        'date': old['date'],
+        'first': min(old['first'], new['first']),
+        'last': max(old['last'], new['last']),
+        'open': new['open'] if new['first'] <= old['first'] else old['open'],
+        'high': max(old['high'], new['high']),
+        'low': min(old['low'], new['low']),
+        'close': new['close'] if new['last'] >= old['last'] else old['close'],
+    }
+
+
+def update_tiers(base_path, records, key_date, key_value):
+    """Fold date-sorted daily `records` into the weekly/monthly OHLC files"""
+    for tier in TIERS:
+        path = tier_path(base_path, tier)
+        periods = {r['date']: r for r in _read_base(path)}
+        for agg in aggregate(records, key_date, key_value, tier):
+            old = periods.get(agg['date'])
+            periods[agg['date']] = _combine(old, agg) if old else agg
+        _write_base(path, [periods[d] for d in sorted(periods)])
+
+
+def compact(base_path, key_date, keep_since=None, key_value=None, extra=()):
+    """Fold the segment into the base and drop records dated before `keep_since`.
+
+    `extra` are additional (e.g. backfilled) records; stored ones win on
+    conflicts. With `key_value` all records are first folded into the
+    OHLC tiers, so truncated days survive there. `keep_since` is an ISO
+    date string; the sorted records are truncated with a single bisect.
+    The base is replaced atomically before the segment is removed, so a
+    crash in between only leaves duplicates behind.
+    """
+    records = _merge(list(extra) + read_records(base_path), key_date)
+    if key_value:
+        update_tiers(base_path, records, key_date, key_value)
+    if keep_since:
+        dates = [r[key_date] for r in records]
+        records = records[bisect.bisect_left(dates, keep_since):]
+    _write_base(base_path, records)
+    try:
+        os.remove(segment_path(base_path))
+    except FileNotFoundError:
+        pass
+    return records
@@ -0,0 +1,272 @@
+"""Columnar time-series store for NBP history kept in data/economics.
+
+Each series (a currency code such as 'EUR' or the special 'gold' series) is
+parsed once into two packed numpy arrays - dates (datetime64[D]) and values
+(float64) - and kept in a process-level cache. The cache entry is reused until
+the backing files' version (mtime + size of the base file and its append-only
+segment, see `storage`) changes, so hot requests do not touch json/pandas at all.
+"""
+import os
+import threading
+from dataclasses import dataclass
+import numpy as np
+
+from modules.ekonomia import storage
+
+## ustawienia
+# ten sam katalog, do którego zapisuje fetch_nbp
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', '..', 'data', 'economics')
+
+GOLD = 'gold'
+
+# poziomy historii: dzienne notowania (ostatnie lata) i agregaty OHLC (cała historia)
+DAILY = 'daily'
+TIERS = (DAILY,) + storage.TIERS
+
+# nazwy pól w rekordach JSON: (pole daty, pole wartości)
+CURRENCY_FIELDS = ('effectiveDate', 'mid')
+GOLD_FIELDS = ('date', 'price')
+TIER_FIELDS = ('date', 'close')
+
+# maksymalna liczba punktów, jaką zapytanie zakresowe czyta z jednego poziomu
+MAX_RANGE_POINTS = 800
+# poziom "pokrywa" początek zakresu, jeśli zaczyna się najpóźniej tyle dni po nim
+COVERAGE_SLACK = np.timedelta64(31, 'D')
+
+
+@dataclass(frozen=True)
+class Series:
+    """Immutable, sorted daily series backed by numpy arrays."""
+    name: str
+    dates: np.ndarray
+    values: np.ndarray
+    version: tuple
+    # DAILY albo poziom agregatów (values = close, ohlc = open/high/low/close)
+    tier: str = DAILY
+    ohlc: dict = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0
+
+    def latest(self):
+        """Return (date, value) of the newest point or None when empty."""
+        if self.empty:
+            return None
+        return self.dates[-1].item(), float(self.values[-1])
+
+    def value_on(self, day):
+        """Return value published on `day` or the last one before it.
+
+        Returns None when `day` precedes the whole series.
+        """
+        idx = np.searchsorted(self.dates, np.datetime64(day, 'D'), side='right') - 1
+        if idx < 0:
+            return None
+        return float(self.values[idx])
+
+    def values_on(self, days):
+        """Vectorized `value_on` for many days at once.
+
+        Returns (effective_dates, values) arrays aligned with `days`; entries
+        for days preceding the series are NaT / NaN.
+        """
+        days = np.asarray(days, dtype='datetime64[D]')
+        if self.empty:
+            return np.full(days.shape, np.datetime64('NaT'), dtype='datetime64[D]'), np.full(days.shape, np.nan)
+        idx = np.searchsorted(self.dates, days, side='right') - 1
+        valid = idx >= 0
+        safe = np.where(valid, idx, 0)
+        dates = np.where(valid, self.dates[safe], np.datetime64('NaT'))
+        values = np.where(valid, self.values[safe], np.nan)
+        return dates, values
+
+    def span(self, start=None, end=None):
+        """Return (lo, hi) indices of points with start <= date <= end (bounds optional)."""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None):
+        """Return (dates, values) views for start <= date <= end (bounds optional)."""
+        lo, hi = self.span(start, end)
+        return self.dates[lo:hi], self.values[lo:hi]
+
+
+def _empty_series(name, version, tier=DAILY):
+    return Series(name, np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=float), version, tier)
+
+
+def _parse_records(name, records, version, tier=DAILY):
+    """Pack list of JSON records into a sorted, de-duplicated Series."""
+    if tier != DAILY:
+        date_field, value_field = TIER_FIELDS
+    else:
+        date_field, value_field = GOLD_FIELDS if name == GOLD else CURRENCY_FIELDS
+    if not records:
+        return _empty_series(name, version, tier)
+
+    dates = np.array([r[date_field] for r in records], dtype='datetime64[D]')
+    columns = {value_field: np.array([r[value_field] for r in records], dtype=float)}
+    if tier != DAILY:
+        for field in ('open', 'high', 'low'):
+            columns[field] = np.array([r[field] for r in records], dtype=float)
+
+    # posortuj i usuń ewentualne duplikaty dat (zostaje ostatni zapis)
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    keep = np.ones(len(dates), dtype=bool)
+    keep[:-1] = dates[1:] != dates[:-1]
+    dates = dates[keep]
+    columns = {k: v[order][keep] for k, v in columns.items()}
+
+    dates.flags.writeable = False
+    for column in columns.values():
+        column.flags.writeable = False
+    values = columns.pop(value_field)
+    ohlc = None
+    if tier != DAILY:
+        ohlc = dict(columns, close=values)
+    return Series(name, dates, values, version, tier, ohlc)
+
+
+def downsample(dates, values, points):
+    """Reduce a series to at most `points` samples for plotting (LTTB).
+
+    Largest-Triangle-Three-Buckets keeps the first and last sample and, from
+    each bucket in between, the one forming the largest triangle with its
+    neighbours - so peaks and dips survive while flat stretches are thinned.
+    """
+    if points >= len(dates):
+        return dates, values
+    selected = downsample_indices(dates, values, points)
+    return dates[selected], values[selected]
+
+
+def downsample_indices(dates, values, points):
+    """Indices of the samples kept by `downsample` (to slice extra columns too)."""
+    n = len(dates)
+    if points >= n:
+        return np.arange(n)
+    if points <= 2:
+        return np.array([0, n - 1][:max(points, 1)])
+
+    x = dates.astype('int64').astype(float)
+    y = values
+    # granice kubełków dla punktów wewnętrznych (bez pierwszego i ostatniego)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected = np.empty(points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # średnia następnego kubełka (dla ostatniego - ostatni punkt)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+class TimeSeriesStore:
+    """Process-level cache of packed NBP series, invalidated by file version."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_name(name):
+        return GOLD if name.lower() == GOLD else name.upper()
+
+    def path_for(self, name, tier=DAILY):
+        path = os.path.join(self.data_dir, f'{self.normalize_name(name)}.json')
+        return path if tier == DAILY else storage.tier_path(path, tier)
+
+    def version_of(self, name, tier=DAILY):
+        """Return version tuple of the backing files (base + segment) or None if missing."""
+        return storage.version(self.path_for(name, tier))
+
+    def get(self, name, tier=DAILY):
+        """Return cached Series for `name` (and history tier) or None when there is no data file.
+
+        If the file cannot be parsed (e.g. it is being rewritten), the last
+        good cached version is returned instead.
+        """
+        name = self.normalize_name(name)
+        key = (name, tier)
+        version = self.version_of(name, tier)
+        if version is None:
+            with self._lock:
+                self._cache.pop(key, None)
+            return None
+
+        cached = self._cache.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+
+        series = self._load(name, tier, version)
+        if series is None:
+            # plik w trakcie zapisu / uszkodzony - serwuj ostatni poprawny snapshot
+            return cached
+        with self._lock:
+            current = self._cache.get(key)
+            # nie nadpisuj nowszej wersji wczytanej przez inny wątek
+            if current is None or current.version <= series.version:
+                self._cache[key] = series
+        return series
+
+    def select(self, name, start=None, end=None, max_points=MAX_RANGE_POINTS):
+        """Pick the finest history tier for a [start, end] query.
+
+        A tier qualifies when it covers the start of the range (the daily tier
+        only keeps recent years) and has at most `max_points` points in it;
+        otherwise the next, coarser tier is tried. Long ranges therefore read
+        weekly/monthly aggregates and cost stays bounded. Returns None when
+        there is no data at all.
+        """
+        available = [s for s in (self.get(name, tier) for tier in TIERS) if s is not None and not s.empty]
+        if not available:
+            return self.get(name)
+        earliest = min(s.dates[0] for s in available)
+        wanted_from = np.datetime64(start, 'D') if start is not None else earliest
+        for series in available:
+            if series.dates[0] > max(wanted_from, earliest) + COVERAGE_SLACK and series is not available[-1]:
+                continue
+            lo, hi = series.span(start, end)
+            if hi - lo <= max_points:
+                return series
+        return available[-1]
+
+    def _load(self, name, tier, version):
+        try:
+            return _parse_records(name, storage.read_records(self.path_for(name, tier)), version, tier)
+        except Exception as e:
+            print(f"Error loading series {name} ({tier}): {e}")
+            return None
+
+    def invalidate(self, name=None):
+        """Drop one series (all tiers) or everything from the cache."""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                for tier in TIERS:
+                    self._cache.pop((self.normalize_name(name), tier), None)
+
+
+# domyślny store współdzielony przez cały proces
+store = TimeSeriesStore()
+
+
+def get_series(name):
+    """Shortcut for `store.get(name)`."""
+    return store.get(name)
@@ -0,0 +1,138 @@
+"""Offline gazetteer of Polish localities for weather search and autocomplete.
+
+The bundled `data/gazetteer/pl_places.csv` (GeoNames, places with at least
+500 inhabitants) is loaded once per process into two flat arrays. City
+districts in the file (`kind` = district, e.g. Wola in Warsaw) are skipped -
+they are not separate places, and "Wola" must not geocode to Warsaw.
+
+- `places` - (name, voivodeship, lat, lon) ordered by population, so a
+  place's index is also its rank;
+- a sorted array of normalized keys (`modules.geocoding.normalize_place_name`)
+  with the rank of the place next to it. Every place is indexed under its
+  full name and under each later word ("nowy sacz", "sacz").
+
+A prefix is answered with two bisects and a pass over the matching slice -
+no database, no network. Full-name matches rank before matches on a later
+word, then larger places first.
+"""
+import bisect
+import csv
+import heapq
+import logging
+import os
+import threading
+
+from modules.geocoding import normalize_place_name
+
+logger = logging.getLogger(__name__)
+
+## ustawienia
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GAZETTEER_PATH = os.path.join(BASE_DIR, '..', 'data', 'gazetteer', 'pl_places.csv')
+COUNTRY = 'PL'
+# wartości kolumny `kind`
+PLACE = 'place'
+DISTRICT = 'district'
+# domyślna i maksymalna liczba podpowiedzi autouzupełniania
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+class Gazetteer:
+    """Places ordered by population with a sorted-array prefix index"""
+
+    def __init__(self, places):
+        # dzielnice miast nie trafiają ani do podpowiedzi, ani do dokładnych dopasowań
+        places = [p for p in places if p[5:6] != (DISTRICT,)]
+        self.places = [p[:4] for p in sorted(places, key=lambda p: -p[4])]
+        # ranga miejsca dopasowanego po dalszym słowie nazwy jest przesunięta
+        # o liczbę miejsc, żeby dopasowania od początku nazwy były pierwsze
+        offset = len(self.places)
+        entries = []
+        for rank, place in enumerate(self.places):
+            words = normalize_place_name(place[0]).split(' ')
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), rank + offset * (i > 0)))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ranks = [rank for _, rank in entries]
+
+    def __len__(self):
+        return len(self.places)
+
+    def _range(self, key):
+        lo = bisect.bisect_left(self._keys, key)
+        return lo, bisect.bisect_left(self._keys, key + '\uffff', lo)
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Places whose name (or a later word of it) starts with `prefix`"""
+        prefix = normalize_place_name(prefix)
+        if not prefix or limit <= 0:
+            return []
+        lo, hi = self._range(prefix)
+        offset = len(self.places)
+        # miejsce może pasować kilkoma słowami - liczy się najlepsze dopasowanie
+        best = {}
+        for value in self._ranks[lo:hi]:
+            rank = value % offset
+            if value < best.get(rank, 2 * offset):
+                best[rank] = value
+        return [self.to_geocode(r) for r in heapq.nsmallest(limit, best, key=best.get)]
+
+    def lookup(self, name, limit=None):
+        """Places named exactly `name` (after normalization), largest first"""
+        key = normalize_place_name(name)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_right(self._keys, key, lo)
+        offset = len(self.places)
+        ranks = sorted(r for r in self._ranks[lo:hi] if r < offset)
+        return [self.to_geocode(r) for r in ranks[:limit]]
+
+    def to_geocode(self, rank):
+        """Place in the shape of an OpenWeather geocoding result"""
+        name, voivodeship, lat, lon = self.places[rank]
+        return {
+            'name': name,
+            'local_names': {'pl': name},
+            'lat': lat,
+            'lon': lon,
+            'country': COUNTRY,
+            'state': f'województwo {voivodeship}',
+        }
+
+
+def read_places(path):
+    """(name, voivodeship, lat, lon, population, kind) rows of a gazetteer CSV"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [
+            (row['name'], row['voivodeship'], float(row['lat']), float(row['lon']), int(row['population'] or 0),
+             row.get('kind') or PLACE)
+            for row in csv.DictReader(f)
+        ]
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def get():
+    """The bundled gazetteer, loaded on first use; empty when the file is missing"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                try:
+                    places = read_places(GAZETTEER_PATH)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning('Gazetteer not available (%s): %s', GAZETTEER_PATH, e)
+                    places = []
+                _gazetteer = Gazetteer(places)
+    return _gazetteer
+
+
+def clear():
+    global _gazetteer
+    with _lock:
+        _gazetteer = None
@@ -0,0 +1,136 @@
+"""Persistent geocoding cache for /weather/api/geocode.
+
+Results of the OpenWeather geocoding API are stored in the application
+database and looked up by a normalized name: case folded, diacritics
+stripped ("Kraków" == "krakow"), hyphens and repeated whitespace collapsed.
+
+A query is answered in this order:
+
+1. exact query cache (`GeocodeQuery`) - also remembers empty results, those
+   only for NEGATIVE_TTL so newly added places eventually show up;
+2. prefix index (`GeocodePlace`, one row per name alias of every stored
+   place) - a partially typed name ("krak") is answered from places seen
+   before. A query that ends on a word boundary of all matches ("opole"
+   vs. "opole lubelskie") may be a complete, different name, so it still
+   goes upstream;
+3. the upstream call; its results are stored in both tables.
+
+Database errors are logged and treated as misses - geocoding keeps working
+without the cache.
+"""
+import json
+import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from modules.database import db, GeocodeQuery, GeocodePlace
+
+logger = logging.getLogger(__name__)
+
+# tyle wyników zwraca endpoint (limit zapytania do OpenWeather)
+RESULT_LIMIT = 5
+# krótsze zapytania nie są dopasowywane po prefiksie (za dużo trafień)
+MIN_PREFIX = 3
+# jak długo pamiętamy, że zapytanie nie dało wyników (sekundy)
+NEGATIVE_TTL = 24 * 3600
+# nazwy z local_names indeksowane obok nazwy głównej
+ALIAS_LANGUAGES = ('pl', 'en')
+
+# litery, których NFKD nie rozkłada na literę bazową i znak diakrytyczny
+_LETTERS = str.maketrans({'ł': 'l', 'đ': 'd', 'ø': 'o', 'æ': 'ae', 'œ': 'oe'})
+_SEPARATORS = re.compile(r'[\s\-\u2010-\u2014_,.]+')
+
+
+def normalize_place_name(name):
+    """Lookup key of a place name: 'Kędzierzyn-Koźle ' -> 'kedzierzyn kozle'"""
+    text = unicodedata.normalize('NFKD', str(name).casefold().translate(_LETTERS))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def aliases(place, query_norm=None):
+    """Normalized names under which a geocoding result is indexed"""
+    names = {place.get('name')}
+    local_names = place.get('local_names') or {}
+    names.update(local_names.get(lang) for lang in ALIAS_LANGUAGES)
+    keys = {normalize_place_name(n) for n in names if n}
+    # np. "Cracow" zwraca Kraków - zapamiętujemy też zapytanie
+    if query_norm:
+        keys.add(query_norm)
+    return {k for k in keys if k}
+
+
+def _prefix_matches(query_norm):
+    """Stored places for a partially typed name, or None when upstream should decide"""
+    if len(query_norm) < MIN_PREFIX:
+        return None
+    rows = GeocodePlace.with_prefix(query_norm, RESULT_LIMIT * len(ALIAS_LANGUAGES) * 2)
+    # zapytanie kończące się na granicy słowa każdego trafienia może być inną, pełną nazwą
+    partial = any(
+        row.name_norm == query_norm or row.name_norm[len(query_norm)] != ' '
+        for row in rows
+    )
+    if not partial:
+        return None
+    results, seen = [], set()
+    for row in rows:
+        if (row.lat, row.lon) in seen:
+            continue
+        seen.add((row.lat, row.lon))
+        results.append(json.loads(row.data))
+        if len(results) == RESULT_LIMIT:
+            break
+    return results
+
+
+def lookup(query):
+    """Cached results for `query`, or None on a miss"""
+    query_norm = normalize_place_name(query)
+    if not query_norm:
+        return None
+    try:
+        cached = GeocodeQuery.get(query_norm)
+        if cached is not None:
+            results = json.loads(cached.results)
+            expired = datetime.utcnow() - cached.created_at > timedelta(seconds=NEGATIVE_TTL)
+            if results or not expired:
+                return results
+        return _prefix_matches(query_norm)
+    except (SQLAlchemyError, ValueError) as e:
+        db.session.rollback()
+        logger.warning('Geocode cache lookup failed for %r: %s', query, e)
+        return None
+
+
+def store(query, results):
+    """Remember upstream `results` for `query` (exact entry plus prefix index)"""
+    query_norm = normalize_place_name(query)
+    if not query_norm or not isinstance(results, list):
+        return False
+    try:
+        entry = GeocodeQuery.get(query_norm) or GeocodeQuery(query_norm=query_norm)
+        entry.results = json.dumps(results, ensure_ascii=False)
+        entry.created_at = datetime.utcnow()
+        db.session.add(entry)
+        for place in results:
+            if not isinstance(place, dict) or place.get('lat') is None or place.get('lon') is None:
+                continue
+            lat, lon = float(place['lat']), float(place['lon'])
+            data = json.dumps(place, ensure_ascii=False)
+            for name_norm in aliases(place, query_norm):
+                row = GeocodePlace.query.filter_by(name_norm=name_norm, lat=lat, lon=lon).first()
+                if row is None:
+                    db.session.add(GeocodePlace(name_norm=name_norm, lat=lat, lon=lon, data=data))
+                else:
+                    row.data = data
+        db.session.commit()
+        return True
+    except (SQLAlchemyError, TypeError, ValueError) as e:
+        # np. inny worker zapisał to samo miejsce w międzyczasie
+        db.session.rollback()
+        logger.warning('Geocode cache store failed for %r: %s', query, e)
+        return False
+
@@ -0,0 +1,45 @@
+"""Deferred imports of heavy modules (numpy, pandas, numpy-backed data modules).
+
+`create_app` imports every blueprint, so anything a blueprint imports at
+module level is paid for by every worker - also the ones that only serve
+`/auth` or `/news`. `lazy_import(name)` returns a stand-in that imports the
+real module on first attribute access (through `importlib.import_module`, so
+concurrent first uses are serialized by the import lock) and forwards all
+attribute reads and writes to it.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Module proxy importing `name` on first use"""
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+
+    def _module(self):
+        # import_module czeka, jeśli inny wątek właśnie importuje ten moduł
+        return importlib.import_module(self._name)
+
+    def __getattr__(self, attr):
+        return getattr(self._module(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._module(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._module(), attr)
+
+    def __dir__(self):
+        return dir(self._module())
+
+    def __repr__(self):
+        state = 'loaded' if self._name in sys.modules else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    """Return `name` if it is already imported, otherwise a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
@@ -1,6 +1,7 @@
 """
 Scheduled tasks for weather alerts and notifications.
 Runs daily to send emails to users about rainy cities.
+Also keeps NBP economics data fresh in the background.
 """
 import os
 from datetime import datetime, timezone, timedelta
@@ -14,6 +15,7 @@ from modules.weather_app import (
     DEFAULT_LAT,
     DEFAULT_LON,
 )
+from modules.ekonomia import refresher
 
 logger = logging.getLogger(__name__)
 
@@ -113,6 +115,20 @@ def init_scheduler(app):
         timezone="Europe/Warsaw",  # Poland timezone; adjust if needed
     )
     
+    # NBP data refresh: first check right after start, then periodically.
+    # refresher uses a file lock, so only one worker downloads at a time.
+    scheduler.add_job(
+        func=refresher.run_scheduled_refresh,
+        trigger="interval",
+        minutes=refresher.CHECK_INTERVAL_MINUTES,
+        next_run_time=datetime.now(),
+        id="nbp_refresh",
+        name="Background refresh of NBP exchange rates and gold prices",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    
     try:
         scheduler.start()
         logger.info("✓ Scheduler started successfully")
@@ -6,10 +6,6 @@ from flask import jsonify
 
 
 import requests
-import matplotlib
-matplotlib.use("Agg")  # backend bez GUI
-import matplotlib.pyplot as plt
-import numpy as np
 
 import smtplib
 from email.mime.text import MIMEText
@@ -18,12 +14,15 @@ from flask import Blueprint, request, jsonify, render_template, send_file, abort
 from dotenv import load_dotenv
 from modules.database import Favorite
 from modules.auth import api_login_required
+from modules.chart_renderer import renderer, RenderError
+from modules.cache import BoundedCache, SingleFlight, SQLiteStore, DEFAULT_NAMESPACE
+from modules import geocoding, gazetteer
 
 # Globalna lista wysłanych e-maili dla testów
 sent_emails = []
-import time
-from threading import Lock
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from modules.database import User
 
 
@@ -36,32 +35,179 @@ password = os.environ.get("EMAIL_PASSW")
 
 weather_bp = Blueprint('weather', __name__)
 
-# Prosty lokalny cache dla wyników zapytań do OpenWeather
-# Klucz: string, wartość: (timestamp_seconds, data)
-# in-memory cache for OpenWeather responses
-_OW_CACHE = {}
-# lock to protect cache in multi-threaded environments
-_OW_CACHE_LOCK = Lock()
-# TTL cache w sekundach
+# Cache odpowiedzi OpenWeather w procesie (modules.cache): LRU z limitem
+# wpisów i bajtów, wygasłe wpisy usuwa też wątek w tle
+_OW_CACHE_MAX_ENTRIES = 2048
+_OW_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_OW_CACHE = BoundedCache('openweather', max_entries=_OW_CACHE_MAX_ENTRIES, max_bytes=_OW_CACHE_MAX_BYTES)
+# domyślny TTL cache w sekundach (miękki: do tego wieku wpis jest świeży);
+# prognozy dostają TTL wyliczony z harmonogramu aktualizacji OpenWeather (adaptive_ttl)
 _OW_CACHE_TTL = 60  # 1 minuta
+# co ile sekund OpenWeather przelicza produkt (cykle wyrównane do północy UTC)
+_OW_UPDATE_INTERVAL = {"daily": 6 * 3600, "hourly": 3 * 3600}
+# dolna i górna granica wyliczonego TTL per produkt (sekundy)
+_OW_TTL_BOUNDS = {"daily": (15 * 60, 3 * 3600), "hourly": (5 * 60, 3 * 3600)}
+# przez tyle sekund po miękkim TTL wpis jest zwracany od razu, a odświeżany w tle
+_OW_REVALIDATE_WINDOW = 540  # 9 minut
+# jak długo trzymamy ostatnią poprawną odpowiedź na wypadek błędów OpenWeather
+_OW_STALE_MAX_AGE = 6 * 3600
+# po błędzie OpenWeather przez tyle sekund podajemy nieaktualny wpis bez ponawiania zapytania
+_OW_ERROR_BACKOFF = 30
+# wspólny cache (L2) dla wszystkich workerów węzła, przed nim cache procesu (L1):
+# "sqlite" (plik WEATHER_CACHE_PATH) albo "none"
+_OW_SHARED_BACKEND = os.environ.get("WEATHER_CACHE_BACKEND", "sqlite").lower()
+_OW_SHARED_PATH = os.environ.get(
+    "WEATHER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "weather.sqlite"),
+)
+# jedno zapytanie do OpenWeather na klucz naraz - pozostałe wątki czekają na jego wynik
+_OW_FLIGHTS = SingleFlight()
+# odświeżanie wpisów między miękkim a twardym TTL
+_OW_REFRESH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ow-refresh")
+# oczko siatki kluczy cache w stopniach (0.01° ≈ 1.1 km): ulubione, wyniki
+# geokodowania i kliknięcia na mapie w tym samym miejscu trafiają w ten sam wpis
+_OW_GRID_DEG = float(os.environ.get("WEATHER_CACHE_GRID_DEG", 0.01))
+# prognoza dzienna jest zawsze pobierana na tyle dni - mniejsze cnt są wycinane z tego samego wpisu
+_DAILY_FETCH_CNT = 7
+
+
+def _cache_namespace(key):
+    # "daily:..." / "hourly:..." - osobne liczniki trafień dla każdego produktu
+    return key.split(':', 1)[0] if ':' in key else DEFAULT_NAMESPACE
+
+
+def quantize_coords(lat: float, lon: float, grid: float = None):
+    """Współrzędne zaokrąglone do środka oczka siatki (klucz cache i parametry zapytania)."""
+    grid = grid or _OW_GRID_DEG
+    return round(round(lat / grid) * grid, 6), round(round(lon / grid) * grid, 6)
+
+
+def _make_shared_cache(backend=None, path=None):
+    """Backend wspólnego cache (L2) według WEATHER_CACHE_BACKEND albo None."""
+    backend = (backend or _OW_SHARED_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteStore(path or _OW_SHARED_PATH)
+    if backend not in ("none", "memory", ""):
+        logger.warning("Unknown WEATHER_CACHE_BACKEND %r - shared forecast cache disabled", backend)
+    return None
+
+
+# połączenie z plikiem nawiązywane dopiero przy pierwszym użyciu
+_OW_SHARED = _make_shared_cache()
+
+
+def _cache_record(key):
+    """Wpis z cache razem z czasem pobrania: {"ts": ..., "data": ...} albo None.
+
+    Gdy wpisu w L1 brak albo minął jego miękki TTL, zaglądamy do wspólnego
+    cache - inny worker mógł już pobrać nowszą prognozę.
+    """
+    namespace = _cache_namespace(key)
+    rec = _OW_CACHE.get(key, namespace)
+    if _OW_SHARED is not None and (rec is None or time.time() - rec["ts"] > _soft_ttl(rec)):
+        shared = _OW_SHARED.get(key)
+        if shared is not None and (rec is None or shared["ts"] > rec["ts"]):
+            rec = shared
+            _OW_CACHE.set(key, rec, namespace, ttl=max(0, _OW_STALE_MAX_AGE - (time.time() - rec["ts"])))
+    return rec
+
+def _soft_ttl(rec):
+    return rec.get("ttl") or _OW_CACHE_TTL
 
 def _cache_get(key):
-    with _OW_CACHE_LOCK:
-        rec = _OW_CACHE.get(key)
-        if not rec:
-            return None
-        ts, data = rec
-        if time.time() - ts > _OW_CACHE_TTL:
-            try:
-                del _OW_CACHE[key]
-            except KeyError:
-                pass
-            return None
-        return data
+    """Świeża (młodsza niż jej miękki TTL) wartość z cache albo None."""
+    rec = _cache_record(key)
+    if rec is None or time.time() - rec["ts"] > _soft_ttl(rec):
+        return None
+    return rec["data"]
+
+def _cache_set(key, data, ttl=None):
+    # miękki TTL zapisany we wpisie; sam wpis przeżywa go o _OW_STALE_MAX_AGE,
+    # żeby przy awarii OpenWeather było co podać
+    rec = {"ts": time.time(), "data": data, "ttl": ttl or _OW_CACHE_TTL}
+    _OW_CACHE.set(key, rec, _cache_namespace(key), ttl=_OW_STALE_MAX_AGE)
+    if _OW_SHARED is not None:
+        _OW_SHARED.set(key, rec, ttl=_OW_STALE_MAX_AGE)
+
+
+def adaptive_ttl(product: str, data: dict, now: float = None) -> int:
+    """Miękki TTL odpowiedzi OpenWeather: czas do najbliższej aktualizacji danych.
+
+    Granica to początek następnego cyklu przeliczeń produktu
+    (_OW_UPDATE_INTERVAL), a dodatkowo dla prognozy 3-godzinnej pierwszy
+    przyszły termin z odpowiedzi, dla dziennej - lokalna północ miasta (wtedy
+    zmienia się "dziś"). Wynik jest przycinany do _OW_TTL_BOUNDS.
+    """
+    now = time.time() if now is None else now
+    interval = _OW_UPDATE_INTERVAL.get(product)
+    if not interval:
+        return _OW_CACHE_TTL
+    expires = (now // interval + 1) * interval
+    if product == "hourly":
+        upcoming = [item["dt"] for item in data.get("list") or [] if (item.get("dt") or 0) > now]
+        if upcoming:
+            expires = min(expires, min(upcoming))
+    elif product == "daily":
+        offset = (data.get("city") or {}).get("timezone") or 0
+        expires = min(expires, ((now + offset) // 86400 + 1) * 86400 - offset)
+    low, high = _OW_TTL_BOUNDS[product]
+    return int(min(max(expires - now, low), high))
+
+
+def _refresh_in_background(flight_key, load):
+    """Odśwież wpis w tle (raz na klucz); błędy tylko logujemy."""
+    if flight_key in _OW_FLIGHTS:
+        return None
+
+    def refresh():
+        try:
+            _OW_FLIGHTS.do(flight_key, load)
+        except Exception as e:
+            logger.warning("OpenWeather refresh of %s failed: %s", flight_key, e)
+
+    return _OW_REFRESH_POOL.submit(refresh)
+
 
-def _cache_set(key, data):
-    with _OW_CACHE_LOCK:
-        _OW_CACHE[key] = (time.time(), data)
+def _cached_fetch(key, load, flight_key=None, usable=None):
+    """Wartość dla `key` z cache z miękkim i twardym TTL.
+
+    - wiek <= miękki TTL wpisu: wartość z cache,
+    - do _OW_REVALIDATE_WINDOW sekund dłużej: wartość z cache + odświeżenie w tle,
+    - starszy wpis lub brak: zapytanie `load()` (single-flight); gdy
+      OpenWeather zawiedzie, zwracana jest ostatnia poprawna wartość.
+
+    `usable(value)` odrzuca wpisy, które nie pasują do zapytania. Zwraca
+    (wartość, wiek w sekundach jeśli wartość jest nieaktualna, inaczej None).
+    """
+    flight_key = flight_key or key
+    rec = _cache_record(key)
+    if rec is not None and usable is not None and not usable(rec["data"]):
+        rec = None
+    if rec is not None:
+        age = time.time() - rec["ts"]
+        if age <= _soft_ttl(rec):
+            return rec["data"], None
+        if age <= _soft_ttl(rec) + _OW_REVALIDATE_WINDOW:
+            _refresh_in_background(flight_key, load)
+            return rec["data"], None
+        if time.time() - rec.get("failed", 0) < _OW_ERROR_BACKOFF:
+            return rec["data"], age
+
+    try:
+        return _OW_FLIGHTS.do(flight_key, load), None
+    except (requests.RequestException, ValueError) as e:
+        if rec is None:
+            raise
+        logger.warning("OpenWeather unavailable, serving stale %s: %s", key, e)
+        rec["failed"] = time.time()
+        return rec["data"], time.time() - rec["ts"]
+
+
+def _mark_stale(data: dict, age):
+    """Kopia odpowiedzi z flagą nieaktualności (stale, age_seconds) albo sama odpowiedź."""
+    if age is None:
+        return data
+    return dict(data, stale=True, age_seconds=int(age))
 
 
 # ======================= WYSYŁANIE MAILI =======================
@@ -203,27 +349,19 @@ def get_api_key():
 
 # ======================= FUNKCJE DO PROGNOZY 7-DNIOWEJ =======================
 
-def fetch_daily_forecast(lat: float, lon: float, cnt: int = 7, units: str = "metric") -> dict:
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "appid": get_api_key(),
-        "cnt": cnt,
-        "units": units,
-        "lang": "pl",
-    }
-    # Spróbuj pobrać z cache
-    key = f"daily:{lat}:{lon}:{cnt}:{units}"
-    cached = _cache_get(key)
-    if cached is not None:
-        return cached
+def _trim_daily(data: dict, cnt: int) -> dict:
+    """Pierwsze `cnt` dni prognozy (kopia - wpis w cache zostaje nietknięty)."""
+    days = data.get("list", [])
+    if len(days) <= cnt:
+        return data
+    return dict(data, list=days[:cnt], cnt=cnt)
+
 
+def _request_openweather(url: str, params: dict) -> dict:
+    """GET do OpenWeather; błędy HTTP z treścią odpowiedzi w komunikacie."""
+    resp = requests.get(url, params=params, timeout=10)
     try:
-        resp = requests.get(DAILY_URL, params=params, timeout=10)
         resp.raise_for_status()
-        data = resp.json()
-        _cache_set(key, data)
-        return data
     except requests.HTTPError as e:
         body = None
         try:
@@ -231,8 +369,34 @@ def fetch_daily_forecast(lat: float, lon: float, cnt: int = 7, units: str = "met
         except Exception:
             body = None
         raise requests.HTTPError(f"HTTP {resp.status_code} from OpenWeather: {body}") from e
-    except requests.RequestException as e:
-        raise
+    return resp.json()
+
+
+def fetch_daily_forecast(lat: float, lon: float, cnt: int = 7, units: str = "metric") -> dict:
+    # klucz i zapytanie na siatce współrzędnych; pobieramy co najmniej _DAILY_FETCH_CNT dni,
+    # żeby jeden wpis obsłużył wszystkie mniejsze cnt
+    lat, lon = quantize_coords(lat, lon)
+    fetch_cnt = max(cnt, _DAILY_FETCH_CNT)
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": get_api_key(),
+        "cnt": fetch_cnt,
+        "units": units,
+        "lang": "pl",
+    }
+    # wpis w cache: liczba pobranych dni + surowa odpowiedź
+    key = f"daily:{lat}:{lon}:{units}"
+
+    def load():
+        entry = {"cnt": fetch_cnt, "data": _request_openweather(DAILY_URL, params)}
+        _cache_set(key, entry, ttl=adaptive_ttl("daily", entry["data"]))
+        return entry
+
+    # równoległe zapytania o ten sam wpis czekają na jedno wywołanie OpenWeather
+    entry, stale_age = _cached_fetch(key, load, flight_key=f"{key}:{fetch_cnt}",
+                                     usable=lambda e: e["cnt"] >= cnt)
+    return _mark_stale(_trim_daily(entry["data"], cnt), stale_age)
 
 
 def normalize_forecast(raw: dict) -> dict:
@@ -286,6 +450,7 @@ def fetch_hourly_forecast(lat: float, lon: float, units: str = "metric") -> dict
     5-dniowa prognoza co 3h.
     Zwracamy surowy JSON z /data/2.5/forecast
     """
+    lat, lon = quantize_coords(lat, lon)
     params = {
         "lat": lat,
         "lon": lon,
@@ -294,25 +459,15 @@ def fetch_hourly_forecast(lat: float, lon: float, units: str = "metric") -> dict
     }
     # Cache results briefly to avoid repeated external calls when user refreshuje
     key = f"hourly:{lat}:{lon}:{units}"
-    cached = _cache_get(key)
-    if cached is not None:
-        return cached
 
-    try:
-        resp = requests.get(HOURLY_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        _cache_set(key, data)
+    def load():
+        data = _request_openweather(HOURLY_URL, params)
+        _cache_set(key, data, ttl=adaptive_ttl("hourly", data))
         return data
-    except requests.HTTPError as e:
-        body = None
-        try:
-            body = resp.text
-        except Exception:
-            body = None
-        raise requests.HTTPError(f"HTTP {resp.status_code} from OpenWeather: {body}") from e
-    except requests.RequestException:
-        raise
+
+    # /api/hourly i /plot.png dla tego samego miejsca współdzielą jedno zapytanie
+    data, stale_age = _cached_fetch(key, load)
+    return _mark_stale(data, stale_age)
 
 
 def get_hourly_window(lat: float, lon: float, day_offset: int = 0):
@@ -406,6 +561,10 @@ def api_forecast():
     try:
         raw = fetch_daily_forecast(lat, lon, cnt=7, units="metric")
         data = normalize_forecast(raw)
+        if raw.get("stale"):
+            # OpenWeather niedostępne - ostatnia poprawna prognoza
+            data["stale"] = True
+            data["age_seconds"] = raw.get("age_seconds")
         if label:
             data["city"] = label 
         else:
@@ -430,12 +589,25 @@ def api_forecast():
 
 @weather_bp.get("/api/geocode")
 def api_geocode():
-    """GET /api/geocode?q=Kraków – wyszukiwanie miasta."""
+    """GET /api/geocode?q=Kraków – wyszukiwanie miasta.
+
+    Najpierw wbudowany spis miejscowości w Polsce (modules.gazetteer, dokładna
+    nazwa), potem trwały cache w bazie (modules.geocoding: dokładne zapytanie,
+    potem prefiks znanych nazw), do OpenWeather trafiają tylko nowe nazwy.
+    """
     q = request.args.get("q", "").strip()
     if not q:
         return jsonify({"error": "Brak parametru q"}), 400
 
-    params = {"q": q, "appid": get_api_key(), "limit": 5}
+    local = gazetteer.get().lookup(q, limit=geocoding.RESULT_LIMIT)
+    if local:
+        return jsonify(local)
+
+    cached = geocoding.lookup(q)
+    if cached is not None:
+        return jsonify(cached)
+
+    params = {"q": q, "appid": get_api_key(), "limit": geocoding.RESULT_LIMIT}
     try:
         resp = requests.get(GEOCODE_URL, params=params, timeout=10)
         try:
@@ -448,13 +620,29 @@ def api_geocode():
             except Exception:
                 body = None
             return jsonify({"error": "Błąd geokodowania", "status": resp.status_code, "details": str(e), "response": body}), 502
-        return jsonify(resp.json())
+        results = resp.json()
+        geocoding.store(q, results)
+        return jsonify(results)
     except requests.RequestException as e:
         return jsonify({"error": "Błąd sieci podczas geokodowania", "details": str(e)}), 502
     except Exception as e:
         return jsonify({"error": "Błąd backendu", "details": str(e)}), 500
 
 
+@weather_bp.get("/api/autocomplete")
+def api_autocomplete():
+    """GET /api/autocomplete?q=krak&limit=8 – podpowiedzi miejscowości w Polsce (bez zapytań do OpenWeather)."""
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "Brak parametru q"}), 400
+    try:
+        limit = int(request.args.get("limit", gazetteer.AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        return jsonify({"error": "Parametr limit musi być liczbą"}), 400
+    limit = max(1, min(limit, gazetteer.AUTOCOMPLETE_MAX_LIMIT))
+    return jsonify(gazetteer.get().complete(q, limit))
+
+
 # --------- API: ulubione miasta (GET/POST/DELETE) ---------
 @weather_bp.get("/api/favorites")
 @api_login_required
@@ -563,7 +751,10 @@ def api_hourly():
                 "precip_mm": p.get("precip_mm"),
             })
 
-        return jsonify({"points": out, "tz_offset": tz_offset})
+        result = {"points": out, "tz_offset": tz_offset}
+        if raw.get("stale"):
+            result.update(stale=True, age_seconds=raw.get("age_seconds"))
+        return jsonify(result)
     except requests.HTTPError as e:
         body = None
         try:
@@ -627,70 +818,14 @@ def plot_png():
        temps.append(p["temp"])
        precip.append(p["precip_mm"])
 
-    # --- STYL WYKRESU (bardziej estetyczny) ---
-    fig, ax1 = plt.subplots(figsize=(8.0, 3.2), dpi=160)
-
-    # lekkie ustawienia czcionki
-    plt.rcParams.update({"font.family": "sans-serif", "font.size": 10})
-
-    # tło przezroczyste i wyłącz górne/prawe spiny
-    fig.patch.set_alpha(0)
-    ax1.set_facecolor("none")
-    for spine in ["top", "right"]:
-        ax1.spines[spine].set_visible(False)
-
-    # Przygotuj dane X jako indeksy (ułatwia interpolację)
-    x = np.arange(len(temps))
-    temps_arr = np.array([np.nan if t is None else t for t in temps], dtype=float)
-    # interpoluj ewentualne braki
-    if np.isnan(temps_arr).any():
-        nans = np.isnan(temps_arr)
-        good = ~nans
-        if good.sum() >= 2:
-            temps_arr[nans] = np.interp(x[nans], x[good], temps_arr[good])
-        else:
-            temps_arr[nans] = 0.0
-
-    # wygładź krzywą liniową (interpolacja) dla estetyki
-    xp = np.linspace(x.min(), x.max(), max(200, len(x) * 50))
-    temps_smooth = np.interp(xp, x, temps_arr)
-
-    # Kolory
-    temp_color = "#2B7A78"  # teal
-    precip_color = "#8AA24A"  # łagodny oliwkowy
-
-    # narysuj gładką linię temperatury i znaczniki punktów (bez wypełnienia)
-    ax1.plot(xp, temps_smooth, color=temp_color, linewidth=2.2, zorder=3)
-    ax1.scatter(x, temps_arr, s=26, color=temp_color, edgecolor="white", zorder=4)
-
-    # Oś X: etykiety godzin, pokazuj co drugi jeśli jest ich dużo
-    ax1.set_xticks(x)
-    if len(labels) > 8:
-        display_labels = [lbl if i % 2 == 0 else "" for i, lbl in enumerate(labels)]
-    else:
-        display_labels = labels
-    ax1.set_xticklabels(display_labels, rotation=0)
-
-    ax1.set_ylabel("Temperatura [°C]", color=temp_color)
-    ax1.tick_params(axis="y", labelcolor=temp_color)
-    ax1.grid(axis="y", linestyle="--", linewidth=0.6, color="#E9E9E9")
-
-    # opady jako cienkie słupki na tle, poniżej linii
-    ax2 = ax1.twinx()
-    precip_vals = [0.0 if p is None else p for p in precip]
-    ax2.bar(x, precip_vals, color=precip_color, alpha=0.65, width=0.5, zorder=1)
-    ax2.set_ylim(0, max(max(precip_vals) * 1.6, 1.0))
-    ax2.set_ylabel("Opady [mm]", color=precip_color)
-    ax2.tick_params(axis="y", labelcolor=precip_color)
-
-    fig.tight_layout(pad=0.6)
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", transparent=True)
-    plt.close(fig)
-    buf.seek(0)
+    # wykres rysuje pula procesów renderujących (chart_renderer), wątek żądania tylko czeka na PNG
+    try:
+        png = renderer.render("weather", {"labels": labels, "temps": temps, "precip": precip})
+    except RenderError as e:
+        logger.warning("Nie udało się wygenerować wykresu: %s", e)
+        abort(503)
 
-    return send_file(buf, mimetype="image/png")
+    return send_file(io.BytesIO(png), mimetype="image/png")
 
 
 # --------- TEST ENDPOINT: wysłanie maila testowego ---------
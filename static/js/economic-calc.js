@@ -164,38 +164,113 @@
         compute();
     }
 
+    // Charts drawn in the browser from /ekonomia/api/series/<name>
+    const SVG_NS = "http://www.w3.org/2000/svg";
+    const CHART_WIDTH = 600;
+    const CHART_HEIGHT = 300;
+    const CHART_PAD = { top: 30, right: 15, bottom: 30, left: 60 };
+    const CHART_COLOR = "#6c7c40";
+    const CHART_TEXT = "#2B370A";
+
+    function svgEl(name, attrs, text) {
+        const el = document.createElementNS(SVG_NS, name);
+        Object.entries(attrs || {}).forEach(([k, v]) => el.setAttribute(k, v));
+        if (text !== undefined) el.textContent = text;
+        return el;
+    }
+
+    function chartTitle(name) {
+        return name === "gold"
+            ? "Cena złota (PLN/oz) - widok w skali roku"
+            : `${name} - Widok w skali roku`;
+    }
+
+    function renderSeriesChart(container, data) {
+        const svg = svgEl("svg", {
+            viewBox: `0 0 ${CHART_WIDTH} ${CHART_HEIGHT}`,
+            preserveAspectRatio: "none",
+        });
+        svg.appendChild(
+            svgEl("text", { x: CHART_WIDTH / 2, y: 20, "text-anchor": "middle", fill: CHART_TEXT, "font-size": 14 },
+                chartTitle(data.name))
+        );
+
+        const values = data.values || [];
+        if (values.length === 0) {
+            svg.appendChild(
+                svgEl("text", { x: CHART_WIDTH / 2, y: CHART_HEIGHT / 2, "text-anchor": "middle", fill: CHART_TEXT, "font-size": 20 },
+                    "Brak danych")
+            );
+            container.replaceChildren(svg);
+            return;
+        }
+
+        const times = data.dates.map((d) => Date.parse(d));
+        const minT = times[0];
+        const spanT = times[times.length - 1] - minT || 1;
+        const minV = Math.min(...values);
+        const maxV = Math.max(...values);
+        const spanV = maxV - minV || 1;
+        const plotW = CHART_WIDTH - CHART_PAD.left - CHART_PAD.right;
+        const plotH = CHART_HEIGHT - CHART_PAD.top - CHART_PAD.bottom;
+
+        const points = values.map((v, i) => {
+            const x = CHART_PAD.left + ((times[i] - minT) / spanT) * plotW;
+            const y = CHART_PAD.top + (1 - (v - minV) / spanV) * plotH;
+            return `${x.toFixed(1)},${y.toFixed(1)}`;
+        });
+        svg.appendChild(
+            svgEl("polyline", { points: points.join(" "), fill: "none", stroke: CHART_COLOR, "stroke-width": 2 })
+        );
+
+        const labels = [
+            [CHART_PAD.left - 5, CHART_PAD.top + 5, "end", maxV.toFixed(2)],
+            [CHART_PAD.left - 5, CHART_PAD.top + plotH, "end", minV.toFixed(2)],
+            [CHART_PAD.left, CHART_HEIGHT - 8, "start", data.dates[0]],
+            [CHART_WIDTH - CHART_PAD.right, CHART_HEIGHT - 8, "end", data.dates[data.dates.length - 1]],
+        ];
+        labels.forEach(([x, y, anchor, text]) =>
+            svg.appendChild(svgEl("text", { x, y, "text-anchor": anchor, fill: "white", "font-size": 12 }, text))
+        );
+        container.replaceChildren(svg);
+    }
+
+    function loadSeriesChart(container, name) {
+        container.style.opacity = "0.5";
+        const points = Math.max(50, Math.round(container.clientWidth || CHART_WIDTH));
+        // widok w skali roku (starsza historia dostępna przez parametr start)
+        const start = new Date(Date.now() - 365 * 24 * 3600 * 1000).toISOString().slice(0, 10);
+        return fetch(`/ekonomia/api/series/${encodeURIComponent(name)}?points=${points}&start=${start}`)
+            .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
+                container.style.opacity = "1";
+                if (!ok) {
+                    alert(data.error || `Brak danych dla waluty ${name}`);
+                    return;
+                }
+                container.dataset.series = name;
+                renderSeriesChart(container, data);
+            })
+            .catch((error) => {
+                console.error("Error loading chart:", error);
+                alert("Błąd podczas ładowania wykresu");
+                container.style.opacity = "1";
+            });
+    }
+
     // Dynamic currency chart loading
     function setupChartLoader() {
+        document.querySelectorAll(".series-chart[data-series]").forEach((el) =>
+            loadSeriesChart(el, el.dataset.series)
+        );
+
         const toEl = document.getElementById("currency-to");
-        const chartImg = document.querySelector(".currency-chart");
+        const chart = document.querySelector(".currency-chart");
 
-        if (!toEl || !chartImg) return;
+        if (!toEl || !chart) return;
 
         toEl.addEventListener("change", function () {
-            const currency = toEl.value;
-
-            // Show loading state
-            chartImg.style.opacity = "0.5";
-
-            // Fetch new chart
-            fetch(`/ekonomia/chart/${currency}`)
-                .then((response) => response.json())
-                .then((data) => {
-                    if (data.success && data.chart) {
-                        chartImg.src = `data:image/png;base64,${data.chart}`;
-                        chartImg.style.opacity = "1";
-                    } else {
-                        alert(
-                            data.message || `Brak danych dla waluty ${currency}`
-                        );
-                        chartImg.style.opacity = "1";
-                    }
-                })
-                .catch((error) => {
-                    console.error("Error loading chart:", error);
-                    alert("Błąd podczas ładowania wykresu");
-                    chartImg.style.opacity = "1";
-                });
+            loadSeriesChart(chart, toEl.value);
         });
     }
 
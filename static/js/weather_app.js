@@ -456,6 +456,30 @@ function setupSearch() {
 };
   btn.addEventListener("click", runSearch);
 
+  // podpowiedzi z lokalnego spisu miejscowości (/api/autocomplete, bez OpenWeather)
+  const suggestions = $("#citySuggestions");
+  let suggestTimer = null;
+  input.addEventListener("input", () => {
+    clearTimeout(suggestTimer);
+    const q = input.value.trim();
+    if (!suggestions || q.length < 2) return;
+    suggestTimer = setTimeout(async () => {
+      try {
+        const res = await fetch(`/weather/api/autocomplete?q=${encodeURIComponent(q)}`);
+        if (!res.ok) return;
+        const places = await res.json();
+        suggestions.replaceChildren(...places.map((place) => {
+          const opt = document.createElement("option");
+          opt.value = place.name;
+          opt.label = place.state || "";
+          return opt;
+        }));
+      } catch (e) {
+        console.warn("Autocomplete failed", e);
+      }
+    }, 150);
+  });
+
   input.addEventListener("keydown", (e) => {
     if (e.key === "Enter") {
       runSearch();
@@ -40,4 +40,4 @@ def test_anonymous_user_views_gold_price(page: Page, e2e_server):
 
     # AND: widzi wykres ceny złota (w skali roku)
     expect(page.locator("h2:has-text('skali roku')")).to_be_visible()
-    expect(page.locator("img.gold-chart")).to_be_visible()
+    expect(page.locator(".gold-chart svg polyline")).to_be_attached()
@@ -10,7 +10,7 @@ Wymagania:
     - Widzi wykres walut (domyślnie EUR)
     - Zmienia walutę i sprawdza czy wykres się zmienia
     - Widzi wykres złota w skali roku
-    - Wykresy są obrazkami (base64 PNG)
+    - Wykresy są rysowane w przeglądarce (SVG z /ekonomia/api/series)
     - Użycie expect(...) z Playwright
     - Struktura Given / When / Then
 """
@@ -36,12 +36,12 @@ def test_user_views_currency_trend_charts(page: Page, e2e_server):
     # ============================================================================
     # THEN: widzi główny wykres walut (domyślnie EUR)
     # ============================================================================
-    currency_chart = page.locator("img.currency-chart")
+    currency_chart = page.locator(".currency-chart")
     expect(currency_chart).to_be_visible()
 
-    # AND: wykres zawiera dane w formacie base64 (obraz PNG)
-    chart_src = currency_chart.get_attribute("src")
-    assert "data:image/png;base64," in chart_src, "Wykres powinien być obrazkiem PNG w base64"
+    # AND: wykres jest narysowany jako SVG z danych serii EUR
+    expect(currency_chart.locator("svg polyline")).to_be_attached()
+    expect(currency_chart).to_have_attribute("data-series", "EUR")
 
     # ============================================================================
     # AND: zmienia walutę docelową na USD
@@ -50,12 +50,9 @@ def test_user_views_currency_trend_charts(page: Page, e2e_server):
     currency_to_select.select_option("USD")
     page.wait_for_timeout(500)
 
-    # THEN: wykres się zmienia (nowe src dla USD)
-    new_chart_src = currency_chart.get_attribute("src")
-    expect(currency_chart).to_be_visible()
-    
-    # Nowy wykres powinien również zawierać base64 data
-    assert "data:image/png;base64," in new_chart_src, "Nowy wykres powinien być obrazkiem"
+    # THEN: wykres się zmienia (seria USD)
+    expect(currency_chart).to_have_attribute("data-series", "USD")
+    expect(currency_chart.locator("svg text").first).to_contain_text("USD")
 
 
     # ============================================================================
@@ -67,10 +64,8 @@ def test_user_views_currency_trend_charts(page: Page, e2e_server):
     # ============================================================================
     # AND: widzi wykres ceny złota w skali roku
     # ============================================================================
-    gold_chart = page.locator("img.gold-chart")
+    gold_chart = page.locator(".gold-chart")
     expect(gold_chart).to_be_visible()
 
-    # AND: wykres złota też zawiera dane base64
-    gold_chart_src = gold_chart.get_attribute("src")
-    assert "data:image/png;base64," in gold_chart_src, "Wykres złota powinien być obrazkiem PNG"
-
+    # AND: wykres złota też jest narysowany jako SVG
+    expect(gold_chart.locator("svg polyline")).to_be_attached()
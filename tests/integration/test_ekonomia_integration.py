@@ -5,6 +5,7 @@ Testują współpracę endpointów Flask z logiką biznesową i bazą danych
 
 import pytest
 import json
+from datetime import date
 from unittest.mock import patch
 from modules.database import db, User, FavoriteCurrency
 
@@ -25,6 +26,15 @@ class TestEkonomiaIntegration:
             # Sprawdź, czy strona zawiera podstawowe elementy modułu ekonomia
             assert b'ekonomia' in response.data.lower() or b'waluty' in response.data.lower()
 
+    def test_ekonomia_main_page_does_not_refresh_inline(self, client):
+        """Test strony ekonomii - aktualizacja NBP nie jest wykonywana w trakcie requestu"""
+        with patch('modules.ekonomia.ekonomia.Manager'), \
+             patch('modules.ekonomia.fetch_nbp.run_update') as mock_update:
+            response = client.get('/ekonomia')
+
+            assert response.status_code == 200
+            mock_update.assert_not_called()
+
     def test_ekonomia_api_exchange_rates_returns_json(self, client):
         """Test API kursów walut - zwraca JSON z listą walut"""
         with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
@@ -77,6 +87,243 @@ class TestEkonomiaIntegration:
                 assert isinstance(data['chart'], str)  # Base64 encoded image
                 assert data['chart'] == 'base64_encoded_image_data'
 
+    def test_ekonomia_chart_endpoint_sets_etag_and_returns_304(self, client):
+        """Test ETag wykresu - ponowne zapytanie z If-None-Match zwraca 304 bez renderowania"""
+        with patch('modules.ekonomia.ekonomia._render_currency_plot') as mock_render:
+            mock_render.return_value = 'base64_encoded_image_data'
+
+            response = client.get('/ekonomia/chart/EUR')
+            etag = response.headers.get('ETag')
+
+            assert response.status_code == 200
+            assert etag and not etag.startswith('W/')
+
+            response = client.get('/ekonomia/chart/EUR', headers={'If-None-Match': etag})
+
+            assert response.status_code == 304
+            assert response.headers.get('ETag') == etag
+            mock_render.assert_called_once()
+
+    def test_ekonomia_chart_endpoint_reuses_cached_render(self, client):
+        """Test cache wykresów - drugi request bez ETag nie renderuje ponownie"""
+        with patch('modules.ekonomia.ekonomia._render_currency_plot') as mock_render:
+            mock_render.return_value = 'base64_encoded_image_data'
+
+            first = client.get('/ekonomia/chart/EUR').get_json()
+            second = client.get('/ekonomia/chart/EUR').get_json()
+
+            assert first['chart'] == second['chart'] == 'base64_encoded_image_data'
+            mock_render.assert_called_once()
+
+    def test_ekonomia_chart_endpoint_gold(self, client):
+        """Test wykresu złota przez endpoint wykresów"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            mock_manager.return_value.create_plot_image.return_value = 'gold_chart'
+
+            response = client.get('/ekonomia/chart/gold')
+
+            assert response.status_code == 200
+            assert response.get_json()['chart'] == 'gold_chart'
+            assert response.headers.get('ETag')
+
+    @pytest.fixture
+    def local_store(self, tmp_path, monkeypatch):
+        """Podmienia magazyn historii kursów na katalog tymczasowy"""
+        from modules.ekonomia import timeseries
+        for code, rates in (('EUR', [4.25, 4.26, 4.27]), ('USD', [3.90, 3.95, 4.00])):
+            records = [{"effectiveDate": f"2025-01-0{i + 2}", "mid": r} for i, r in enumerate(rates)]
+            (tmp_path / f'{code}.json').write_text(json.dumps(records))
+        monkeypatch.setattr(timeseries, 'store', timeseries.TimeSeriesStore(str(tmp_path)))
+
+    def test_gold_endpoint_reads_local_series(self, client, tmp_path, local_store):
+        """Test ceny złota z lokalnej serii - bez zapytania do NBP, z wiekiem danych"""
+        (tmp_path / 'gold.json').write_text(json.dumps([
+            {"date": "2025-01-02", "price": 11000.0}, {"date": "2025-01-03", "price": 11050.5}]))
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            response = client.get('/ekonomia/api/gold')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['price'] == 11050.5
+        assert data['date'] == '2025-01-03'
+        assert data['source'] == 'local'
+        assert data['stale'] is True
+        assert data['age_days'] == (date.today() - date(2025, 1, 3)).days
+        mock_manager.assert_not_called()
+        assert client.get('/ekonomia/api/gold', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    def test_gold_endpoint_falls_back_to_nbp(self, client, local_store):
+        """Test ceny złota bez lokalnej historii - notowanie z NBP"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            mock_manager.return_value.gold.get_current_price.return_value = 12345.678
+            data = client.get('/ekonomia/api/gold').get_json()
+
+        assert data['price'] == 12345.68
+        assert data['source'] == 'nbp'
+        assert data['date'] is None
+
+    def test_gold_endpoint_without_any_data(self, client, local_store):
+        """Test braku ceny złota (brak historii i NBP niedostępne)"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            mock_manager.return_value.gold.get_current_price.return_value = None
+            assert client.get('/ekonomia/api/gold').status_code == 503
+
+    def test_stats_endpoint_returns_rolling_windows(self, client, local_store):
+        """Test statystyk kroczących jednej serii (7/30/90 dni) z ETagiem"""
+        response = client.get('/ekonomia/api/stats/eur')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['name'] == 'EUR'
+        assert data['as_of'] == '2025-01-04'
+        assert set(data['windows']) == {'7d', '30d', '90d'}
+        assert data['windows']['7d']['max'] == 4.27
+        assert client.get('/ekonomia/api/stats/eur', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        assert client.get('/ekonomia/api/stats/XYZ').status_code == 404
+
+    def test_stats_batch_endpoint(self, client, local_store):
+        """Test statystyk wielu serii naraz"""
+        data = client.get('/ekonomia/api/stats?codes=EUR,usd,XYZ').get_json()
+
+        assert set(data['stats']) == {'EUR', 'USD'}
+        assert data['stats']['USD']['windows']['30d']['min'] == 3.90
+        assert data['missing'] == ['XYZ']
+
+    def test_stats_batch_endpoint_rejects_invalid_codes(self, client, local_store):
+        """Test odrzucenia nazw spoza kodów walut i `gold` (np. ścieżek) przed odczytem statystyk"""
+        with patch('modules.ekonomia.analytics.get_stats') as mock_get_stats:
+            response = client.get('/ekonomia/api/stats?codes=EUR,../../XX')
+
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+        mock_get_stats.assert_not_called()
+
+    def test_exchange_rates_query_latest_batch(self, client, local_store):
+        """Test zapytania zbiorczego - najnowsze kursy wielu walut bez wywołań NBP"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            response = client.get('/ekonomia/api/exchange-rates/query?codes=eur,USD,XYZ')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['rates']['EUR'] == [{'date': '2025-01-04', 'rate': 4.27}]
+        assert data['rates']['USD'] == [{'date': '2025-01-04', 'rate': 4.00}]
+        assert data['missing'] == ['XYZ']
+        mock_manager.assert_not_called()
+
+    def test_exchange_rates_query_on_dates(self, client, local_store):
+        """Test kursów na wybrane dni (kurs obowiązujący w danym dniu)"""
+        response = client.get('/ekonomia/api/exchange-rates/query?codes=EUR,PLN&date=2025-01-01,2025-01-03,2025-01-10')
+
+        data = response.get_json()
+        assert data['rates']['EUR'] == [
+            {'date': '2025-01-03', 'rate': 4.26, 'requested': '2025-01-03'},
+            {'date': '2025-01-04', 'rate': 4.27, 'requested': '2025-01-10'},
+        ]
+        assert [p['rate'] for p in data['rates']['PLN']] == [1.0, 1.0, 1.0]
+
+    def test_exchange_rates_query_range(self, client, local_store):
+        """Test kursów z zakresu dat"""
+        response = client.get('/ekonomia/api/exchange-rates/query?codes=USD&start=2025-01-03&end=2025-01-04')
+
+        assert [p['rate'] for p in response.get_json()['rates']['USD']] == [3.95, 4.00]
+
+    @pytest.mark.parametrize('query', [
+        'codes=EUR&date=2025-13-01',
+        'codes=EUR&date=2025-01-01&start=2025-01-01',
+        'codes=EUR&start=2025-02-01&end=2025-01-01',
+    ])
+    def test_exchange_rates_query_rejects_bad_params(self, client, local_store, query):
+        """Test walidacji parametrów zapytania zbiorczego"""
+        response = client.get(f'/ekonomia/api/exchange-rates/query?{query}')
+
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+    @pytest.mark.parametrize('codes', ['../../XX', 'EUR,../secret', 'EURO', 'E%00R'])
+    def test_exchange_rates_query_rejects_invalid_codes(self, client, local_store, codes):
+        """Test odrzucenia kodów spoza ISO 4217 (np. ścieżek) przed odczytem serii"""
+        with patch('modules.ekonomia.timeseries.get_series') as mock_get_series:
+            response = client.get(f'/ekonomia/api/exchange-rates/query?codes={codes}')
+
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+        mock_get_series.assert_not_called()
+
+    def test_series_endpoint_returns_compact_columns(self, client, local_store):
+        """Test danych do wykresu - kolumny dat i wartości z nagłówkami cache"""
+        response = client.get('/ekonomia/api/series/eur')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['name'] == 'EUR'
+        assert data['dates'] == ['2025-01-02', '2025-01-03', '2025-01-04']
+        assert data['values'] == [4.25, 4.26, 4.27]
+        assert response.headers.get('ETag')
+        assert 'max-age' in response.headers.get('Cache-Control')
+
+    def test_series_endpoint_downsamples_and_returns_304(self, client, local_store):
+        """Test redukcji liczby punktów i zapytania warunkowego"""
+        first = client.get('/ekonomia/api/series/USD?points=2')
+        assert first.get_json()['dates'] == ['2025-01-02', '2025-01-04']
+
+        second = client.get('/ekonomia/api/series/USD?points=2',
+                            headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+
+    def test_series_endpoint_long_range_reads_coarse_tier(self, client, tmp_path, monkeypatch):
+        """Test długiego zakresu - dane z agregatów OHLC zamiast notowań dziennych"""
+        from modules.ekonomia import storage, timeseries
+        base = tmp_path / 'EUR.json'
+        base.write_text(json.dumps([{"effectiveDate": "2025-01-02", "mid": 4.25}]))
+        older = [{"effectiveDate": f"20{y:02d}-{m:02d}-15", "mid": 4.0 + y / 100}
+                 for y in range(16, 25) for m in range(1, 13)]
+        storage.update_tiers(str(base), older, 'effectiveDate', 'mid')
+        monkeypatch.setattr(timeseries, 'store', timeseries.TimeSeriesStore(str(tmp_path)))
+
+        data = client.get('/ekonomia/api/series/EUR?start=2016-01-01&points=2000').get_json()
+
+        assert data['resolution'] == 'weekly'
+        assert len(data['dates']) == len(older)
+        assert data['high'][0] == 4.16
+        assert client.get('/ekonomia/api/series/EUR?resolution=yearly').status_code == 400
+
+    def test_series_endpoint_unknown_series(self, client, local_store):
+        """Test danych do wykresu dla nieznanej serii"""
+        assert client.get('/ekonomia/api/series/XYZ').status_code == 404
+        assert client.get('/ekonomia/api/series/EUR?points=abc').status_code == 400
+
+    def test_cross_rates_endpoint_returns_matrix(self, client):
+        """Test macierzy kursów krzyżowych - liczona raz na wersję tabel"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            currencies = mock_manager.return_value.currencies
+            currencies.get_tables_version.return_value = (('a', '001/A/NBP/2025'),)
+            currencies.get_current_rates.return_value = {'eur': 4.0, 'usd': 3.2}
+
+            response = client.get('/ekonomia/api/cross-rates')
+            again = client.get('/ekonomia/api/cross-rates',
+                               headers={'If-None-Match': response.headers['ETag']})
+
+        data = response.get_json()
+        assert data['codes'] == ['EUR', 'PLN', 'USD']
+        assert data['matrix'][0][2] == 1.25
+        assert again.status_code == 304
+        currencies.get_current_rates.assert_called_once()
+
+    def test_convert_endpoint_batch(self, client):
+        """Test zbiorczego przeliczania kwot"""
+        with patch('modules.ekonomia.ekonomia.Manager') as mock_manager:
+            currencies = mock_manager.return_value.currencies
+            currencies.get_tables_version.return_value = (('a', '001/A/NBP/2025'),)
+            currencies.get_current_rates.return_value = {'eur': 4.0, 'usd': 3.2}
+
+            ok = client.get('/ekonomia/api/convert?amount=100,10,1&from=EUR&to=PLN,USD,EUR')
+            unknown = client.get('/ekonomia/api/convert?amount=1&from=XYZ&to=PLN')
+            mismatch = client.get('/ekonomia/api/convert?amount=1,2&from=EUR,USD,PLN&to=PLN')
+
+        assert ok.get_json()['results'] == [400.0, 12.5, 1.0]
+        assert unknown.status_code == 400
+        assert mismatch.status_code == 400
+
     def test_favorite_currencies_get_requires_authentication(self, client):
         """Test GET ulubionych walut - wymaga autentyfikacji"""
         response = client.get('/ekonomia/api/favorite-currencies', 
@@ -70,6 +70,29 @@ def test_api_forecast_openweather_http_error_returns_502(client, monkeypatch):
     assert r.get_json()["error"] == "Błąd OpenWeather"
 
 
+def test_api_forecast_serves_stale_when_openweather_fails(client, monkeypatch):
+    monkeypatch.setattr(wa, "get_api_key", lambda: "TESTKEY")
+    now = [1_000_000.0]
+    monkeypatch.setattr(wa.time, "time", lambda: now[0])
+    fake_daily = {
+        "city": {"name": "Kraków", "coord": {"lat": 50.0, "lon": 19.0}, "timezone": 0},
+        "list": [{"dt": 1700000000, "temp": {"min": 1, "max": 4, "day": 2}, "weather": [{}]}],
+    }
+    responses = [DummyResp(200, payload=fake_daily), DummyResp(500, text="down")]
+    monkeypatch.setattr(wa.requests, "get", lambda url, params=None, timeout=None: responses.pop(0))
+
+    assert client.get("/weather/api/forecast?lat=50&lon=19").status_code == 200
+    age = wa._cache_record("daily:50.0:19.0:metric")["ttl"] + wa._OW_REVALIDATE_WINDOW + 1
+    now[0] += age
+    r = client.get("/weather/api/forecast?lat=50&lon=19")
+
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data["stale"] is True
+    assert data["age_seconds"] == age
+    assert data["days"][0]["t_max"] == 4
+
+
 # ----------------------------
 # /weather/api/geocode
 # ----------------------------
@@ -97,6 +120,41 @@ def test_api_geocode_ok(client, monkeypatch):
     assert r.get_json()[0]["name"] == "Kraków"
 
 
+def test_api_geocode_polish_town_served_from_gazetteer(client, monkeypatch):
+    def fake_get(url, params=None, timeout=None):
+        raise AssertionError("OpenWeather nie powinno być odpytywane")
+
+    monkeypatch.setattr(wa.requests, "get", fake_get)
+
+    r = client.get("/weather/api/geocode?q=nowy sacz")
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data[0]["name"] == "Nowy Sącz"
+    assert data[0]["country"] == "PL"
+    assert 49 < data[0]["lat"] < 50
+
+
+def test_api_geocode_repeated_and_partial_queries_served_from_cache(client, monkeypatch):
+    monkeypatch.setattr(wa, "get_api_key", lambda: "TESTKEY")
+
+    fake_geo = [{"name": "Lviv", "local_names": {"pl": "Lwów"}, "lat": 49.84, "lon": 24.03, "country": "UA"}]
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(params["q"])
+        return DummyResp(200, payload=fake_geo)
+
+    monkeypatch.setattr(wa.requests, "get", fake_get)
+
+    assert client.get("/weather/api/geocode?q=Lwów").get_json() == fake_geo
+    assert client.get("/weather/api/geocode?q=LWOW").get_json() == fake_geo
+    assert client.get("/weather/api/geocode?q=Lvi").get_json() == fake_geo
+    assert calls == ["Lwów"]
+
+    client.get("/weather/api/geocode?q=Berlin")
+    assert calls == ["Lwów", "Berlin"]
+
+
 def test_api_geocode_http_error_returns_502(client, monkeypatch):
     monkeypatch.setattr(wa, "get_api_key", lambda: "TESTKEY")
 
@@ -105,12 +163,41 @@ def test_api_geocode_http_error_returns_502(client, monkeypatch):
 
     monkeypatch.setattr(wa.requests, "get", fake_get)
 
-    r = client.get("/weather/api/geocode?q=Krakow")
+    # miasto spoza wbudowanego spisu miejscowości - trafia do OpenWeather
+    r = client.get("/weather/api/geocode?q=Berlin")
     assert r.status_code == 502
     assert r.is_json
     assert r.get_json()["error"] == "Błąd geokodowania"
 
 
+# ----------------------------
+# /weather/api/autocomplete
+# ----------------------------
+
+def test_api_autocomplete_requires_q(client):
+    r = client.get("/weather/api/autocomplete?q=")
+    assert r.status_code == 400
+    assert r.is_json
+
+
+def test_api_autocomplete_prefix(client, monkeypatch):
+    def fake_get(url, params=None, timeout=None):
+        raise AssertionError("OpenWeather nie powinno być odpytywane")
+
+    monkeypatch.setattr(wa.requests, "get", fake_get)
+
+    r = client.get("/weather/api/autocomplete?q=nowy&limit=3")
+    assert r.status_code == 200
+    data = r.get_json()
+    assert len(data) == 3
+    assert data[0]["name"] == "Nowy Sącz"
+
+
+def test_api_autocomplete_invalid_limit(client):
+    r = client.get("/weather/api/autocomplete?q=krak&limit=abc")
+    assert r.status_code == 400
+
+
 # ----------------------------
 # /weather/api/hourly
 # ----------------------------
@@ -0,0 +1,80 @@
+"""
+Benchmark startu aplikacji: czas zimnego importu i create_app() oraz RSS procesu.
+
+Każdy pomiar uruchamiany jest w osobnym, świeżym interpreterze (zimny start).
+Wyniki trafiają do raportu junit (record_property) i na stdout, dzięki czemu
+można je śledzić między wersjami. Ręcznie:
+
+    python tests/performance/test_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# moduły, których sam start aplikacji nie powinien ładować
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib')
+
+MEASURE = r'''
+import json, sys, time
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+start = time.perf_counter()
+from app import create_app
+from config import TestingConfig
+imported = time.perf_counter()
+create_app(TestingConfig)
+ready = time.perf_counter()
+
+print(json.dumps({
+    'import_s': round(imported - start, 4),
+    'create_app_s': round(ready - start, 4),
+    'rss_kb': rss_kb(),
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+''' % (HEAVY_MODULES,)
+
+
+def measure_startup():
+    """Cold start of a fresh interpreter: import + create_app() times, RSS, heavy modules loaded"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, '-c', MEASURE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=120, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture(scope='module')
+def startup():
+    return measure_startup()
+
+
+def test_create_app_does_not_import_heavy_modules(startup):
+    assert startup['loaded'] == []
+
+
+def test_record_startup_benchmark(startup, record_property):
+    for key in ('import_s', 'create_app_s', 'rss_kb'):
+        record_property(f'startup_{key}', startup[key])
+    print(f"\nstartup: {json.dumps(startup)}")
+
+    assert startup['create_app_s'] > 0
+    assert startup['rss_kb'] > 0
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure_startup(), indent=2))
@@ -0,0 +1,103 @@
+"""
+Testy jednostkowe dla modułu analytics (statystyki kroczące serii NBP)
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import analytics, storage
+from modules.ekonomia.timeseries import TimeSeriesStore
+
+
+def daily(start, values):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + len(values))
+    return dates, np.array(values, dtype=float)
+
+
+class TestCompute:
+    """Testy obliczania statystyk dla okien 7/30/90 dni"""
+
+    def test_windows_cover_last_days(self):
+        dates, values = daily('2025-01-01', np.arange(1, 101))
+
+        stats = analytics.compute('EUR', dates, values)
+
+        assert stats['as_of'] == '2025-04-10'
+        assert stats['last'] == 100.0
+        week = stats['windows']['7d']
+        assert week['points'] == 7
+        assert week['mean'] == 97.0
+        assert (week['min'], week['min_date']) == (94.0, '2025-04-04')
+        assert (week['max'], week['max_date']) == (100.0, '2025-04-10')
+        assert stats['windows']['90d']['points'] == 90
+
+    def test_volatility_and_change(self):
+        dates, values = daily('2025-01-01', [4.0, 4.4, 4.0, 4.4, 4.0, 4.4, 4.0])
+
+        week = analytics.compute('EUR', dates, values)['windows']['7d']
+
+        returns = np.diff(np.log(values))
+        assert week['volatility'] == pytest.approx(returns.std(ddof=1) * 100, abs=1e-4)
+        assert week['change_pct'] == 0.0
+
+    def test_gaps_use_calendar_days(self):
+        dates = np.array(['2025-01-01', '2025-01-20', '2025-01-28'], dtype='datetime64[D]')
+
+        stats = analytics.compute('EUR', dates, [4.0, 4.1, 4.2])
+
+        assert stats['windows']['7d']['points'] == 1
+        assert stats['windows']['7d']['volatility'] is None
+        assert stats['windows']['30d']['points'] == 3
+
+    def test_empty_series(self):
+        assert analytics.compute('EUR', [], []) is None
+
+
+class TestStoredStats:
+    """Testy zapisu statystyk przy aktualizacji i ich odczytu"""
+
+    def test_update_writes_stats_next_to_series(self, tmp_path):
+        path = str(tmp_path / 'EUR.json')
+        storage.append_records(path, [{"effectiveDate": "2025-01-02", "mid": 4.2},
+                                      {"effectiveDate": "2025-01-03", "mid": 4.3}])
+
+        analytics.update(path, 'effectiveDate', 'mid')
+
+        with open(storage.stats_path(path)) as f:
+            stored = json.load(f)
+        assert stored['name'] == 'EUR'
+        assert stored['windows']['7d']['max'] == 4.3
+
+    def test_get_stats_reads_stored_values(self, tmp_path):
+        path = str(tmp_path / 'gold.json')
+        storage.append_records(path, [{"date": "2025-01-02", "price": 11000.0}])
+        analytics.update(path, 'date', 'price')
+        stored = json.loads(open(storage.stats_path(path)).read())
+        stored['marker'] = True
+        storage.write_stats(path, stored)
+
+        stats = analytics.get_stats('GOLD', TimeSeriesStore(str(tmp_path)))
+
+        assert stats['name'] == 'gold'
+        assert stats['marker'] is True
+
+    def test_get_stats_computes_when_stored_is_outdated(self, tmp_path):
+        path = str(tmp_path / 'EUR.json')
+        storage.append_records(path, [{"effectiveDate": "2025-01-02", "mid": 4.2}])
+        analytics.update(path, 'effectiveDate', 'mid')
+        # nowe notowanie zapisane bez przeliczenia statystyk
+        storage.append_records(path, [{"effectiveDate": "2025-01-03", "mid": 4.4}])
+
+        stats = analytics.get_stats('eur', TimeSeriesStore(str(tmp_path)))
+
+        assert stats['as_of'] == '2025-01-03'
+        assert stats['windows']['7d']['mean'] == pytest.approx(4.3)
+
+    def test_get_stats_without_data(self, tmp_path):
+        assert analytics.get_stats('EUR', TimeSeriesStore(str(tmp_path))) is None
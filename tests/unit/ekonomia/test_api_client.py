@@ -10,7 +10,17 @@ import requests
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from modules.ekonomia.klasy_api_obsluga.APIClient import APIClient
+from modules.ekonomia.klasy_api_obsluga import APIClient as api_client_module
+from modules.ekonomia.klasy_api_obsluga.APIClient import APIClient, DEFAULT_TIMEOUT
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep_and_clean_validators():
+    """Bez czekania między ponowieniami i bez zapamiętanych ETagów między testami"""
+    api_client_module._validators.clear()
+    with patch('modules.ekonomia.klasy_api_obsluga.APIClient.time.sleep'):
+        yield
+    api_client_module._validators.clear()
 
 
 class TestAPIClient:
@@ -27,12 +37,13 @@ class TestAPIClient:
         client = APIClient(base_url=custom_url)
         assert client.base_url == custom_url
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_success(self, mock_get):
         """Test pomyślnego pobrania danych JSON"""
         # Przygotowanie mock response
         mock_response = Mock()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {"data": "test"}
         mock_get.return_value = mock_response
 
@@ -40,13 +51,16 @@ class TestAPIClient:
         result = client.get_json("https://api.nbp.pl/api/test")
 
         assert result == {"data": "test"}
-        mock_get.assert_called_once_with("https://api.nbp.pl/api/test", params=None)
+        mock_get.assert_called_once_with("https://api.nbp.pl/api/test", params=None, headers={}, timeout=DEFAULT_TIMEOUT)
+        # bez ETag / Last-Modified nie ma czego zapamiętać
+        assert not api_client_module._validators
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_with_params(self, mock_get):
         """Test pobrania danych z parametrami"""
         mock_response = Mock()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = {"data": "test"}
         mock_get.return_value = mock_response
 
@@ -55,9 +69,9 @@ class TestAPIClient:
         result = client.get_json("https://api.nbp.pl/api/test", params=params)
 
         assert result == {"data": "test"}
-        mock_get.assert_called_once_with("https://api.nbp.pl/api/test", params=params)
+        mock_get.assert_called_once_with("https://api.nbp.pl/api/test", params=params, headers={}, timeout=DEFAULT_TIMEOUT)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_request_exception(self, mock_get):
         """Test obsługi wyjątku RequestException"""
         mock_get.side_effect = requests.exceptions.RequestException("Connection error")
@@ -67,10 +81,11 @@ class TestAPIClient:
 
         assert result is None
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_http_error(self, mock_get):
         """Test obsługi błędu HTTP (404, 500, etc.)"""
         mock_response = Mock()
+        mock_response.headers = {}
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found")
         mock_get.return_value = mock_response
 
@@ -79,7 +94,7 @@ class TestAPIClient:
 
         assert result is None
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_timeout(self, mock_get):
         """Test obsługi timeoutu"""
         mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
@@ -88,3 +103,76 @@ class TestAPIClient:
         result = client.get_json("https://api.nbp.pl/api/test")
 
         assert result is None
+
+    def test_clients_share_pooled_session(self):
+        """Test wspólnej sesji (keep-alive) dla wszystkich klientów"""
+        assert APIClient().session is APIClient().session
+
+    @patch('requests.Session.get')
+    def test_get_json_retries_connection_error(self, mock_get):
+        """Test ponowienia po błędzie połączenia"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = {"data": "ok"}
+        mock_get.side_effect = [requests.exceptions.ConnectionError("reset"), mock_response]
+
+        client = APIClient(retries=2)
+        result = client.get_json("https://api.nbp.pl/api/test")
+
+        assert result == {"data": "ok"}
+        assert mock_get.call_count == 2
+
+    @patch('requests.Session.get')
+    def test_get_json_retries_server_error_then_gives_up(self, mock_get):
+        """Test ponawiania błędów 5xx - po wyczerpaniu prób zwraca None"""
+        mock_response = Mock()
+        mock_response.status_code = 503
+        mock_response.headers = {}
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("503")
+        mock_get.return_value = mock_response
+
+        client = APIClient(retries=2)
+        result = client.get_json("https://api.nbp.pl/api/test")
+
+        assert result is None
+        assert mock_get.call_count == 3
+
+    @patch('requests.Session.get')
+    def test_get_json_does_not_retry_client_error(self, mock_get):
+        """Test braku ponowień dla 404"""
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_response.headers = {}
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        mock_get.return_value = mock_response
+
+        result = APIClient(retries=2).get_json("https://api.nbp.pl/api/test")
+
+        assert result is None
+        assert mock_get.call_count == 1
+
+    @patch('requests.Session.get')
+    def test_get_json_conditional_request_uses_cached_data_on_304(self, mock_get):
+        """Test zapytania warunkowego - 304 zwraca wcześniej pobrane dane"""
+        first = Mock()
+        first.status_code = 200
+        first.headers = {"ETag": '"abc"', "Last-Modified": "Mon, 05 Jan 2026 12:00:00 GMT"}
+        first.json.return_value = {"data": "cached"}
+        second = Mock()
+        second.status_code = 304
+        second.headers = {}
+        mock_get.side_effect = [first, second]
+
+        client = APIClient()
+        assert client.get_json("https://api.nbp.pl/api/test") == {"data": "cached"}
+        assert client.get_json("https://api.nbp.pl/api/test") == {"data": "cached"}
+
+        headers = mock_get.call_args_list[1].kwargs['headers']
+        assert headers["If-None-Match"] == '"abc"'
+        assert headers["If-Modified-Since"] == "Mon, 05 Jan 2026 12:00:00 GMT"
+
+    def test_custom_timeout(self):
+        """Test konfigurowalnych timeoutów (connect, read)"""
+        client = APIClient(timeout=(1, 2))
+        assert client.timeout == (1, 2)
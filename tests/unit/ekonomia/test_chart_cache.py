@@ -0,0 +1,62 @@
+"""
+Testy jednostkowe dla klasy ChartCache
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia.chart_cache import ChartCache
+
+
+class TestChartCache:
+    """Testy dla klasy ChartCache"""
+
+    def test_get_or_render_renders_once(self):
+        """Test renderowania tylko przy braku wpisu"""
+        cache = ChartCache(max_entries=4)
+        render = Mock(return_value='png')
+
+        assert cache.get_or_render(('currency', 'EUR', (1, 1), '#fff'), render) == 'png'
+        assert cache.get_or_render(('currency', 'EUR', (1, 1), '#fff'), render) == 'png'
+        render.assert_called_once()
+
+    def test_new_data_version_is_a_miss(self):
+        """Test nowej wersji danych - wymusza ponowne renderowanie"""
+        cache = ChartCache(max_entries=4)
+        render = Mock(side_effect=['old', 'new'])
+
+        cache.get_or_render(('currency', 'EUR', (1, 1), '#fff'), render)
+        result = cache.get_or_render(('currency', 'EUR', (2, 1), '#fff'), render)
+
+        assert result == 'new'
+        assert render.call_count == 2
+
+    def test_lru_eviction(self):
+        """Test usuwania najdawniej używanego wpisu po przekroczeniu limitu"""
+        cache = ChartCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+
+    def test_etag_is_deterministic(self):
+        """Test ETag - ten sam klucz daje ten sam ETag, inny klucz inny"""
+        key = ('gold', (1, 1), '#6c7c40')
+
+        assert ChartCache.etag_for(key) == ChartCache.etag_for(key)
+        assert ChartCache.etag_for(key) != ChartCache.etag_for(('gold', (2, 1), '#6c7c40'))
+
+    def test_clear(self):
+        """Test czyszczenia cache"""
+        cache = ChartCache()
+        cache.put('a', 1)
+        cache.clear()
+        assert len(cache) == 0
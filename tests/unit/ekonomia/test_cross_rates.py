@@ -0,0 +1,79 @@
+"""
+Testy jednostkowe dla modułu cross_rates (macierz kursów krzyżowych)
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import cross_rates
+
+
+def make_currencies(version=(("a", "001/A/NBP/2025"),), rates=None):
+    currencies = Mock()
+    currencies.get_tables_version.return_value = version
+    currencies.get_current_rates.return_value = rates or {"eur": 4.0, "usd": 3.2}
+    return currencies
+
+
+class TestBuild:
+    """Testy budowania macierzy"""
+
+    def test_matrix_is_cross_of_pln_rates(self):
+        cross = cross_rates.build({"eur": 4.0, "usd": 3.2})
+
+        assert cross.codes == ("EUR", "PLN", "USD")
+        assert cross.rate("EUR", "USD") == pytest.approx(1.25)
+        assert cross.rate("PLN", "EUR") == pytest.approx(0.25)
+        assert np.allclose(np.diag(cross.matrix), 1.0)
+        assert not cross.matrix.flags.writeable
+
+    def test_pln_rates(self):
+        cross = cross_rates.build({"eur": 4.0})
+
+        assert cross.pln_rates == {"EUR": 4.0, "PLN": 1.0}
+
+    def test_convert_is_vectorized_and_broadcasts(self):
+        cross = cross_rates.build({"eur": 4.0, "usd": 3.2})
+
+        result = cross.convert([100, 10], ["EUR", "usd"], ["PLN", "EUR"])
+
+        assert result.tolist() == pytest.approx([400.0, 8.0])
+
+    def test_unknown_code_raises_key_error(self):
+        cross = cross_rates.build({"eur": 4.0})
+
+        with pytest.raises(KeyError, match="XYZ"):
+            cross.convert([1], ["XYZ"], ["PLN"])
+
+
+class TestGetCrossRates:
+    """Testy współdzielonej macierzy"""
+
+    def test_built_once_per_table_version(self):
+        currencies = make_currencies()
+
+        first = cross_rates.get_cross_rates(currencies)
+        second = cross_rates.get_cross_rates(currencies)
+
+        assert first is second
+        currencies.get_current_rates.assert_called_once()
+
+    def test_rebuilt_when_version_changes(self):
+        first = cross_rates.get_cross_rates(make_currencies())
+        second = cross_rates.get_cross_rates(make_currencies(version=(("a", "002/A/NBP/2025"),)))
+
+        assert first is not second
+
+    def test_not_cached_without_version(self):
+        currencies = make_currencies(version=())
+
+        cross_rates.get_cross_rates(currencies)
+        cross_rates.get_cross_rates(currencies)
+
+        assert currencies.get_current_rates.call_count == 2
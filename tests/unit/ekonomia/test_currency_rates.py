@@ -175,3 +175,37 @@ class TestCurrencyRates:
         assert result == {"eur": 4.25, "usd": 4.00}
         assert hasattr(rates, 'rates')
         assert rates.rates == {"eur": 4.25, "usd": 4.00}
+
+    def test_table_shared_between_rates_and_list(self):
+        """Test wspólnego cache - kursy i lista walut korzystają z jednej pobranej tabeli"""
+        mock_data = [{"effectiveDate": "2099-01-01", "rates": [{"code": "EUR", "mid": 4.25}]}]
+        self.mock_client.get_json.return_value = mock_data
+
+        CurrencyRates(self.mock_client, tables=["a"]).get_current_rates()
+        CurrencyRates(self.mock_client, tables=["a"]).get_currency_list()
+
+        self.mock_client.get_json.assert_called_once()
+
+    def test_update_bypasses_cache(self):
+        """Test metody update - zawsze pobiera świeże dane"""
+        self.mock_client.get_json.side_effect = [
+            [{"rates": [{"code": "EUR", "mid": 4.25}]}],
+            [{"rates": [{"code": "EUR", "mid": 4.30}]}],
+        ]
+
+        rates = CurrencyRates(self.mock_client, tables=["a"])
+        rates.get_current_rates()
+
+        assert rates.update() == {"eur": 4.30}
+
+    def test_get_tables_version(self):
+        """Test wersji tabel - numery tabel NBP, pusta krotka bez danych"""
+        self.mock_client.get_json.side_effect = [
+            [{"no": "001/A/NBP/2099", "rates": []}],
+            None,
+        ]
+
+        rates = CurrencyRates(self.mock_client, tables=["a", "b"])
+
+        assert rates.get_tables_version() == (("a", "001/A/NBP/2099"),)
+
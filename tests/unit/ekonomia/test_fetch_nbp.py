@@ -17,7 +17,7 @@ from modules.ekonomia import fetch_nbp
 class TestFetchNBP:
     """Testy dla modułu fetch_nbp"""
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_get_daily_currencies_success(self, mock_get):
         """Test pomyślnego pobrania listy walut"""
         mock_response = Mock()
@@ -41,7 +41,7 @@ class TestFetchNBP:
 
         assert codes == ["EUR", "USD"]
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_get_daily_currencies_error(self, mock_get):
         """Test obsługi błędu przy pobieraniu walut"""
         mock_response = Mock()
@@ -56,7 +56,7 @@ class TestFetchNBP:
         
         assert codes == []
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_nbprates_success(self, mock_get):
         """Test pomyślnego pobrania kursów waluty"""
         mock_response = Mock()
@@ -75,11 +75,11 @@ class TestFetchNBP:
         assert isinstance(rates, list)
         assert len(rates) >= 0  # Może być filtrowane przez daty
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_nbprates_filters_old_dates(self, mock_get):
-        """Test filtrowania starych dat (sprzed roku)"""
+        """Test filtrowania dat sprzed synchronizowanej historii (HISTORY_YEARS)"""
         today = datetime.today()
-        old_date = (today - timedelta(days=400)).strftime('%Y-%m-%d')
+        old_date = (today - timedelta(days=366 * (fetch_nbp.HISTORY_YEARS + 1))).strftime('%Y-%m-%d')
         recent_date = (today - timedelta(days=10)).strftime('%Y-%m-%d')
 
         mock_response = Mock()
@@ -95,12 +95,9 @@ class TestFetchNBP:
         rates = fetch_nbp.fetch_nbprates("EUR")
 
         # Powinien być tylko recent_date
-        assert all(
-            datetime.strptime(r['effectiveDate'], '%Y-%m-%d') >= (datetime.today() - timedelta(days=365))
-            for r in rates
-        )
+        assert [r['effectiveDate'] for r in rates] == [recent_date]
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_nbprates_removes_duplicates(self, mock_get):
         """Test usuwania duplikatów dat"""
         mock_response = Mock()
@@ -120,7 +117,7 @@ class TestFetchNBP:
         dates = [r['effectiveDate'] for r in rates]
         assert len(dates) == len(set(dates))
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_nbprates_error_handling(self, mock_get):
         """Test obsługi błędów HTTP"""
         mock_response = Mock()
@@ -131,7 +128,7 @@ class TestFetchNBP:
 
         assert isinstance(rates, list)
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_gold_success(self, mock_get):
         """Test pomyślnego pobrania cen złota"""
         mock_response = Mock()
@@ -149,59 +146,122 @@ class TestFetchNBP:
         assert gold_data[0] == {"date": "2025-01-01", "price": 250.50}
         assert gold_data[1] == {"date": "2025-01-02", "price": 251.00}
 
-    @patch('modules.ekonomia.fetch_nbp.requests.get')
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
     def test_fetch_gold_error(self, mock_get):
         """Test obsługi błędu przy pobieraniu złota"""
         mock_response = Mock()
         mock_response.status_code = 500
         mock_get.return_value = mock_response
 
-        gold_data = fetch_nbp.fetch_gold()
+        with pytest.raises(fetch_nbp.requests.exceptions.HTTPError):
+            fetch_nbp.fetch_gold()
 
-        assert gold_data == []
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_gold_error_midway_returns_no_partial_data(self, mock_get):
+        """Test błędu w trakcie pobierania złota - brak częściowych wyników"""
+        ok = Mock(status_code=200)
+        ok.json.return_value = [{"data": "2016-01-04", "cena": 120.0}]
+        mock_get.side_effect = [ok, fetch_nbp.requests.exceptions.ConnectionError("reset")]
 
-    @patch('builtins.open', new_callable=mock_open, read_data='[]')
-    @patch('os.path.exists', return_value=True)
-    def test_update_json_adds_new_records(self, mock_exists, mock_file):
-        """Test dodawania nowych rekordów do JSON"""
-        new_data = [
-            {"effectiveDate": "2025-01-03", "mid": 4.27}
-        ]
+        with pytest.raises(fetch_nbp.requests.exceptions.ConnectionError):
+            fetch_nbp.fetch_gold()
+
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_nbprates_server_error_raises(self, mock_get):
+        """Test błędu serwera NBP w jednym z okresów - wyjątek zamiast pustej listy"""
+        mock_get.return_value = Mock(status_code=503)
+        since = datetime.today() - timedelta(days=3)
+
+        with pytest.raises(fetch_nbp.requests.exceptions.HTTPError):
+            fetch_nbp.fetch_nbprates("EUR", since=since)
+
+    def test_update_json_adds_new_records(self, tmp_path):
+        """Test dodawania nowych rekordów do serii"""
+        path = str(tmp_path / "EUR.json")
+        fetch_nbp.update_json(path, [{"effectiveDate": "2099-01-01", "mid": 4.25}], "effectiveDate")
 
-        fetch_nbp.update_json("test.json", new_data, "effectiveDate")
+        added = fetch_nbp.update_json(path, [{"effectiveDate": "2099-01-03", "mid": 4.27}], "effectiveDate")
 
-        # Sprawdź czy plik został otwarty
-        mock_file.assert_called()
+        assert added == 1
+        dates = [r["effectiveDate"] for r in fetch_nbp.storage.read_records(path)]
+        assert dates == ["2099-01-01", "2099-01-03"]
 
-    @patch('builtins.open', new_callable=mock_open, read_data='[{"effectiveDate": "2025-01-01", "mid": 4.25}]')
-    @patch('os.path.exists', return_value=True)
-    def test_update_json_skips_duplicates(self, mock_exists, mock_file):
+    def test_update_json_skips_duplicates(self, tmp_path):
         """Test pomijania duplikatów przy aktualizacji"""
-        new_data = [
-            {"effectiveDate": "2025-01-01", "mid": 4.25}  # duplikat
-        ]
+        path = str(tmp_path / "EUR.json")
+        fetch_nbp.update_json(path, [{"effectiveDate": "2099-01-01", "mid": 4.25}], "effectiveDate")
 
-        fetch_nbp.update_json("test.json", new_data, "effectiveDate")
+        added = fetch_nbp.update_json(path, [{"effectiveDate": "2099-01-01", "mid": 4.25}], "effectiveDate")
 
-        mock_file.assert_called()
+        assert added == 0
+        assert len(fetch_nbp.storage.read_records(path)) == 1
 
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('os.path.exists', return_value=False)
-    def test_update_json_creates_new_file(self, mock_exists, mock_file):
-        """Test tworzenia nowego pliku jeśli nie istnieje"""
-        new_data = [
-            {"effectiveDate": "2025-01-01", "mid": 4.25}
-        ]
+    def test_update_json_creates_new_file(self, tmp_path):
+        """Test tworzenia nowego pliku (od razu jako skompaktowana baza JSON)"""
+        path = tmp_path / "NEW.json"
+
+        fetch_nbp.update_json(str(path), [{"effectiveDate": "2099-01-01", "mid": 4.25}], "effectiveDate")
+
+        assert json.loads(path.read_text()) == [{"effectiveDate": "2099-01-01", "mid": 4.25}]
+        assert not (tmp_path / "NEW.jsonl").exists()
+
+    def test_update_json_appends_then_compacts(self, tmp_path, monkeypatch):
+        """Test dopisywania do segmentu i kompaktowania z obcięciem starej historii"""
+        monkeypatch.setattr(fetch_nbp.storage, "COMPACT_EVERY", 2)
+        path = tmp_path / "EUR.json"
+        old = (datetime.today() - timedelta(days=fetch_nbp.DAILY_RETENTION_DAYS + 30)).strftime('%Y-%m-%d')
+        fetch_nbp.update_json(str(path), [{"effectiveDate": old, "mid": 4.0}], "effectiveDate")
 
-        fetch_nbp.update_json("new_file.json", new_data, "effectiveDate")
+        fetch_nbp.update_json(str(path), [{"effectiveDate": "2099-01-01", "mid": 4.1}], "effectiveDate")
+        assert (tmp_path / "EUR.jsonl").exists()
+        base_before = path.read_text()
 
-        mock_file.assert_called()
+        fetch_nbp.update_json(str(path), [{"effectiveDate": "2099-01-02", "mid": 4.2}], "effectiveDate")
 
+        assert path.read_text() != base_before
+        assert not (tmp_path / "EUR.jsonl").exists()
+        assert [r["effectiveDate"] for r in json.loads(path.read_text())] == ["2099-01-01", "2099-01-02"]
+        # obcięte notowanie zostaje w agregatach miesięcznych
+        monthly = json.loads((tmp_path / "ohlc" / "EUR.monthly.json").read_text())
+        assert monthly[0]["first"] == old
+        # statystyki kroczące przeliczone po zapisie
+        stats = json.loads((tmp_path / "ohlc" / "EUR.stats.json").read_text())
+        assert stats["as_of"] == "2099-01-02"
+        assert stats["windows"]["7d"]["points"] == 2
+
+    def test_update_json_backfills_older_records(self, tmp_path):
+        """Test uzupełniania starszej historii - trafia do bazy i agregatów"""
+        path = tmp_path / "EUR.json"
+        recent = (datetime.today() - timedelta(days=5)).strftime('%Y-%m-%d')
+        older = (datetime.today() - timedelta(days=40)).strftime('%Y-%m-%d')
+        fetch_nbp.update_json(str(path), [{"effectiveDate": recent, "mid": 4.3}], "effectiveDate")
+
+        added = fetch_nbp.update_json(str(path), [{"effectiveDate": older, "mid": 4.1}], "effectiveDate")
+
+        assert added == 0
+        assert [r["effectiveDate"] for r in json.loads(path.read_text())] == [older, recent]
+
+    def test_backfill_until_uses_history_marker(self, tmp_path):
+        """Test znacznika historii - uzupełnianie tylko raz"""
+        path = str(tmp_path / "EUR.json")
+        since = datetime(2025, 1, 3)
+        history_from = fetch_nbp.history_start()
+
+        assert fetch_nbp._backfill_until(path, None, history_from) is None
+        assert fetch_nbp._backfill_until(path, since, history_from) == since
+
+        fetch_nbp._mark_history(path, history_from)
+
+        assert fetch_nbp._backfill_until(path, since, history_from) is None
+
+    @patch('modules.ekonomia.fetch_nbp.refresh_currency_catalog')
     @patch('modules.ekonomia.fetch_nbp.fetch_nbprates')
     @patch('modules.ekonomia.fetch_nbp.fetch_gold')
     @patch('modules.ekonomia.fetch_nbp.update_json')
-    def test_run_update(self, mock_update_json, mock_fetch_gold, mock_fetch_rates):
+    def test_run_update(self, mock_update_json, mock_fetch_gold, mock_fetch_rates, mock_catalog,
+                        tmp_path, monkeypatch):
         """Test funkcji run_update"""
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
         mock_fetch_rates.return_value = [{"effectiveDate": "2025-01-01", "mid": 4.25}]
         mock_fetch_gold.return_value = [{"date": "2025-01-01", "price": 250.50}]
 
@@ -212,6 +272,159 @@ class TestFetchNBP:
         mock_fetch_gold.assert_called_once()
         assert mock_update_json.call_count >= 1
 
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_nbprates_incremental_since_last_date(self, mock_get):
+        """Test synchronizacji przyrostowej - tylko jedno małe zapytanie po ostatniej dacie"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"rates": []}
+        mock_get.return_value = mock_response
+
+        since = datetime.today() - timedelta(days=3)
+        fetch_nbp.fetch_nbprates("EUR", since=since)
+
+        assert mock_get.call_count == 1
+        url = mock_get.call_args[0][0]
+        expected_start = (since + timedelta(days=1)).strftime('%Y-%m-%d')
+        assert f"/EUR/{expected_start}/" in url
+
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_nbprates_up_to_date_makes_no_request(self, mock_get):
+        """Test aktualnych danych - brak zapytań do NBP"""
+        rates = fetch_nbp.fetch_nbprates("EUR", since=datetime.today())
+
+        assert rates == []
+        mock_get.assert_not_called()
+
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_nbprates_full_history_uses_windows(self, mock_get):
+        """Test pełnej historii - okresy max 93 dni"""
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+
+        fetch_nbp.fetch_nbprates("EUR")
+
+        days = (datetime.today() - fetch_nbp.history_start()).days + 1
+        assert mock_get.call_count == -(-days // 93)
+
+    @patch('modules.ekonomia.fetch_nbp.requests.Session.get')
+    def test_fetch_nbprates_backfill_adds_older_range(self, mock_get):
+        """Test uzupełniania historii - dodatkowy zakres od początku historii"""
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+        since = datetime.today() - timedelta(days=3)
+
+        fetch_nbp.fetch_nbprates("EUR", since=since, backfill_until=since)
+
+        urls = [c[0][0] for c in mock_get.call_args_list]
+        assert any(f"/EUR/{fetch_nbp.history_start().strftime('%Y-%m-%d')}/" in u for u in urls)
+        assert len(urls) > 1
+
+    def test_last_stored_date(self, tmp_path):
+        """Test odczytu ostatniej zapisanej daty"""
+        path = tmp_path / "EUR.json"
+        path.write_text(json.dumps([
+            {"effectiveDate": "2025-01-03", "mid": 4.27},
+            {"effectiveDate": "2025-01-01", "mid": 4.25},
+        ]))
+
+        assert fetch_nbp.last_stored_date(str(path), "effectiveDate") == datetime(2025, 1, 3)
+        assert fetch_nbp.last_stored_date(str(tmp_path / "missing.json"), "effectiveDate") is None
+
+    @patch('modules.ekonomia.fetch_nbp.refresh_currency_catalog')
+    @patch('modules.ekonomia.fetch_nbp.fetch_nbprates', return_value=[])
+    @patch('modules.ekonomia.fetch_nbp.fetch_gold', return_value=[])
+    @patch('modules.ekonomia.fetch_nbp.update_json')
+    def test_run_update_passes_last_stored_date(self, mock_update_json, mock_fetch_gold,
+                                                mock_fetch_rates, mock_catalog, tmp_path, monkeypatch):
+        """Test run_update - każda seria synchronizowana od ostatniej zapisanej daty"""
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(fetch_nbp, 'get_currency_codes', lambda: ['EUR'])
+        (tmp_path / 'EUR.json').write_text(json.dumps([{"effectiveDate": "2025-01-03", "mid": 4.27}]))
+
+        fetch_nbp.run_update()
+
+        assert mock_fetch_rates.call_args.kwargs['since'] == datetime(2025, 1, 3)
+        assert mock_fetch_gold.call_args.kwargs['since'] is None
+        # okresy złota idą przez tę samą ograniczoną pulę co kursy walut
+        assert mock_fetch_gold.call_args.kwargs['executor'] is mock_fetch_rates.call_args.kwargs['executor']
+        assert mock_update_json.call_count == 2
+
+    @patch('modules.ekonomia.fetch_nbp.refresh_currency_catalog')
+    @patch('modules.ekonomia.fetch_nbp.fetch_gold')
+    @patch('modules.ekonomia.fetch_nbp.fetch_nbprates')
+    def test_run_update_failed_series_is_left_unchanged(self, mock_fetch_rates, mock_fetch_gold, mock_catalog,
+                                                        tmp_path, monkeypatch):
+        """Test run_update - seria z błędem pobierania nie jest zapisywana (ponowienie od ostatniej daty)"""
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(fetch_nbp, 'get_currency_codes', lambda: ['EUR', 'USD'])
+        (tmp_path / 'EUR.json').write_text(json.dumps([{"effectiveDate": "2025-01-03", "mid": 4.27}]))
+        (tmp_path / 'USD.json').write_text(json.dumps([{"effectiveDate": "2025-01-03", "mid": 4.01}]))
+        (tmp_path / 'gold.json').write_text(json.dumps([{"date": "2025-01-03", "price": 11000.0}]))
+
+        def fetch_rates(code, **kwargs):
+            if code == 'EUR':
+                raise fetch_nbp.requests.exceptions.HTTPError('503')
+            return [{"effectiveDate": "2025-01-06", "mid": 4.05}]
+
+        mock_fetch_rates.side_effect = fetch_rates
+        mock_fetch_gold.side_effect = fetch_nbp.requests.exceptions.ConnectionError('reset')
+
+        fetch_nbp.run_update()
+
+        eur, usd, gold = (str(tmp_path / f) for f in ('EUR.json', 'USD.json', 'gold.json'))
+        assert fetch_nbp.last_stored_date(eur, 'effectiveDate') == datetime(2025, 1, 3)
+        assert fetch_nbp.last_stored_date(usd, 'effectiveDate') == datetime(2025, 1, 6)
+        assert fetch_nbp.last_stored_date(gold, 'date') == datetime(2025, 1, 3)
+        assert fetch_nbp.storage.read_meta(eur) == {}
+        assert fetch_nbp.storage.read_meta(gold) == {}
+
+    @patch('modules.ekonomia.fetch_nbp.refresh_currency_catalog')
+    @patch('modules.ekonomia.fetch_nbp.fetch_gold')
+    @patch('modules.ekonomia.fetch_nbp.fetch_nbprates', return_value=[])
+    def test_run_update_marks_history_only_after_successful_backfill(self, mock_fetch_rates, mock_fetch_gold,
+                                                                     mock_catalog, tmp_path, monkeypatch):
+        """Test run_update - historia oznaczana jako uzupełniona tylko po udanym pobraniu wszystkich okresów"""
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(fetch_nbp, 'get_currency_codes', lambda: ['EUR'])
+        (tmp_path / 'EUR.json').write_text(json.dumps([{"effectiveDate": "2025-01-03", "mid": 4.27}]))
+        (tmp_path / 'gold.json').write_text(json.dumps([{"date": "2025-01-03", "price": 11000.0}]))
+        mock_fetch_gold.side_effect = fetch_nbp.requests.exceptions.ConnectionError('reset')
+
+        fetch_nbp.run_update()
+
+        # EUR: uzupełnienie bez błędów (nawet bez starszych notowań) - oznaczone
+        eur_meta = fetch_nbp.storage.read_meta(str(tmp_path / 'EUR.json'))
+        assert eur_meta['history_from'] == fetch_nbp.history_start().strftime('%Y-%m-%d')
+        assert mock_fetch_rates.call_args.kwargs['backfill_until'] == datetime(2025, 1, 3)
+        # złoto: błąd w trakcie uzupełniania - bez znacznika, następne uruchomienie ponowi
+        assert fetch_nbp.storage.read_meta(str(tmp_path / 'gold.json')) == {}
+        assert fetch_nbp._backfill_until(str(tmp_path / 'gold.json'), datetime(2025, 1, 3),
+                                         fetch_nbp.history_start()) == datetime(2025, 1, 3)
+
+    @patch('modules.ekonomia.fetch_nbp.refresh_currency_catalog')
+    @patch('modules.ekonomia.fetch_nbp.fetch_nbprates', return_value=[])
+    @patch('modules.ekonomia.fetch_nbp.fetch_gold', return_value=[])
+    def test_run_update_writes_latest_manifest(self, mock_fetch_gold, mock_fetch_rates, mock_catalog,
+                                               tmp_path, monkeypatch):
+        """Test run_update - po aktualizacji zapisywany jest manifest ostatnich notowań"""
+        from modules.ekonomia import latest
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(fetch_nbp, 'get_currency_codes', lambda: ['EUR', 'USD'])
+        (tmp_path / 'EUR.json').write_text(json.dumps([
+            {"effectiveDate": "2025-01-02", "mid": 4.25}, {"effectiveDate": "2025-01-03", "mid": 4.27}]))
+        (tmp_path / 'gold.json').write_text(json.dumps([{"date": "2025-01-03", "price": 11000.0}]))
+
+        fetch_nbp.run_update()
+
+        manifest = json.loads((tmp_path / latest.MANIFEST_FILE).read_text())
+        assert set(manifest['series']) == {'EUR', 'gold'}
+        assert manifest['series']['EUR']['value'] == 4.27
+        assert manifest['series']['EUR']['previous'] == 4.25
+        assert manifest['series']['gold']['date'] == '2025-01-03'
+
     def test_currency_codes_constant(self):
         """Test czy CURRENCY_CODES jest listą"""
         assert isinstance(fetch_nbp.CURRENCY_CODES, list)
@@ -220,3 +433,61 @@ class TestFetchNBP:
         """Test czy stała DATA_DIR jest zdefiniowana"""
         assert hasattr(fetch_nbp, 'DATA_DIR')
         assert isinstance(fetch_nbp.DATA_DIR, str)
+
+
+class TestCurrencyCatalog:
+    """Testy dla leniwego katalogu walut (bez zapytań do NBP przy imporcie)"""
+
+    @pytest.fixture(autouse=True)
+    def catalog_file(self, tmp_path, monkeypatch):
+        path = tmp_path / '.currency_catalog'
+        monkeypatch.setattr(fetch_nbp, 'CATALOG_FILE', str(path))
+        monkeypatch.setattr(fetch_nbp, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(fetch_nbp, '_catalog', None)
+        return path
+
+    def test_load_without_file_does_not_hit_network(self):
+        """Test leniwego wczytania - brak pliku nie powoduje zapytania do NBP"""
+        with patch('modules.ekonomia.fetch_nbp.requests.get') as mock_get:
+            catalog = fetch_nbp.load_currency_catalog()
+
+        assert catalog['codes'] == []
+        mock_get.assert_not_called()
+
+    def test_get_currency_codes_falls_back_to_top10(self):
+        """Test braku katalogu - używana jest pełna lista TOP10"""
+        assert fetch_nbp.get_currency_codes() == fetch_nbp.TOP10_CODES
+
+    def test_refresh_persists_catalog(self, catalog_file):
+        """Test odświeżenia katalogu - zapis na dysk i filtrowanie TOP10"""
+        with patch('modules.ekonomia.fetch_nbp.get_daily_currencies', return_value=['EUR', 'USD', 'THB']):
+            fetch_nbp.refresh_currency_catalog()
+
+        stored = json.loads(catalog_file.read_text(encoding='utf-8'))
+        assert stored['codes'] == ['EUR', 'USD', 'THB']
+        assert fetch_nbp.get_currency_codes() == ['EUR', 'USD']
+
+    def test_catalog_loaded_from_disk(self, catalog_file):
+        """Test wczytania zapisanego wcześniej katalogu"""
+        catalog_file.write_text(json.dumps({'codes': ['CHF'], 'updated': datetime.now().isoformat()}))
+
+        assert fetch_nbp.get_currency_codes() == ['CHF']
+
+    def test_fresh_catalog_is_not_refetched(self, catalog_file):
+        """Test świeżego katalogu - brak zapytania do NBP"""
+        catalog_file.write_text(json.dumps({'codes': ['CHF'], 'updated': datetime.now().isoformat()}))
+
+        with patch('modules.ekonomia.fetch_nbp.get_daily_currencies') as mock_fetch:
+            assert fetch_nbp.refresh_currency_catalog() == ['CHF']
+
+        mock_fetch.assert_not_called()
+
+    def test_failed_refresh_keeps_last_good_catalog(self, catalog_file):
+        """Test błędu NBP - zostaje ostatni poprawny katalog"""
+        old = (datetime.now() - timedelta(days=30)).isoformat()
+        catalog_file.write_text(json.dumps({'codes': ['CHF'], 'updated': old}))
+
+        with patch('modules.ekonomia.fetch_nbp.get_daily_currencies', return_value=[]):
+            assert fetch_nbp.refresh_currency_catalog() == ['CHF']
+
+        assert json.loads(catalog_file.read_text())['codes'] == ['CHF']
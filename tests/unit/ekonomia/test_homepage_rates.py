@@ -5,18 +5,23 @@ Testy dla get_homepage_rates (homepage currency rates helper)
 import os
 import sys
 from unittest.mock import patch
-import pandas as pd
+import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
 from modules.ekonomia.ekonomia import get_homepage_rates
+from modules.ekonomia.timeseries import Series
+
+
+def make_series(code, rate):
+    return Series(code, np.array(['2025-01-02'], dtype='datetime64[D]'), np.array([rate]), (1, 1))
 
 
 class TestHomepageRates:
     def test_json_only_all_present_no_api(self):
-        df = pd.DataFrame({"rate": [4.1234]})
+        series = make_series("USD", 4.1234)
 
-        with patch('modules.ekonomia.ekonomia.load_currency_json', return_value=df) as mock_json, \
+        with patch('modules.ekonomia.timeseries.get_series', return_value=series) as mock_json, \
              patch('modules.ekonomia.ekonomia.Manager') as mock_mgr:
             rates = get_homepage_rates(["USD", "EUR"])
 
@@ -28,14 +33,14 @@ class TestHomepageRates:
         mock_mgr.assert_not_called()
 
     def test_missing_json_uses_api_fallback(self):
-        df_usd = pd.DataFrame({"rate": [4.0]})
+        series_usd = make_series("USD", 4.0)
 
         def fake_load(code):
-            return df_usd if code == "USD" else None
+            return series_usd if code == "USD" else None
 
         api_rates = {"usd": 3.99, "eur": 4.5}
 
-        with patch('modules.ekonomia.ekonomia.load_currency_json', side_effect=fake_load), \
+        with patch('modules.ekonomia.timeseries.get_series', side_effect=fake_load), \
              patch('modules.ekonomia.ekonomia.Manager') as mock_mgr:
             mock_mgr.return_value.currencies.get_current_rates.return_value = api_rates
             rates = get_homepage_rates(["USD", "EUR"])
@@ -47,10 +52,25 @@ class TestHomepageRates:
         mock_mgr.return_value.currencies.get_current_rates.assert_called_once()
 
     def test_no_data_returns_empty(self):
-        with patch('modules.ekonomia.ekonomia.load_currency_json', return_value=None), \
+        with patch('modules.ekonomia.timeseries.get_series', return_value=None), \
              patch('modules.ekonomia.ekonomia.Manager') as mock_mgr:
             mock_mgr.return_value.currencies.get_current_rates.return_value = {}
             rates = get_homepage_rates(["USD", "EUR"])
 
         assert rates == []
         mock_mgr.return_value.currencies.get_current_rates.assert_called_once()
+
+    def test_manifest_used_before_series(self):
+        entries = {"USD": {"date": "2025-01-03", "value": 4.01, "previous": 4.0, "change_pct": 0.25}}
+
+        with patch('modules.ekonomia.latest.get', side_effect=entries.get), \
+             patch('modules.ekonomia.timeseries.get_series', return_value=make_series("EUR", 4.3)) as mock_json, \
+             patch('modules.ekonomia.ekonomia.Manager') as mock_mgr:
+            rates = get_homepage_rates(["USD", "EUR"])
+
+        assert rates == [
+            {"code": "USD", "rate": 4.01, "change_pct": 0.25},
+            {"code": "EUR", "rate": 4.3},
+        ]
+        mock_json.assert_called_once_with("EUR")
+        mock_mgr.assert_not_called()
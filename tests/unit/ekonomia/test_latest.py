@@ -0,0 +1,94 @@
+"""
+Testy jednostkowe dla modułu latest (manifest ostatnich notowań NBP)
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import latest, storage
+
+
+def write_series(directory, name, key_date, key_value, values):
+    records = [{key_date: f"2025-01-0{i + 2}", key_value: v} for i, v in enumerate(values)]
+    path = directory / f'{name}.json'
+    path.write_text(json.dumps(records))
+    return str(path)
+
+
+@pytest.fixture
+def series_paths(tmp_path):
+    return {
+        'EUR': (write_series(tmp_path, 'EUR', 'effectiveDate', 'mid', [4.20, 4.25, 4.30]), 'effectiveDate', 'mid'),
+        'USD': (write_series(tmp_path, 'USD', 'effectiveDate', 'mid', [4.00]), 'effectiveDate', 'mid'),
+        'gold': (write_series(tmp_path, 'gold', 'date', 'price', [11000.0, 11110.0]), 'date', 'price'),
+        'CHF': (str(tmp_path / 'CHF.json'), 'effectiveDate', 'mid'),
+    }
+
+
+class TestManifest:
+    """Testy zapisu i odczytu manifestu"""
+
+    def test_entries_with_previous_day_change(self, tmp_path, series_paths):
+        latest.write_manifest(series_paths, str(tmp_path))
+
+        eur = latest.get('eur', str(tmp_path))
+        assert eur['date'] == '2025-01-04'
+        assert eur['value'] == 4.30
+        assert (eur['previous_date'], eur['previous']) == ('2025-01-03', 4.25)
+        assert eur['change'] == pytest.approx(0.05)
+        assert eur['change_pct'] == pytest.approx(1.1765, abs=1e-4)
+        assert latest.get('GOLD', str(tmp_path))['change_pct'] == pytest.approx(1.0)
+
+    def test_single_point_and_missing_series(self, tmp_path, series_paths):
+        latest.write_manifest(series_paths, str(tmp_path))
+
+        assert latest.get('USD', str(tmp_path)) == {'date': '2025-01-02', 'value': 4.00}
+        assert latest.get('CHF', str(tmp_path)) is None
+
+    def test_segment_records_included(self, tmp_path, series_paths):
+        storage.append_records(series_paths['USD'][0], [{"effectiveDate": "2025-01-03", "mid": 4.04}])
+
+        latest.write_manifest(series_paths, str(tmp_path))
+
+        assert latest.get('USD', str(tmp_path))['value'] == 4.04
+        assert latest.get('USD', str(tmp_path))['change_pct'] == pytest.approx(1.0)
+
+    def test_currency_codes_exclude_gold(self, tmp_path, series_paths):
+        latest.write_manifest(series_paths, str(tmp_path))
+
+        assert latest.currency_codes(str(tmp_path)) == ['EUR', 'USD']
+
+    def test_no_manifest(self, tmp_path):
+        assert latest.load(str(tmp_path)) is None
+        assert latest.get('EUR', str(tmp_path)) is None
+        assert latest.currency_codes(str(tmp_path)) is None
+
+
+class TestManifestCache:
+    """Testy pamięci podręcznej manifestu w procesie"""
+
+    def test_cached_until_file_changes(self, tmp_path, series_paths):
+        latest.write_manifest(series_paths, str(tmp_path))
+        first = latest.load(str(tmp_path))
+
+        with patch.object(latest.json, 'load', side_effect=AssertionError('manifest read again')):
+            assert latest.load(str(tmp_path)) is first
+
+        storage.append_records(series_paths['USD'][0], [{"effectiveDate": "2025-01-03", "mid": 4.04}])
+        latest.write_manifest(series_paths, str(tmp_path))
+        assert latest.get('USD', str(tmp_path))['value'] == 4.04
+
+    def test_corrupt_manifest_keeps_last_good(self, tmp_path, series_paths):
+        latest.write_manifest(series_paths, str(tmp_path))
+        assert latest.get('EUR', str(tmp_path))['value'] == 4.30
+
+        with open(latest.manifest_path(str(tmp_path)), 'w') as f:
+            f.write('{"series": ')
+
+        assert latest.get('EUR', str(tmp_path))['value'] == 4.30
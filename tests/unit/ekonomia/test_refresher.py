@@ -0,0 +1,99 @@
+"""
+Testy jednostkowe dla modułu refresher (odświeżanie danych NBP w tle)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import refresher
+from modules.ekonomia.klasy_api_obsluga.TableCache import WARSAW_TZ
+
+
+def warsaw(*args):
+    """Naive local datetime (as written by the refresher) for a Warsaw wall-clock time"""
+    return WARSAW_TZ.localize(datetime(*args)).astimezone().replace(tzinfo=None)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(refresher, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+
+class TestRefresher:
+    """Testy dla modułu refresher"""
+
+    def test_is_stale_without_last_update(self, data_dir):
+        """Test braku pliku .last_update - dane są przeterminowane"""
+        assert refresher.last_update() is None
+        assert refresher.is_stale()
+
+    def test_is_stale_respects_interval(self, data_dir):
+        """Test świeżych i starych danych"""
+        (data_dir / '.last_update').write_text(datetime.now().isoformat())
+        assert not refresher.is_stale()
+
+        old = datetime.now() - refresher.REFRESH_INTERVAL - timedelta(minutes=1)
+        (data_dir / '.last_update').write_text(old.isoformat())
+        assert refresher.is_stale()
+
+    def test_is_stale_after_nbp_publication(self, data_dir):
+        """Test odświeżenia po publikacji NBP (ok. 12:15), mimo że minęło mniej niż REFRESH_INTERVAL"""
+        # środa, 2025-06-04
+        (data_dir / '.last_update').write_text(warsaw(2025, 6, 4, 9, 0).isoformat())
+
+        assert not refresher.is_stale(now=warsaw(2025, 6, 4, 12, 0))
+        assert refresher.is_stale(now=warsaw(2025, 6, 4, 12, 30))
+
+    def test_is_stale_retries_when_nbp_is_late(self, data_dir):
+        """Test ponawiania, gdy po godzinie publikacji brak nowego notowania"""
+        (data_dir / 'gold.json').write_text('[\n{"date": "2025-06-03", "price": 11000.0}\n]\n')
+        (data_dir / '.last_update').write_text(warsaw(2025, 6, 4, 12, 30).isoformat())
+
+        assert not refresher.is_stale(now=warsaw(2025, 6, 4, 12, 40))
+        assert refresher.is_stale(now=warsaw(2025, 6, 4, 13, 1))
+
+        (data_dir / 'gold.json').write_text('[\n{"date": "2025-06-04", "price": 11000.0}\n]\n')
+        assert not refresher.is_stale(now=warsaw(2025, 6, 4, 13, 1))
+
+    def test_refresh_runs_update_and_marks_time(self, data_dir):
+        """Test odświeżenia przeterminowanych danych"""
+        with patch('modules.ekonomia.refresher.fetch_nbp.run_update') as mock_update:
+            assert refresher.refresh_if_stale() is True
+
+        mock_update.assert_called_once()
+        assert refresher.last_update() is not None
+        assert not refresher.is_stale()
+
+    def test_refresh_skipped_when_fresh(self, data_dir):
+        """Test pominięcia odświeżenia, gdy dane są aktualne"""
+        (data_dir / '.last_update').write_text(datetime.now().isoformat())
+
+        with patch('modules.ekonomia.refresher.fetch_nbp.run_update') as mock_update:
+            assert refresher.refresh_if_stale() is False
+
+        mock_update.assert_not_called()
+
+    @pytest.mark.skipif(refresher.fcntl is None, reason="flock niedostępny")
+    def test_refresh_skipped_when_other_process_holds_lock(self, data_dir):
+        """Test single-flight - blokada trzymana przez inny proces"""
+        with open(data_dir / refresher.LOCK_FILE, 'w') as other:
+            refresher.fcntl.flock(other, refresher.fcntl.LOCK_EX | refresher.fcntl.LOCK_NB)
+            with patch('modules.ekonomia.refresher.fetch_nbp.run_update') as mock_update:
+                assert refresher.refresh_if_stale() is False
+            refresher.fcntl.flock(other, refresher.fcntl.LOCK_UN)
+
+        mock_update.assert_not_called()
+
+    def test_run_scheduled_refresh_swallows_errors(self, data_dir):
+        """Test joba schedulera - błąd pobierania nie przerywa działania"""
+        with patch('modules.ekonomia.refresher.fetch_nbp.run_update', side_effect=RuntimeError("NBP down")):
+            refresher.run_scheduled_refresh()
+
+        assert refresher.last_update() is None
@@ -0,0 +1,105 @@
+"""
+Testy jednostkowe dla modułu storage (append-only zapis serii NBP)
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import storage
+
+
+def rec(day, mid):
+    return {"effectiveDate": day, "mid": mid}
+
+
+class TestStorage:
+    """Testy dla plików bazowych i segmentów"""
+
+    def test_read_merges_base_and_segment(self, tmp_path):
+        path = str(tmp_path / "EUR.json")
+        storage.compact(path, "effectiveDate")
+        storage.append_records(path, [rec("2025-01-02", 4.2)])
+
+        assert storage.read_records(path) == [rec("2025-01-02", 4.2)]
+        assert storage.version(path)[1] != (0, 0)
+
+    def test_torn_segment_line_is_ignored_and_repaired(self, tmp_path):
+        path = str(tmp_path / "EUR.json")
+        storage.append_records(path, [rec("2025-01-02", 4.2)])
+        with open(storage.segment_path(path), 'a') as f:
+            f.write('{"effectiveDate": "2025-01-0')  # awaria w trakcie zapisu
+
+        assert storage.read_records(path) == [rec("2025-01-02", 4.2)]
+
+        storage.append_records(path, [rec("2025-01-03", 4.3)])
+
+        with open(storage.segment_path(path)) as f:
+            lines = f.read().splitlines()
+        assert [json.loads(l) for l in lines] == [rec("2025-01-02", 4.2), rec("2025-01-03", 4.3)]
+
+    def test_compact_dedups_truncates_and_replaces_atomically(self, tmp_path):
+        path = tmp_path / "EUR.json"
+        path.write_text(json.dumps([rec("2024-01-01", 4.0), rec("2025-01-01", 4.1)], indent=4))
+        storage.append_records(str(path), [rec("2025-01-01", 4.15), rec("2025-01-02", 4.2)])
+
+        records = storage.compact(str(path), "effectiveDate", keep_since="2025-01-01")
+
+        assert records == [rec("2025-01-01", 4.15), rec("2025-01-02", 4.2)]
+        assert json.loads(path.read_text()) == records
+        assert not os.path.exists(storage.segment_path(str(path)))
+        assert not os.path.exists(f"{path}.tmp")
+
+    def test_last_date_reads_tail_and_segment(self, tmp_path):
+        path = str(tmp_path / "EUR.json")
+        storage.compact(path, "effectiveDate")
+        assert storage.last_date(path, "effectiveDate") is None
+
+        storage.append_records(path, [rec("2025-01-01", 4.0), rec("2025-01-02", 4.1)])
+        storage.compact(path, "effectiveDate")
+        assert storage.last_date(path, "effectiveDate") == "2025-01-02"
+
+        storage.append_records(path, [rec("2025-01-03", 4.2)])
+        assert storage.last_date(path, "effectiveDate") == "2025-01-03"
+
+    def test_last_date_supports_indented_legacy_files(self, tmp_path):
+        path = tmp_path / "EUR.json"
+        path.write_text(json.dumps([rec("2025-01-01", 4.0), rec("2025-01-05", 4.1)], indent=4))
+
+        assert storage.last_date(str(path), "effectiveDate") == "2025-01-05"
+
+    def test_aggregate_weekly_and_monthly_ohlc(self):
+        records = [rec("2025-01-30", 4.0), rec("2025-01-31", 4.3), rec("2025-02-03", 4.1), rec("2025-02-04", 3.9)]
+
+        weekly = storage.aggregate(records, "effectiveDate", "mid", "weekly")
+        monthly = storage.aggregate(records, "effectiveDate", "mid", "monthly")
+
+        assert [w["date"] for w in weekly] == ["2025-01-27", "2025-02-03"]
+        assert weekly[1] == {"date": "2025-02-03", "first": "2025-02-03", "last": "2025-02-04",
+                             "open": 4.1, "high": 4.1, "low": 3.9, "close": 3.9}
+        assert [(m["date"], m["open"], m["high"], m["close"]) for m in monthly] == [
+            ("2025-01-01", 4.0, 4.3, 4.3), ("2025-02-01", 4.1, 4.1, 3.9)]
+
+    def test_update_tiers_combines_partial_periods(self, tmp_path):
+        path = str(tmp_path / "EUR.json")
+        storage.update_tiers(path, [rec("2025-01-02", 4.0), rec("2025-01-03", 4.5)], "effectiveDate", "mid")
+        # druga część miesiąca (np. po obcięciu starszych notowań dziennych)
+        storage.update_tiers(path, [rec("2025-01-03", 4.5), rec("2025-01-20", 3.8)], "effectiveDate", "mid")
+
+        with open(storage.tier_path(path, "monthly")) as f:
+            monthly = json.load(f)
+        assert monthly == [{"date": "2025-01-01", "first": "2025-01-02", "last": "2025-01-20",
+                            "open": 4.0, "high": 4.5, "low": 3.8, "close": 3.8}]
+
+    def test_compact_keeps_truncated_days_in_tiers(self, tmp_path):
+        path = str(tmp_path / "EUR.json")
+        storage.append_records(path, [rec("2020-03-02", 4.3), rec("2025-01-02", 4.2)])
+
+        storage.compact(path, "effectiveDate", keep_since="2024-01-01", key_value="mid")
+
+        assert storage.read_records(path) == [rec("2025-01-02", 4.2)]
+        with open(storage.tier_path(path, "weekly")) as f:
+            assert [w["date"] for w in json.load(f)] == ["2020-03-02", "2024-12-30"]
+
@@ -0,0 +1,93 @@
+"""
+Testy jednostkowe dla TableCache (cache tabel NBP zgodny z kalendarzem publikacji)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia.klasy_api_obsluga import TableCache as table_cache_module
+from modules.ekonomia.klasy_api_obsluga.TableCache import (
+    TableCache, WARSAW_TZ, LATE_RETRY, NEGATIVE_TTL, last_publication, next_publication,
+)
+
+
+def warsaw(*args):
+    return WARSAW_TZ.localize(datetime(*args))
+
+
+class TestPublicationSchedule:
+    """Testy kalendarza publikacji NBP"""
+
+    def test_table_a_before_noon_expires_same_day(self):
+        # poniedziałek 2026-01-05, 10:00
+        assert next_publication('a', warsaw(2026, 1, 5, 10, 0)) == warsaw(2026, 1, 5, 12, 20)
+
+    def test_table_a_friday_afternoon_expires_monday(self):
+        # piątek 2026-01-09, 15:00 -> poniedziałek 2026-01-12
+        assert next_publication('a', warsaw(2026, 1, 9, 15, 0)) == warsaw(2026, 1, 12, 12, 20)
+
+    def test_table_b_is_weekly_on_wednesday(self):
+        # czwartek 2026-01-08 -> środa 2026-01-14
+        assert next_publication('b', warsaw(2026, 1, 8, 9, 0)) == warsaw(2026, 1, 14, 12, 20)
+        assert last_publication('b', warsaw(2026, 1, 8, 9, 0)) == warsaw(2026, 1, 7, 12, 20)
+
+    def test_last_publication_on_weekend(self):
+        # niedziela 2026-01-11 -> piątek 2026-01-09
+        assert last_publication('gold', warsaw(2026, 1, 11, 12, 0)) == warsaw(2026, 1, 9, 12, 20)
+
+
+class TestTableCache:
+    """Testy dla klasy TableCache"""
+
+    def test_get_or_fetch_fetches_once(self):
+        cache = TableCache()
+        fetch = Mock(return_value=[{"effectiveDate": "2099-01-01", "rates": []}])
+
+        cache.get_or_fetch('url', 'a', fetch)
+        cache.get_or_fetch('url', 'a', fetch)
+
+        fetch.assert_called_once()
+
+    def test_failed_fetch_is_cached_briefly(self, monkeypatch):
+        now = [warsaw(2026, 1, 5, 10, 0)]
+        monkeypatch.setattr(table_cache_module, '_now', lambda: now[0])
+        cache = TableCache()
+        fetch = Mock(side_effect=[None, [{"rates": []}]])
+
+        assert cache.get_or_fetch('url', 'a', fetch) is None
+        # w czasie awarii NBP kolejne żądania nie pytają ponownie
+        assert cache.get_or_fetch('url', 'a', fetch) is None
+        assert fetch.call_count == 1
+
+        now[0] += NEGATIVE_TTL + timedelta(seconds=1)
+
+        assert cache.get_or_fetch('url', 'a', fetch) == [{"rates": []}]
+        assert fetch.call_count == 2
+
+    def test_force_bypasses_cache(self):
+        cache = TableCache()
+        fetch = Mock(side_effect=[[1], [2]])
+
+        cache.get_or_fetch('url', 'a', fetch)
+        assert cache.get_or_fetch('url', 'a', fetch, force=True) == [2]
+
+    def test_entry_expires_at_next_publication(self):
+        cache = TableCache()
+        now = warsaw(2026, 1, 5, 10, 0)
+        cache.put('url', 'a', [1], data_date='2026-01-02', now=now)
+
+        assert cache.get('url', now=warsaw(2026, 1, 5, 12, 0)) == [1]
+        assert cache.get('url', now=warsaw(2026, 1, 5, 12, 21)) is None
+
+    def test_late_publication_is_rechecked_soon(self):
+        cache = TableCache()
+        now = warsaw(2026, 1, 5, 13, 0)
+        # o 13:00 powinna być już tabela z 2026-01-05, a NBP zwrócił poprzednią
+        cache.put('url', 'a', [1], data_date='2026-01-02', now=now)
+
+        assert cache.get('url', now=now + LATE_RETRY - timedelta(seconds=1)) == [1]
+        assert cache.get('url', now=now + LATE_RETRY + timedelta(seconds=1)) is None
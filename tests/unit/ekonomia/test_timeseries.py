@@ -0,0 +1,210 @@
+"""
+Testy jednostkowe dla modułu timeseries (kolumnowy cache historii NBP)
+"""
+
+import json
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from modules.ekonomia import storage, timeseries
+from modules.ekonomia.timeseries import TimeSeriesStore
+
+
+def write_json(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+
+
+class TestTimeSeriesStore:
+    """Testy dla klasy TimeSeriesStore"""
+
+    def test_missing_file_returns_none(self, tmp_path):
+        store = TimeSeriesStore(str(tmp_path))
+        assert store.get('EUR') is None
+
+    def test_parses_currency_into_sorted_arrays(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [
+            {"effectiveDate": "2025-01-03", "mid": 4.27},
+            {"effectiveDate": "2025-01-01", "mid": 4.25},
+            {"effectiveDate": "2025-01-02", "mid": 4.26},
+        ])
+        store = TimeSeriesStore(str(tmp_path))
+
+        series = store.get('eur')
+
+        assert series.dates.dtype == np.dtype('datetime64[D]')
+        assert list(series.values) == [4.25, 4.26, 4.27]
+        assert series.latest() == (date(2025, 1, 3), 4.27)
+
+    def test_parses_gold_fields(self, tmp_path):
+        write_json(tmp_path / 'gold.json', [{"date": "2025-01-01", "price": 11000.5}])
+        store = TimeSeriesStore(str(tmp_path))
+
+        series = store.get('gold')
+
+        assert series.latest() == (date(2025, 1, 1), 11000.5)
+
+    def test_duplicate_dates_keep_last(self, tmp_path):
+        write_json(tmp_path / 'USD.json', [
+            {"effectiveDate": "2025-01-01", "mid": 4.00},
+            {"effectiveDate": "2025-01-01", "mid": 4.01},
+        ])
+        store = TimeSeriesStore(str(tmp_path))
+
+        series = store.get('USD')
+
+        assert len(series) == 1
+        assert series.values[0] == 4.01
+
+    def test_hot_path_does_not_reparse(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [{"effectiveDate": "2025-01-01", "mid": 4.25}])
+        store = TimeSeriesStore(str(tmp_path))
+        first = store.get('EUR')
+
+        with patch('modules.ekonomia.storage.json.load') as mock_load:
+            second = store.get('EUR')
+
+        assert second is first
+        mock_load.assert_not_called()
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        path = tmp_path / 'EUR.json'
+        write_json(path, [{"effectiveDate": "2025-01-01", "mid": 4.25}])
+        store = TimeSeriesStore(str(tmp_path))
+        store.get('EUR')
+
+        write_json(path, [
+            {"effectiveDate": "2025-01-01", "mid": 4.25},
+            {"effectiveDate": "2025-01-02", "mid": 4.30},
+        ])
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        assert store.get('EUR').latest() == (date(2025, 1, 2), 4.30)
+
+    def test_value_on_uses_last_known_rate(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [
+            {"effectiveDate": "2025-01-02", "mid": 4.25},
+            {"effectiveDate": "2025-01-06", "mid": 4.30},
+        ])
+        series = TimeSeriesStore(str(tmp_path)).get('EUR')
+
+        assert series.value_on(date(2025, 1, 1)) is None
+        assert series.value_on(date(2025, 1, 4)) == 4.25
+        assert series.value_on(date(2025, 1, 6)) == 4.30
+
+    def test_values_on_is_vectorized_over_days(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [
+            {"effectiveDate": "2025-01-02", "mid": 4.25},
+            {"effectiveDate": "2025-01-06", "mid": 4.30},
+        ])
+        series = TimeSeriesStore(str(tmp_path)).get('EUR')
+
+        dates, values = series.values_on(np.array(['2025-01-01', '2025-01-04', '2025-01-07'], dtype='datetime64[D]'))
+
+        assert np.isnat(dates[0]) and np.isnan(values[0])
+        assert dates[1] == np.datetime64('2025-01-02')
+        assert list(values[1:]) == [4.25, 4.30]
+
+    def test_between_slices_inclusive_range(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [
+            {"effectiveDate": f"2025-01-0{d}", "mid": 4.0 + d / 100} for d in range(1, 8)
+        ])
+        series = TimeSeriesStore(str(tmp_path)).get('EUR')
+
+        dates, values = series.between(date(2025, 1, 3), date(2025, 1, 5))
+        assert list(values) == [4.03, 4.04, 4.05]
+        assert len(series.between(end=date(2025, 1, 2))[0]) == 2
+        assert len(series.between(start=date(2025, 1, 6))[0]) == 2
+
+    def test_arrays_are_read_only(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [{"effectiveDate": "2025-01-01", "mid": 4.25}])
+        series = TimeSeriesStore(str(tmp_path)).get('EUR')
+
+        assert not series.values.flags.writeable
+        assert not series.dates.flags.writeable
+
+    def test_default_store_points_to_data_dir(self):
+        assert os.path.samefile(timeseries.store.data_dir, os.path.join('data', 'economics'))
+
+
+class TestHistoryTiers:
+    """Testy dla poziomów historii (dzienne + agregaty OHLC)"""
+
+    def make_store(self, tmp_path, daily_days, years):
+        start = np.datetime64('2025-12-31') - daily_days
+        days = np.arange(start, np.datetime64('2026-01-01'))
+        write_json(tmp_path / 'EUR.json', [
+            {"effectiveDate": str(d), "mid": 4.0 + i / 1000} for i, d in enumerate(days)
+        ])
+        older = np.arange(np.datetime64('2025-12-31') - 365 * years, np.datetime64('2026-01-01'))
+        records = [{"effectiveDate": str(d), "mid": 4.0} for d in older]
+        for tier in storage.TIERS:
+            write_json_path = storage.tier_path(str(tmp_path / 'EUR.json'), tier)
+            os.makedirs(os.path.dirname(write_json_path), exist_ok=True)
+            write_json(write_json_path, storage.aggregate(records, 'effectiveDate', 'mid', tier))
+        return TimeSeriesStore(str(tmp_path))
+
+    def test_tier_series_has_ohlc_columns(self, tmp_path):
+        store = self.make_store(tmp_path, 30, 2)
+
+        weekly = store.get('EUR', 'weekly')
+
+        assert weekly.tier == 'weekly'
+        assert set(weekly.ohlc) == {'open', 'high', 'low', 'close'}
+        assert weekly.ohlc['close'] is weekly.values
+
+    def test_select_uses_daily_for_recent_range(self, tmp_path):
+        store = self.make_store(tmp_path, 400, 10)
+
+        assert store.select('EUR', date(2025, 6, 1)).tier == 'daily'
+
+    def test_select_uses_coarse_tier_for_long_range(self, tmp_path):
+        store = self.make_store(tmp_path, 400, 10)
+
+        assert store.select('EUR', date(2019, 1, 1)).tier == 'weekly'
+        assert store.select('EUR', max_points=200).tier == 'monthly'
+
+    def test_select_without_tiers_returns_daily(self, tmp_path):
+        write_json(tmp_path / 'EUR.json', [{"effectiveDate": "2025-01-01", "mid": 4.25}])
+
+        assert TimeSeriesStore(str(tmp_path)).select('EUR', date(2015, 1, 1)).tier == 'daily'
+
+
+class TestDownsample:
+    """Testy dla funkcji downsample (LTTB)"""
+
+    def make(self, n):
+        dates = np.arange(np.datetime64('2020-01-01'), np.datetime64('2020-01-01') + n)
+        return dates, np.sin(np.arange(n) / 20.0)
+
+    def test_short_series_is_returned_unchanged(self):
+        dates, values = self.make(10)
+
+        out_dates, out_values = timeseries.downsample(dates, values, 50)
+
+        assert out_dates is dates and out_values is values
+
+    def test_reduces_to_requested_points_keeping_ends(self):
+        dates, values = self.make(1000)
+
+        out_dates, out_values = timeseries.downsample(dates, values, 100)
+
+        assert len(out_dates) == len(out_values) == 100
+        assert out_dates[0] == dates[0] and out_dates[-1] == dates[-1]
+        assert np.all(np.diff(out_dates.astype('int64')) > 0)
+
+    def test_keeps_spikes(self):
+        dates, values = self.make(1000)
+        values = values.copy()
+        values[437] = 10.0
+
+        _, out_values = timeseries.downsample(dates, values, 50)
+
+        assert out_values.max() == 10.0
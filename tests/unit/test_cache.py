@@ -0,0 +1,299 @@
+"""
+Testy jednostkowe dla modules.cache (ograniczony cache LRU z TTL i statystykami)
+"""
+
+import threading
+import time
+
+import pytest
+
+from modules import cache as cache_module
+from modules.cache import BoundedCache, SingleFlight, SQLiteStore, estimate_size
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault('sweep', False)
+    return BoundedCache('test', **kwargs)
+
+
+class TestBoundedCache:
+    """Testy limitów, TTL i liczników"""
+
+    def test_get_set_and_counters(self):
+        cache = make_cache()
+
+        assert cache.get('a') is None
+        cache.set('a', {'x': 1})
+        assert cache.get('a') == {'x': 1}
+
+        total = cache.stats()['total']
+        assert (total['hits'], total['misses'], total['sets']) == (1, 1, 1)
+        assert total['hit_ratio'] == 0.5
+        assert total['entries'] == 1
+
+    def test_ttl_expiry(self, clock):
+        cache = make_cache(ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=300)
+
+        clock[0] += 61
+
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+        assert cache.stats()['total']['expirations'] == 1
+        assert len(cache) == 1
+
+    def test_lru_eviction_by_entries(self):
+        cache = make_cache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')  # 'a' ostatnio używany
+
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.stats()['total']['evictions'] == 1
+
+    def test_eviction_by_bytes(self):
+        cache = make_cache(max_bytes=100, sizeof=len)
+        cache.set('a', 'x' * 60)
+        cache.set('b', 'y' * 60)
+
+        assert 'a' not in cache
+        assert cache.get('b') == 'y' * 60
+        assert cache.stats()['total']['bytes'] == 60
+
+    def test_value_larger_than_limit_not_cached(self):
+        cache = make_cache(max_bytes=10, sizeof=len)
+        cache.set('small', 'x')
+
+        assert cache.set('big', 'x' * 11) is False
+        assert cache.get('big') is None
+        assert cache.get('small') == 'x'
+
+    def test_overwrite_updates_size(self):
+        cache = make_cache(sizeof=len)
+        cache.set('a', 'x' * 10)
+        cache.set('a', 'x' * 3)
+
+        assert cache.stats()['total']['bytes'] == 3
+        assert len(cache) == 1
+
+    def test_expire_removes_unread_entries(self, clock):
+        cache = make_cache(ttl=10)
+        for i in range(5):
+            cache.set(i, i)
+        cache.set('long', 1, ttl=100)
+
+        clock[0] += 11
+
+        assert cache.expire() == 5
+        assert len(cache) == 1
+
+    def test_get_or_set(self):
+        cache = make_cache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None
+
+        assert cache.get_or_set('a', compute) is None
+        assert cache.get_or_set('a', compute) is None
+        assert len(calls) == 1
+
+
+class TestNamespaces:
+    """Testy przestrzeni nazw i liczników per przestrzeń"""
+
+    def test_same_key_in_different_namespaces(self):
+        cache = make_cache()
+        daily, hourly = cache.namespace('daily'), cache.namespace('hourly')
+
+        daily.set('k', 'd')
+        hourly.set('k', 'h')
+
+        assert daily.get('k') == 'd'
+        assert hourly.get('k') == 'h'
+        assert cache.get('k') is None
+
+    def test_stats_per_namespace(self):
+        cache = make_cache()
+        daily = cache.namespace('daily')
+        daily.set('k', 1)
+        daily.get('k')
+        cache.namespace('hourly').get('k')
+
+        assert daily.stats()['hits'] == 1
+        assert daily.stats()['entries'] == 1
+        assert cache.stats()['namespaces']['hourly']['misses'] == 1
+
+    def test_clear_namespace(self):
+        cache = make_cache()
+        cache.namespace('daily').set('k', 1)
+        cache.namespace('hourly').set('k', 2)
+
+        cache.namespace('daily').clear()
+
+        assert cache.namespace('daily').get('k') is None
+        assert cache.namespace('hourly').get('k') == 2
+
+    def test_membership_per_namespace(self, clock):
+        cache = make_cache()
+        daily = cache.namespace('daily')
+        daily.set('k', 1, ttl=60)
+
+        assert 'k' in daily
+        assert cache.contains('k', 'daily')
+        assert 'k' not in cache
+        assert 'k' not in cache.namespace('hourly')
+        assert cache.stats()['namespaces']['daily']['hits'] == 0
+
+        clock[0] += 61
+
+        assert 'k' not in daily
+
+
+def run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+
+class TestSingleFlight:
+    """Testy łączenia równoległych wywołań dla tego samego klucza"""
+
+    def test_concurrent_callers_share_one_load(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls, results = [], []
+
+        def load():
+            calls.append(1)
+            release.wait(5)
+            return {'temp': 1}
+
+        def caller():
+            results.append(flights.do('k', load))
+
+        threading.Timer(0.2, release.set).start()
+        run_concurrently(8, caller)
+
+        assert len(calls) == 1
+        assert len(results) == 8 and all(r is results[0] for r in results)
+        assert flights.stats == {'leaders': 1, 'shared': 7}
+        assert flights.in_flight() == 0
+
+    def test_error_propagates_to_waiters(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def load():
+            release.wait(5)
+            raise RuntimeError('upstream down')
+
+        def caller():
+            try:
+                flights.do('k', load)
+            except RuntimeError as e:
+                errors.append(e)
+
+        threading.Timer(0.2, release.set).start()
+        run_concurrently(4, caller)
+
+        assert len(errors) == 4
+        assert flights.stats['leaders'] == 1
+
+    def test_sequential_calls_load_again(self):
+        flights = SingleFlight()
+
+        assert flights.do('k', lambda: 1) == 1
+        assert flights.do('k', lambda: 2) == 2
+        assert flights.do('other', lambda: 3) == 3
+
+
+class TestSQLiteStore:
+    """Testy wspólnego cache w pliku SQLite (L2 dla wielu procesów)"""
+
+    def test_roundtrip_between_instances(self, tmp_path):
+        path = str(tmp_path / 'shared.sqlite')
+        worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+
+        worker_a.set('daily:50.06:19.94:metric', {'ts': 1.5, 'data': {'list': [1, 2]}}, ttl=60)
+
+        assert worker_b.get('daily:50.06:19.94:metric') == {'ts': 1.5, 'data': {'list': [1, 2]}}
+        assert worker_b.get('missing') is None
+
+    def test_ttl_and_purge(self, tmp_path, clock):
+        store = SQLiteStore(str(tmp_path / 'shared.sqlite'))
+        store.set('a', 1, ttl=10)
+        store.set('b', 2, ttl=100)
+        store.set('c', 3)
+
+        clock[0] += 11
+
+        assert store.get('a') is None
+        assert store.get('b') == 2
+        assert store.purge() == 1
+        assert len(store) == 2
+
+    def test_delete_and_clear(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / 'shared.sqlite'))
+        store.set('a', 1)
+        store.set('b', 2)
+
+        store.delete('a')
+        assert store.get('a') is None
+        store.clear()
+        assert len(store) == 0
+
+    def test_errors_are_misses(self, tmp_path):
+        # katalog zamiast pliku bazy - sqlite nie może go otworzyć
+        store = SQLiteStore(str(tmp_path))
+
+        assert store.set('a', 1) is False
+        assert store.get('a', 'default') == 'default'
+
+    def test_unserializable_value_not_stored(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / 'shared.sqlite'))
+
+        assert store.set('a', object()) is False
+        assert store.get('a') is None
+
+
+class TestRegistry:
+    """Testy rejestru cache i sprzątania w tle"""
+
+    def test_sweep_all_expires_registered_caches(self, clock):
+        cache = make_cache(ttl=1)
+        cache.set('a', 1)
+        clock[0] += 2
+
+        cache_module.sweep_all()
+
+        assert len(cache) == 0
+        assert cache in cache_module.registered()
+
+    def test_sweeper_thread_started(self):
+        make_cache(sweep=True)
+
+        assert cache_module._sweeper is not None
+        assert cache_module._sweeper.daemon
+
+
+def test_estimate_size_grows_with_content():
+    small = {'list': [{'temp': 1.0}]}
+    large = {'list': [{'temp': float(i), 'desc': 'x' * 50} for i in range(100)]}
+
+    assert estimate_size(large) > estimate_size(small) > 0
@@ -0,0 +1,129 @@
+"""
+Testy jednostkowe dla modułu chart_renderer (rysowanie wykresów poza procesem serwera)
+"""
+
+import base64
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from modules import chart_renderer
+from modules.chart_renderer import ChartRenderer, RenderBusy, RenderTimeout
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+
+def test_line_chart_in_worker_process():
+    renderer = ChartRenderer(workers=1)
+    try:
+        dates = np.arange(np.datetime64('2025-01-01'), np.datetime64('2025-01-11'))
+        png = renderer.render('line', {'x': dates, 'y': np.linspace(4.0, 4.5, 10), 'title': 'EUR'})
+        used_pool = renderer._pool is not None
+    finally:
+        renderer.shutdown()
+
+    assert used_pool
+    assert png.startswith(PNG_MAGIC)
+
+
+def test_script_from_stdin_renders_inline():
+    # procesy robocze nie zaimportują __main__ z stdin - wykres rysowany w miejscu zamiast "worker died"
+    script = (
+        "from modules.chart_renderer import ChartRenderer\n"
+        "renderer = ChartRenderer(workers=1)\n"
+        "png = renderer.render('line', {'x': [1, 2], 'y': [4.0, 4.1]})\n"
+        "print(png[:4] == b'\\x89PNG', renderer._pool is None)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    result = subprocess.run([sys.executable, '-'], input=script, capture_output=True, text=True,
+                            cwd=root, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['True', 'True']
+
+
+def test_weather_chart_inline_with_missing_values():
+    renderer = ChartRenderer(workers=0)
+
+    png = renderer.render('weather', {'labels': ['00:00', '03:00', '06:00'],
+                                      'temps': [1.0, None, 3.0], 'precip': [None, 0.2, 0.0]})
+
+    assert png.startswith(PNG_MAGIC)
+
+
+def test_empty_line_chart_base64():
+    encoded = ChartRenderer(workers=0).render_base64('line', {'x': [], 'y': []})
+
+    assert base64.b64decode(encoded).startswith(PNG_MAGIC)
+
+
+def test_unknown_chart_kind():
+    with pytest.raises(ValueError):
+        ChartRenderer(workers=0).render('pie', {})
+
+
+def test_full_queue_raises_busy(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_chart(spec):
+        started.set()
+        release.wait(5)
+        return b'png'
+
+    monkeypatch.setitem(chart_renderer.CHARTS, 'slow', slow_chart)
+    renderer = ChartRenderer(workers=0, max_pending=1)
+    worker = threading.Thread(target=renderer.render, args=('slow', {}))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(RenderBusy):
+            renderer.render('slow', {}, timeout=0.05)
+    finally:
+        release.set()
+        worker.join()
+
+    assert renderer.render('slow', {}) == b'png'
+
+
+def test_timeout_includes_wait_for_queue_slot(monkeypatch):
+    renderer = ChartRenderer(workers=1, max_pending=1)
+    clock = [100.0]
+    monkeypatch.setattr(chart_renderer.time, 'monotonic', lambda: clock[0])
+    results = []
+
+    class SlowSlots:
+        def acquire(self, timeout):
+            clock[0] += timeout - 0.5  # czekanie na miejsce w kolejce zużyło prawie cały czas
+            return True
+
+        def release(self):
+            pass
+
+    class Future:
+        def result(self, timeout):
+            results.append(timeout)
+            return PNG_MAGIC
+
+    class Pool:
+        def submit(self, fn, *args):
+            return Future()
+
+    renderer._slots = SlowSlots()
+    monkeypatch.setattr(renderer, '_get_pool', lambda: Pool())
+
+    assert renderer.render('line', {}, timeout=10) == PNG_MAGIC
+    assert results == [0.5]
+
+
+def test_timeout_raises_render_timeout():
+    renderer = ChartRenderer(workers=1)
+    try:
+        with pytest.raises(RenderTimeout):
+            renderer.render('line', {'x': [], 'y': []}, timeout=0.001)
+    finally:
+        renderer.shutdown()
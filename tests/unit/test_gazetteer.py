@@ -0,0 +1,97 @@
+"""
+Testy jednostkowe dla modules.gazetteer (wbudowany spis miejscowości i autouzupełnianie)
+"""
+
+import pytest
+
+from modules import gazetteer
+from modules.gazetteer import Gazetteer
+
+PLACES = [
+    ("Stary Sącz", "małopolskie", 49.56, 20.63, 9000),
+    ("Nowy Sącz", "małopolskie", 49.62, 20.69, 84000),
+    ("Sączów", "śląskie", 50.38, 19.04, 1500),
+    ("Kraków", "małopolskie", 50.06, 19.94, 800000),
+    ("Krakowiany", "dolnośląskie", 51.05, 17.07, 600),
+    ("Osiek", "małopolskie", 50.00, 19.27, 3000),
+    ("Osiek", "świętokrzyskie", 50.52, 21.42, 1800),
+]
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+@pytest.fixture
+def small():
+    return Gazetteer(PLACES)
+
+
+def test_complete_prefers_larger_places(small):
+    assert names(small.complete("krak")) == ["Kraków", "Krakowiany"]
+    assert names(small.complete("KRAKOWI")) == ["Krakowiany"]
+
+
+def test_complete_matches_later_words_after_name_starts(small):
+    # "Sączów" zaczyna się od "sacz", "Nowy Sącz" i "Stary Sącz" pasują drugim słowem
+    assert names(small.complete("sącz")) == ["Sączów", "Nowy Sącz", "Stary Sącz"]
+
+
+def test_complete_limit_and_misses(small):
+    assert len(small.complete("s", limit=2)) == 2
+    assert small.complete("berlin") == []
+    assert small.complete("   ") == []
+
+
+def test_lookup_exact_name_only(small):
+    assert names(small.lookup("krakow")) == ["Kraków"]
+    assert small.lookup("krak") == []
+    # "sacz" to tylko drugie słowo nazw - nie jest pełną nazwą miejscowości
+    assert small.lookup("sacz") == []
+    osiek = small.lookup("Osiek")
+    assert [r["state"] for r in osiek] == ["województwo małopolskie", "województwo świętokrzyskie"]
+    assert len(small.lookup("Osiek", limit=1)) == 1
+
+
+def test_city_districts_not_indexed():
+    places = PLACES + [
+        ("Wola", "mazowieckie", 52.23, 20.96, 140000, gazetteer.DISTRICT),
+        ("Wola", "śląskie", 50.02, 19.12, 8500, gazetteer.PLACE),
+    ]
+    g = Gazetteer(places)
+
+    assert [r["state"] for r in g.lookup("Wola")] == ["województwo śląskie"]
+    assert len(g.complete("wol")) == 1
+    assert len(g) == len(PLACES) + 1
+
+
+def test_results_have_geocode_shape(small):
+    place = small.lookup("Kraków")[0]
+
+    assert place == {
+        "name": "Kraków", "local_names": {"pl": "Kraków"},
+        "lat": 50.06, "lon": 19.94, "country": "PL", "state": "województwo małopolskie",
+    }
+
+
+def test_bundled_gazetteer_loaded_once():
+    gazetteer.clear()
+    bundled = gazetteer.get()
+
+    assert gazetteer.get() is bundled
+    assert len(bundled) > 3000
+    assert names(bundled.complete("warsz", limit=1)) == ["Warszawa"]
+    assert bundled.lookup("Łódź")[0]["state"] == "województwo łódzkie"
+    # dzielnica Warszawy nie przesłania miejscowości o tej samej nazwie
+    assert all(r["state"] != "województwo mazowieckie" for r in bundled.lookup("Wola"))
+    assert bundled.lookup("Bielany") == []
+
+
+def test_missing_file_gives_empty_gazetteer(tmp_path, monkeypatch):
+    monkeypatch.setattr(gazetteer, "GAZETTEER_PATH", str(tmp_path / "missing.csv"))
+    gazetteer.clear()
+    try:
+        assert len(gazetteer.get()) == 0
+        assert gazetteer.get().complete("krak") == []
+    finally:
+        gazetteer.clear()
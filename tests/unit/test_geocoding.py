@@ -0,0 +1,94 @@
+"""
+Testy jednostkowe dla modules.geocoding (trwały cache geokodowania z indeksem prefiksów)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules import geocoding
+from modules.database import db, GeocodeQuery, GeocodePlace
+
+KRAKOW = {
+    "name": "Kraków", "lat": 50.0619, "lon": 19.9369, "country": "PL",
+    "local_names": {"pl": "Kraków", "en": "Cracow", "de": "Krakau"},
+}
+OPOLE_LUBELSKIE = {"name": "Opole Lubelskie", "lat": 51.1487, "lon": 21.9685, "country": "PL"}
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Kraków", "krakow"),
+    ("  KRAKÓW ", "krakow"),
+    ("Łódź", "lodz"),
+    ("Kędzierzyn-Koźle", "kedzierzyn kozle"),
+    ("Nowy   Sącz", "nowy sacz"),
+])
+def test_normalize_place_name(name, expected):
+    assert geocoding.normalize_place_name(name) == expected
+
+
+def test_aliases_include_local_names_and_query():
+    assert geocoding.aliases(KRAKOW, "krakau miasto") == {"krakow", "cracow", "krakau miasto"}
+
+
+def test_exact_query_is_normalized(app):
+    geocoding.store("Kraków", [KRAKOW])
+
+    assert geocoding.lookup("krakow") == [KRAKOW]
+    assert geocoding.lookup("KRAKÓW") == [KRAKOW]
+    assert geocoding.lookup("Wrocław") is None
+
+
+def test_partial_name_answered_from_prefix_index(app):
+    geocoding.store("Kraków", [KRAKOW])
+
+    assert geocoding.lookup("Krak") == [KRAKOW]
+    assert geocoding.lookup("crac") == [KRAKOW]
+    # za krótki prefiks
+    assert geocoding.lookup("Kr") is None
+
+
+def test_prefix_results_deduplicated_by_place(app):
+    geocoding.store("Kraków", [KRAKOW])
+    geocoding.store("Krakau", [KRAKOW])
+
+    assert geocoding.lookup("kra") == [KRAKOW]
+    assert GeocodePlace.query.count() == 3  # krakow, cracow, krakau
+
+
+def test_complete_word_of_longer_name_goes_upstream(app):
+    geocoding.store("Opole Lubelskie", [OPOLE_LUBELSKIE])
+
+    # "Opole" to może być inne miasto - nie zgadujemy z "Opole Lubelskie"
+    assert geocoding.lookup("Opole") is None
+    assert geocoding.lookup("Opol") == [OPOLE_LUBELSKIE]
+    assert geocoding.lookup("Opole Lub") == [OPOLE_LUBELSKIE]
+
+
+def test_empty_results_cached_until_negative_ttl(app):
+    geocoding.store("Xyzzy", [])
+    assert geocoding.lookup("xyzzy") == []
+
+    entry = db.session.get(GeocodeQuery, "xyzzy")
+    entry.created_at = datetime.utcnow() - timedelta(seconds=geocoding.NEGATIVE_TTL + 1)
+    db.session.commit()
+
+    assert geocoding.lookup("xyzzy") is None
+
+
+def test_store_twice_keeps_single_rows(app):
+    geocoding.store("Kraków", [KRAKOW])
+    geocoding.store("krakow", [KRAKOW])
+
+    assert GeocodeQuery.query.count() == 1
+    assert GeocodePlace.query.count() == 2
+
+
+def test_database_errors_are_misses(app, monkeypatch):
+    def broken(*args, **kwargs):
+        raise geocoding.SQLAlchemyError("database is locked")
+
+    monkeypatch.setattr(GeocodeQuery, "get", broken)
+
+    assert geocoding.lookup("Kraków") is None
+    assert geocoding.store("Kraków", [KRAKOW]) is False
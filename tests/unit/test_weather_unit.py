@@ -30,6 +30,279 @@ def test_cache_expires(monkeypatch):
     assert wa._cache_get("k1") is None
 
 
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(wa._OW_CACHE, "max_entries", 3)
+
+    for i in range(10):
+        wa._cache_set(f"daily:{i}:{i}:7:metric", {"i": i})
+
+    assert len(wa._OW_CACHE) == 3
+    assert wa._cache_get("daily:0:0:7:metric") is None
+    assert wa._cache_get("daily:9:9:7:metric") == {"i": 9}
+    assert wa._OW_CACHE.stats()["namespaces"]["daily"]["evictions"] == 7
+
+
+# ----------------------------
+# KLUCZE CACHE (SIATKA WSPÓŁRZĘDNYCH, CNT)
+# ----------------------------
+
+class FakeOpenWeather:
+    """Zastępuje requests.get - liczy zapytania i zwraca `days` dni prognozy."""
+
+    def __init__(self, days=7):
+        self.calls = []
+        self.days = days
+
+    def __call__(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        cnt = params.get("cnt", self.days)
+        resp = type("Resp", (), {})()
+        resp.status_code = 200
+        resp.raise_for_status = lambda: None
+        resp.json = lambda: {"cnt": cnt, "list": [{"dt": i} for i in range(cnt)]}
+        return resp
+
+
+@pytest.fixture
+def fake_ow(monkeypatch):
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+    monkeypatch.setattr(wa, "_OW_GRID_DEG", 0.01)
+    fake = FakeOpenWeather()
+    monkeypatch.setattr(wa.requests, "get", fake)
+    return fake
+
+
+def test_quantize_coords_grid():
+    assert wa.quantize_coords(50.0647, 19.943) == (50.06, 19.94)
+    assert wa.quantize_coords(50.06470000001, 19.94299999) == (50.06, 19.94)
+    assert wa.quantize_coords(50.0647, 19.943, grid=0.1) == (50.1, 19.9)
+
+
+def test_daily_forecast_nearby_coords_share_entry(fake_ow):
+    wa.fetch_daily_forecast(50.0647, 19.9430)
+    wa.fetch_daily_forecast(50.06471234, 19.94312345)
+    wa.fetch_daily_forecast(50.0612, 19.9398)
+
+    assert len(fake_ow.calls) == 1
+    assert (fake_ow.calls[0]["lat"], fake_ow.calls[0]["lon"]) == (50.06, 19.94)
+
+
+def test_daily_forecast_smaller_cnt_served_from_full_fetch(fake_ow):
+    full = wa.fetch_daily_forecast(50.06, 19.94, cnt=7)
+    three = wa.fetch_daily_forecast(50.06, 19.94, cnt=3)
+
+    assert len(fake_ow.calls) == 1
+    assert fake_ow.calls[0]["cnt"] == 7
+    assert [d["dt"] for d in three["list"]] == [0, 1, 2]
+    assert len(full["list"]) == 7
+    assert len(wa.fetch_daily_forecast(50.06, 19.94, cnt=7)["list"]) == 7
+
+
+def test_daily_forecast_larger_cnt_refetches(fake_ow):
+    wa.fetch_daily_forecast(50.06, 19.94, cnt=3)
+    data = wa.fetch_daily_forecast(50.06, 19.94, cnt=10)
+    wa.fetch_daily_forecast(50.06, 19.94, cnt=7)
+
+    assert [c["cnt"] for c in fake_ow.calls] == [7, 10]
+    assert len(data["list"]) == 10
+
+
+def test_hourly_forecast_nearby_coords_share_entry(fake_ow):
+    wa.fetch_hourly_forecast(52.2297, 21.0122)
+    wa.fetch_hourly_forecast(52.22971, 21.01219)
+
+    assert len(fake_ow.calls) == 1
+
+
+def test_concurrent_misses_make_one_upstream_call(fake_ow, monkeypatch):
+    import threading
+    release = threading.Event()
+    slow_get = fake_ow.__call__
+
+    def get(url, params=None, timeout=None):
+        release.wait(5)
+        return slow_get(url, params, timeout)
+
+    monkeypatch.setattr(wa.requests, "get", get)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(wa.fetch_hourly_forecast(50.06, 19.94)))
+               for _ in range(6)]
+    for t in threads:
+        t.start()
+    threading.Timer(0.2, release.set).start()
+    for t in threads:
+        t.join(5)
+
+    assert len(fake_ow.calls) == 1
+    assert len(results) == 6
+
+
+# ----------------------------
+# MIĘKKI / TWARDY TTL
+# ----------------------------
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+HOURLY_KEY = "hourly:50.06:19.94:metric"
+DAILY_KEY = "daily:50.06:19.94:metric"
+
+
+def failing_get(url, params=None, timeout=None):
+    raise wa.requests.ConnectionError("OpenWeather down")
+
+
+def soft_ttl(key):
+    return wa._cache_record(key)["ttl"]
+
+
+def hard_ttl(key):
+    return soft_ttl(key) + wa._OW_REVALIDATE_WINDOW
+
+
+def test_soft_expired_entry_served_and_refreshed_in_background(fake_ow, clock):
+    first = wa.fetch_hourly_forecast(50.06, 19.94)
+    clock[0] += soft_ttl(HOURLY_KEY) + 1
+
+    assert wa.fetch_hourly_forecast(50.06, 19.94) is first
+
+    deadline = time.monotonic() + 5
+    while len(fake_ow.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(fake_ow.calls) == 2
+
+
+def test_hard_expired_entry_refetched_synchronously(fake_ow, clock):
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    clock[0] += hard_ttl(HOURLY_KEY) + 1
+
+    data = wa.fetch_hourly_forecast(50.06, 19.94)
+
+    assert len(fake_ow.calls) == 2
+    assert "stale" not in data
+
+
+def test_hard_expired_entry_served_stale_on_error(fake_ow, clock, monkeypatch):
+    wa.fetch_daily_forecast(50.06, 19.94, cnt=3)
+    age = hard_ttl(DAILY_KEY) + 1
+    clock[0] += age
+    monkeypatch.setattr(wa.requests, "get", failing_get)
+
+    data = wa.fetch_daily_forecast(50.06, 19.94, cnt=3)
+
+    assert data["stale"] is True
+    assert data["age_seconds"] == age
+    assert len(data["list"]) == 3
+
+
+def test_error_backoff_skips_upstream(fake_ow, clock, monkeypatch):
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    clock[0] += hard_ttl(HOURLY_KEY) + 1
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(url)
+        return failing_get(url, params, timeout)
+
+    monkeypatch.setattr(wa.requests, "get", get)
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    assert len(calls) == 1
+
+    clock[0] += wa._OW_ERROR_BACKOFF + 1
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    assert len(calls) == 2
+
+
+def test_error_without_cached_entry_raises(fake_ow, monkeypatch):
+    monkeypatch.setattr(wa.requests, "get", failing_get)
+
+    with pytest.raises(wa.requests.ConnectionError):
+        wa.fetch_hourly_forecast(50.06, 19.94)
+
+
+# ----------------------------
+# ADAPTACYJNY TTL
+# ----------------------------
+
+def test_adaptive_ttl_hourly_until_next_forecast_slot():
+    now = 1_700_000_000  # 22:13:20 UTC
+    data = {"list": [{"dt": now - 600}, {"dt": now + 1400}, {"dt": now + 12200}]}
+
+    assert wa.adaptive_ttl("hourly", data, now=now) == 1400
+
+
+def test_adaptive_ttl_hourly_until_next_update_cycle():
+    now = 1_700_000_000
+    next_cycle = (now // 10800 + 1) * 10800
+
+    assert wa.adaptive_ttl("hourly", {"list": []}, now=now) == next_cycle - now
+
+
+def test_adaptive_ttl_daily_until_local_midnight():
+    now = 1_700_000_000  # 22:13:20 UTC = 23:13:20 w Krakowie (UTC+1)
+    data = {"city": {"timezone": 3600}, "list": [{"dt": now}]}
+
+    assert wa.adaptive_ttl("daily", data, now=now) == 2800
+
+
+def test_adaptive_ttl_bounds(monkeypatch):
+    monkeypatch.setattr(wa, "_OW_TTL_BOUNDS", {"daily": (60, 1800), "hourly": (600, 3600)})
+    now = 1_700_000_000
+
+    assert wa.adaptive_ttl("hourly", {"list": [{"dt": now + 10}]}, now=now) == 600
+    assert wa.adaptive_ttl("daily", {"city": {"timezone": 0}}, now=now) == 1800
+    assert wa.adaptive_ttl("unknown", {}, now=now) == wa._OW_CACHE_TTL
+
+
+def test_fetch_stores_adaptive_ttl(fake_ow, clock):
+    wa.fetch_hourly_forecast(50.06, 19.94)
+
+    assert soft_ttl(HOURLY_KEY) == wa.adaptive_ttl("hourly", {"list": []}, now=clock[0])
+    assert soft_ttl(HOURLY_KEY) > wa._OW_CACHE_TTL
+
+
+# ----------------------------
+# WSPÓLNY CACHE (L2)
+# ----------------------------
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    store = wa._make_shared_cache("sqlite", str(tmp_path / "weather.sqlite"))
+    monkeypatch.setattr(wa, "_OW_SHARED", store)
+    return store
+
+
+def test_make_shared_cache_backends(tmp_path):
+    from modules.cache import SQLiteStore
+
+    assert isinstance(wa._make_shared_cache("sqlite", str(tmp_path / "w.sqlite")), SQLiteStore)
+    assert wa._make_shared_cache("none") is None
+    assert wa._make_shared_cache("bogus") is None
+
+
+def test_other_worker_served_from_shared_cache(fake_ow, shared_cache):
+    first = wa.fetch_daily_forecast(50.06, 19.94)
+    wa._OW_CACHE.clear()  # inny worker: pusty cache procesu
+
+    assert wa.fetch_daily_forecast(50.06, 19.94) == first
+    assert len(fake_ow.calls) == 1
+    assert len(wa._OW_CACHE) == 1
+
+
+def test_soft_expired_l1_uses_newer_shared_entry(fake_ow, shared_cache, clock):
+    wa.fetch_hourly_forecast(50.06, 19.94)
+    clock[0] += soft_ttl(HOURLY_KEY) + 1
+    shared_cache.set(HOURLY_KEY, {"ts": clock[0], "data": {"list": ["od innego workera"]}, "ttl": 60}, ttl=60)
+
+    assert wa.fetch_hourly_forecast(50.06, 19.94) == {"list": ["od innego workera"]}
+    assert len(fake_ow.calls) == 1
+
+
 # ----------------------------
 # NORMALIZE_FORECAST
 # ----------------------------